@@ -1,15 +1,23 @@
+import logging
+import os
 from flask import Flask
 from flask_cors import CORS
-from modules.api_routes import api_bp
+from modules.api_routes import api_bp, export_metrics
 from modules.ui_routes import ui_bp
 
 def create_app():
     app = Flask(__name__)
     CORS(app)
 
+    # 诊断日志级别（默认 WARNING，坐标转换等 debug 日志不产生开销）
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'WARNING').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
     # 注册蓝图
     app.register_blueprint(ui_bp)
     app.register_blueprint(api_bp, url_prefix='/api')
+    # Prometheus 默认抓取路径
+    app.add_url_rule('/metrics', 'metrics', export_metrics)
 
     return app
 
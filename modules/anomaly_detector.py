@@ -1,80 +1,264 @@
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Union
 from scipy import stats
-import math
+from .station_layout import StationLayout, pairwise_distances
+from .station_baseline import StationBaselines
+from .power_frame import PowerFrame
+from .pipeline_metrics import pipeline_metrics
+from .propagation_model import PropagationModel
+from .location_algorithm import LocationAlgorithm
 
 class AnomalyDetector:
     """异常检测器 - 检测电台数据中的异常值"""
+
+    # 各方法的投票权重：统计类方法均低于 vote_threshold，需两种方法一致；
+    # 模型残差直接对照拟合的传播模型，单独即可判定异常
+    METHOD_WEIGHTS = {
+        'z_score': 0.35,
+        'iqr': 0.35,
+        'distance_based': 0.3,
+        'history': 0.2,
+        'model_residual': 0.5
+    }
     
     def __init__(self):
         """初始化异常检测参数"""
         self.z_score_threshold = 2.5  # Z-score阈值
         self.iqr_multiplier = 1.5     # IQR异常检测倍数
         self.min_stations_for_detection = 4  # 进行异常检测的最小电台数
+        self.distance_z_threshold = 6.0      # 功率梯度鲁棒 z-score 阈值（干扰源附近梯度天然偏高，取保守值）
+        self.distance_block_elements = 4_000_000  # 距离检测分块的中间矩阵元素上限
+        self.vote_threshold = 0.5            # 加权投票阈值（至少两种方法一致）
+        self.model_residual_threshold = 12.0  # 相对拟合传播模型的残差阈值 (dB)
+        self.locator = LocationAlgorithm()   # 拟合干扰源位置用的定位器（对数距离模型）
         
-    def detect_anomalies(self, power_data: List[Dict]) -> Dict:
+    def detect_anomalies(self, power_data: Union[PowerFrame, List[Dict]], layout: Optional[StationLayout] = None,
+                         baselines: Optional[StationBaselines] = None,
+                         model: Optional[PropagationModel] = None) -> Dict:
         """
         检测功率数据中的异常值
         
         Args:
-            power_data: 电台功率数据列表
+            power_data: 电台功率数据（PowerFrame 或记录列表）
+            layout: 电台布局缓存（提供时直接使用其两两距离矩阵）
+            baselines: 电台在线基线（提供时启用在线模式：持续故障电台在投票前直接剔除，
+                       其余电台按自身历史打分，正常样本写回基线）
+            model: 模型残差检验使用的传播模型参数（默认 self.locator.model）
             
         Returns:
             异常检测结果
         """
-        if len(power_data) < self.min_stations_for_detection:
+        frame = PowerFrame.coerce(power_data)
+        powers = frame.power
+
+        # 在线模式：持续故障的电台直接标记，不参与后续统计
+        station_ids = None
+        faulty = np.zeros(len(frame), dtype=bool)
+        if baselines is not None and frame.has_station_ids:
+            station_ids = frame.station_id
+            faulty = baselines.faulty_mask(station_ids)
+        active = np.flatnonzero(~faulty)
+        active_data = frame.subset(active) if faulty.any() else frame
+
+        if len(active_data) < self.min_stations_for_detection:
+            final_anomalies = np.flatnonzero(faulty).tolist()
             return {
-                'anomaly_indices': [],
-                'normal_indices': list(range(len(power_data))),
-                'anomaly_details': [],
+                'anomaly_indices': final_anomalies,
+                'normal_indices': active.tolist(),
+                'anomaly_details': [self._persistent_fault_details(frame, i) for i in final_anomalies],
                 'detection_method': 'insufficient_data',
                 'summary': f'数据量不足，需要至少{self.min_stations_for_detection}个电台'
             }
         
-        powers = np.array([d['power'] for d in power_data])
+        active_powers = powers[active]
         
         # 使用多种方法检测异常
         anomaly_results = {}
         
         # 方法1: Z-score检测
-        z_score_anomalies = self._z_score_detection(powers)
+        with pipeline_metrics.timer('anomaly_z_score'):
+            z_score_anomalies = self._z_score_detection(active_powers)
         anomaly_results['z_score'] = z_score_anomalies
         
         # 方法2: IQR检测
-        iqr_anomalies = self._iqr_detection(powers)
+        with pipeline_metrics.timer('anomaly_iqr'):
+            iqr_anomalies = self._iqr_detection(active_powers)
         anomaly_results['iqr'] = iqr_anomalies
         
         # 方法3: 基于距离的检测
-        distance_anomalies = self._distance_based_detection(power_data)
+        station_distances = None
+        stations_pos = active_data.positions if active_data.has_positions else None
+        if layout is not None:
+            # 上报坐标与布局不一致时按上报坐标计算距离
+            indices = layout.indices_matching(active_data)
+            if indices is not None:
+                station_distances = layout.distance_matrix[np.ix_(indices, indices)]
+                stations_pos = layout.positions[indices]
+        with pipeline_metrics.timer('anomaly_distance'):
+            distance_anomalies = self._distance_based_detection(active_data, station_distances)
         anomaly_results['distance_based'] = distance_anomalies
+
+        # 方法4: 相对拟合传播模型的残差
+        if stations_pos is not None:
+            with pipeline_metrics.timer('anomaly_model_residual'):
+                strongest, residual = self._model_residuals(active_powers[None, :], stations_pos, model)
+            strongest = int(strongest[0])
+            anomaly_results['model_residual'] = np.flatnonzero(
+                np.abs(residual[0]) > self.model_residual_threshold).tolist()
+            # 最强电台残差小：其高功率由附近的干扰源解释，统计类方法对它的票予以豁免
+            if strongest not in anomaly_results['model_residual']:
+                for method in ('z_score', 'iqr', 'distance_based'):
+                    anomaly_results[method] = [idx for idx in anomaly_results[method] if idx != strongest]
+
+        # 方法5（在线模式）: 按电台自身历史的 z-score
+        if station_ids is not None:
+            history_z = baselines.score(station_ids[active], active_powers)
+            anomaly_results['history'] = np.flatnonzero(np.abs(history_z) > baselines.z_threshold).tolist()
         
-        # 综合判断异常
-        final_anomalies = self._combine_anomaly_results(anomaly_results, len(power_data))
+        # 综合判断异常（索引映射回原始电台顺序）
+        voting_methods = self._voting_methods(len(active_data), stations_pos is not None, station_ids is not None)
+        with pipeline_metrics.timer('anomaly_combine'):
+            combined = self._combine_anomaly_results(anomaly_results, len(active_data),
+                                                     self._required_score(voting_methods))
+        final_anomalies = np.flatnonzero(faulty).tolist() + [int(active[idx]) for idx in combined]
         
         # 生成详细结果
-        anomaly_details = []
-        for idx in final_anomalies:
-            station = power_data[idx]
+        anomaly_details = [self._persistent_fault_details(frame, i) for i in np.flatnonzero(faulty)]
+        for idx in combined:
             details = {
-                'station_id': station['station_id'],
-                'station_name': station['station_name'],
-                'power': station['power'],
-                'anomaly_type': self._classify_anomaly_type(station['power'], powers),
+                'station_id': self._json_scalar(active_data.station_id[idx]),
+                'station_name': active_data.station_name[idx],
+                'power': float(active_powers[idx]),
+                'anomaly_type': self._classify_anomaly_type(active_powers[idx], active_powers),
                 'confidence': self._calculate_anomaly_confidence(idx, anomaly_results)
             }
             anomaly_details.append(details)
         
-        normal_indices = [i for i in range(len(power_data)) if i not in final_anomalies]
+        anomaly_mask = np.zeros(len(frame), dtype=bool)
+        anomaly_mask[final_anomalies] = True
+        normal_indices = np.flatnonzero(~anomaly_mask).tolist()
+
+        # 在线模式：只用正常样本更新基线，避免异常值污染历史
+        if station_ids is not None:
+            baselines.update(station_ids[normal_indices], powers[normal_indices])
         
         return {
             'anomaly_indices': final_anomalies,
             'normal_indices': normal_indices,
             'anomaly_details': anomaly_details,
-            'detection_method': 'combined',
+            'detection_method': 'combined_online' if station_ids is not None else 'combined',
             'summary': f'检测到{len(final_anomalies)}个异常电台，{len(normal_indices)}个正常电台',
             'statistics': self._calculate_statistics(powers, final_anomalies)
         }
+
+    @staticmethod
+    def _json_scalar(value):
+        """numpy 标量转换为 Python 原生类型"""
+        return value.item() if isinstance(value, np.generic) else value
+
+    def _persistent_fault_details(self, frame: PowerFrame, index: int) -> Dict:
+        """持续故障电台的异常详情"""
+        return {
+            'station_id': self._json_scalar(frame.station_id[index]),
+            'station_name': frame.station_name[index],
+            'power': float(frame.power[index]),
+            'anomaly_type': 'persistent_fault',
+            'confidence': 100.0
+        }
     
+    def detect_anomalies_batch(self, power_matrix: np.ndarray,
+                               stations: Union[List[Dict], StationLayout],
+                               model: Optional[PropagationModel] = None) -> List[Dict]:
+        """
+        批量检测多个快照中的异常值
+
+        Args:
+            power_matrix: (N 快照 × M 电台) 功率矩阵
+            stations: 共享的电台布局（电台列表或 StationLayout，与矩阵列一一对应）
+            model: 模型残差检验使用的传播模型参数（默认 self.locator.model）
+
+        Returns:
+            每个快照一个异常检测结果，结构与 detect_anomalies 相同
+        """
+        powers = np.atleast_2d(np.asarray(power_matrix, dtype=float))
+        n_snapshots, n_stations = powers.shape
+
+        if n_stations < self.min_stations_for_detection:
+            return [{
+                'anomaly_indices': [],
+                'normal_indices': list(range(n_stations)),
+                'anomaly_details': [],
+                'detection_method': 'insufficient_data',
+                'summary': f'数据量不足，需要至少{self.min_stations_for_detection}个电台'
+            } for _ in range(n_snapshots)]
+
+        # 方法1: Z-score检测（逐行）
+        with pipeline_metrics.timer('anomaly_z_score'):
+            std = powers.std(axis=1, keepdims=True)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                z_scores = np.abs(powers - powers.mean(axis=1, keepdims=True)) / std
+            z_mask = np.nan_to_num(z_scores) > self.z_score_threshold
+
+        # 方法2: IQR检测（逐行）
+        with pipeline_metrics.timer('anomaly_iqr'):
+            q1, q3 = np.percentile(powers, [25, 75], axis=1, keepdims=True)
+            iqr = q3 - q1
+            iqr_mask = (powers < q1 - self.iqr_multiplier * iqr) | (powers > q3 + self.iqr_multiplier * iqr)
+
+        # 方法3: 基于距离的检测（两两距离只计算一次）
+        if isinstance(stations, StationLayout):
+            stations_pos = stations.positions
+            station_distances = stations.distance_matrix
+            station_ids, station_names = stations.station_ids.tolist(), stations.names
+        else:
+            stations_pos = np.array([[s['x'], s['y']] for s in stations], dtype=float)
+            station_distances = pairwise_distances(stations_pos)
+            station_ids = [s.get('station_id', s.get('id')) for s in stations]
+            station_names = [s.get('station_name', s.get('name')) for s in stations]
+        with pipeline_metrics.timer('anomaly_distance'):
+            distance_mask = self._distance_based_mask(powers, station_distances)
+
+        # 方法4: 相对拟合传播模型的残差；残差小的最强电台免除统计类方法的票（同 detect_anomalies）
+        with pipeline_metrics.timer('anomaly_model_residual'):
+            strongest, residual = self._model_residuals(powers, stations_pos, model)
+        rows = np.arange(n_snapshots)
+        model_mask = np.abs(residual) > self.model_residual_threshold
+        excused = np.zeros_like(distance_mask)
+        excused[rows, strongest] = ~model_mask[rows, strongest]
+        z_mask &= ~excused
+        iqr_mask &= ~excused
+        distance_mask &= ~excused
+
+        method_masks = {'z_score': z_mask, 'iqr': iqr_mask, 'distance_based': distance_mask,
+                        'model_residual': model_mask}
+        with pipeline_metrics.timer('anomaly_combine'):
+            anomaly_mask, scores = self._combine_anomaly_masks(
+                method_masks, self._required_score(self._voting_methods(n_stations, True)))
+        votes = sum(mask.astype(int) for mask in method_masks.values())
+
+        results = []
+        for n in range(n_snapshots):
+            final_anomalies = np.flatnonzero(anomaly_mask[n]).tolist()
+            final_anomalies.sort(key=lambda idx: scores[n, idx], reverse=True)
+            normal_indices = np.flatnonzero(~anomaly_mask[n]).tolist()
+            anomaly_details = [{
+                'station_id': station_ids[idx],
+                'station_name': station_names[idx],
+                'power': float(powers[n, idx]),
+                'anomaly_type': self._classify_anomaly_type(powers[n, idx], powers[n]),
+                'confidence': round(votes[n, idx] / len(method_masks) * 100, 1)
+            } for idx in final_anomalies]
+            results.append({
+                'anomaly_indices': final_anomalies,
+                'normal_indices': normal_indices,
+                'anomaly_details': anomaly_details,
+                'detection_method': 'combined',
+                'summary': f'检测到{len(final_anomalies)}个异常电台，{len(normal_indices)}个正常电台',
+                'statistics': self._calculate_statistics(powers[n], final_anomalies)
+            })
+
+        return results
+
     def _z_score_detection(self, powers: np.ndarray) -> List[int]:
         """Z-score异常检测"""
         z_scores = np.abs(stats.zscore(powers))
@@ -97,63 +281,131 @@ class AnomalyDetector:
         
         return anomaly_indices
     
-    def _distance_based_detection(self, power_data: List[Dict]) -> List[int]:
-        """基于距离的异常检测"""
-        anomaly_indices = []
-        
-        # 计算每个电台到其他电台的平均距离
-        for i, station_i in enumerate(power_data):
-            distances = []
-            for j, station_j in enumerate(power_data):
-                if i != j:
-                    # 计算功率差异与位置距离的比值
-                    power_diff = abs(station_i['power'] - station_j['power'])
-                    position_dist = math.sqrt(
-                        (station_i['x'] - station_j['x'])**2 + 
-                        (station_i['y'] - station_j['y'])**2
-                    )
-                    if position_dist > 0:
-                        ratio = power_diff / position_dist
-                        distances.append(ratio)
-            
-            if distances:
-                avg_ratio = np.mean(distances)
-                std_ratio = np.std(distances)
-                
-                # 如果某个电台的比值明显偏离平均值，可能是异常
-                if std_ratio > 0:
-                    z_score = abs(avg_ratio - np.mean([np.mean(distances) for distances in [distances]])) / std_ratio
-                    if z_score > 2.0:  # 可调整的阈值
-                        anomaly_indices.append(i)
-        
-        return anomaly_indices
-    
-    def _combine_anomaly_results(self, anomaly_results: Dict, total_stations: int) -> List[int]:
-        """综合多种方法的异常检测结果"""
+    def _distance_based_detection(self, power_data: Union[PowerFrame, List[Dict]],
+                                  station_distances: Optional[np.ndarray] = None) -> List[int]:
+        """基于距离的异常检测（station_distances 为可选的预计算两两距离矩阵）"""
+        frame = PowerFrame.coerce(power_data)
+        if station_distances is None:
+            if not frame.has_positions:
+                # 没有电台位置信息，无法进行基于距离的检测
+                return []
+            station_distances = pairwise_distances(frame.positions)
+
+        return np.flatnonzero(self._distance_based_mask(frame.power[None, :], station_distances)[0]).tolist()
+
+    def _distance_based_mask(self, powers: np.ndarray, station_distances: np.ndarray) -> np.ndarray:
+        """
+        基于距离的异常检测（矩阵版本）
+
+        对每个快照计算功率差/位置距离的比值矩阵 R_ij = |p_i - p_j| / d_ij，
+        取每个电台与其他电台比值的中位数作为该电台的"功率梯度"，
+        再与所有电台梯度的中位数比较（MAD 鲁棒 z-score），梯度显著偏高的电台视为异常。
+
+        Args:
+            powers: (N × M) 功率矩阵
+            station_distances: (M × M) 电台两两距离矩阵
+
+        Returns:
+            (N × M) 布尔异常标记
+        """
+        n_snapshots, n_stations = powers.shape
+        mask = np.zeros((n_snapshots, n_stations), dtype=bool)
+        if n_stations < 3:
+            return mask
+
+        # 自身及重合电台的比值设为 +inf，取 M-1 个有效值的下中位数
+        valid = station_distances > 0
+        inv_dist = np.divide(1.0, station_distances, out=np.zeros_like(station_distances, dtype=float),
+                             where=valid)
+        median_rank = (n_stations - 2) // 2
+
+        # 按行分块，控制 (N × B × M) 中间矩阵的内存占用
+        block = max(1, self.distance_block_elements // (n_snapshots * n_stations))
+        station_gradient = np.empty((n_snapshots, n_stations))
+        for start in range(0, n_stations, block):
+            stop = min(start + block, n_stations)
+            ratio = np.abs(powers[:, start:stop, None] - powers[:, None, :]) * inv_dist[start:stop]
+            ratio[:, ~valid[start:stop]] = np.inf
+            station_gradient[:, start:stop] = np.partition(ratio, median_rank, axis=2)[:, :, median_rank]
+
+        # 跨电台比较：鲁棒 z-score
+        center = np.median(station_gradient, axis=1, keepdims=True)
+        mad = 1.4826 * np.median(np.abs(station_gradient - center), axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z_scores = (station_gradient - center) / mad
+        mask = np.nan_to_num(z_scores, nan=0.0, posinf=0.0) > self.distance_z_threshold
+        return mask
+
+    def _model_residuals(self, powers: np.ndarray, stations_pos: np.ndarray,
+                         model: Optional[PropagationModel] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        各电台相对拟合传播模型的残差
+
+        每行去掉最强电台，用其余电台拟合干扰源位置（线性化初值 + 一次 LM 精化），
+        再按对数距离模型预测所有电台的功率。对最强电台这是留一检验：干扰源就在它附近时残差小，
+        它自身读数偏高（故障或伪造）时其余电台给出的位置解释不了它的功率，残差大。
+
+        Args:
+            powers: (N × M) 功率矩阵
+            stations_pos: (M × 2) 电台位置
+
+        Returns:
+            (最强电台索引 (N,), 残差 = 实测 - 预测 (N × M) dB)
+        """
+        rows = np.arange(len(powers))
+        strongest = np.argmax(powers, axis=1)
+        weights = np.ones_like(powers)
+        weights[rows, strongest] = 0.0
+        seeds = self.locator._linearized_initial_guess(stations_pos, powers, weights, model)
+        fitted = self.locator._minimize_from_starts(seeds, stations_pos, powers, weights, model=model)
+        predicted = self.locator._predicted_powers(fitted['x'], stations_pos, model=model)
+        return strongest, powers - predicted
+
+    def _voting_methods(self, n_stations: int, has_positions: bool, has_history: bool = False) -> List[str]:
+        """当前数据下有可能投出异常票的检测方法"""
+        methods = ['iqr']
+        # 总体标准差下 |z| 最大为 sqrt(n-1)，电台过少时 z-score 不可能超过阈值
+        if np.sqrt(max(n_stations - 1, 0)) > self.z_score_threshold:
+            methods.append('z_score')
+        if has_positions and n_stations >= 3:
+            methods.append('distance_based')
+        if has_positions and n_stations >= 4:
+            methods.append('model_residual')
+        if has_history:
+            methods.append('history')
+        return methods
+
+    def _required_score(self, voting_methods: List[str]) -> float:
+        """
+        判定异常所需的加权分数
+
+        通常需要至少两种方法一致；只有一种方法能投票时（电台少且无坐标、无历史）退化为该方法单票。
+        """
+        if len(voting_methods) == 1:
+            return min(self.vote_threshold, self.METHOD_WEIGHTS.get(voting_methods[0], 0.33))
+        return self.vote_threshold
+
+    def _combine_anomaly_results(self, anomaly_results: Dict, total_stations: int,
+                                 threshold: Optional[float] = None) -> List[int]:
+        """综合多种方法的异常检测结果（threshold 默认为 vote_threshold）"""
         # 统计每个电台被标记为异常的次数
         anomaly_votes = {}
         for method, indices in anomaly_results.items():
             for idx in indices:
                 anomaly_votes[idx] = anomaly_votes.get(idx, 0) + 1
 
-        # 计算每个方法的权重（基于方法的可靠性）
-        method_weights = {
-            'z_score': 0.35,
-            'iqr': 0.35,
-            'distance_based': 0.3
-        }
-
         # 计算加权投票分数
+        method_sets = {method: set(indices) for method, indices in anomaly_results.items()}
         weighted_scores = {}
         for idx, votes in anomaly_votes.items():
             score = 0
-            for method, indices in anomaly_results.items():
+            for method, indices in method_sets.items():
                 if idx in indices:
-                    score += method_weights.get(method, 0.33)
+                    score += self.METHOD_WEIGHTS.get(method, 0.33)
             weighted_scores[idx] = score
 
-        # 设置阈值（至少30%的加权投票）
-        threshold = 0.3
+        if threshold is None:
+            threshold = self.vote_threshold
 
         # 根据加权分数确定异常
         final_anomalies = [idx for idx, score in weighted_scores.items() if score >= threshold]
@@ -177,6 +429,35 @@ class AnomalyDetector:
 
         return final_anomalies
     
+    def _combine_anomaly_masks(self, method_masks: Dict[str, np.ndarray],
+                               threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        _combine_anomaly_results 的矩阵版本
+
+        Args:
+            method_masks: 方法名 -> (N × M) 布尔异常标记
+            threshold: 判定异常所需的加权分数（默认为 vote_threshold）
+
+        Returns:
+            (最终异常标记, 加权分数)，均为 (N × M)
+        """
+        if threshold is None:
+            threshold = self.vote_threshold
+        scores = sum(self.METHOD_WEIGHTS.get(method, 0.33) * mask for method, mask in method_masks.items())
+        n_snapshots, total_stations = scores.shape
+
+        # 加权分数达到阈值，且异常数不超过总数的1/3、至少保留5个正常电台
+        candidate = scores >= threshold
+        max_anomalies = max(1, total_stations // 3)
+        min_normal_stations = min(5, total_stations - 1)
+        limit = max(0, min(max_anomalies, total_stations - min_normal_stations))
+
+        # 按分数排序（同分时保持电台顺序），保留分数最高的前 limit 个
+        order = np.argsort(np.where(candidate, -scores, np.inf), axis=1, kind='stable')
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.arange(total_stations)[None, :].repeat(n_snapshots, axis=0), axis=1)
+        return candidate & (rank < limit), scores
+
     def _classify_anomaly_type(self, power: float, all_powers: np.ndarray) -> str:
         """分类异常类型"""
         median_power = np.median(all_powers)
@@ -198,7 +479,9 @@ class AnomalyDetector:
     
     def _calculate_statistics(self, powers: np.ndarray, anomaly_indices: List[int]) -> Dict:
         """计算统计信息"""
-        normal_powers = np.array([powers[i] for i in range(len(powers)) if i not in anomaly_indices])
+        normal_mask = np.ones(len(powers), dtype=bool)
+        normal_mask[anomaly_indices] = False
+        normal_powers = powers[normal_mask]
         
         stats_dict = {
             'total_stations': len(powers),
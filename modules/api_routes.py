@@ -1,17 +1,174 @@
-from flask import Blueprint, jsonify, request
+import os
+import time
+import atexit
+from contextlib import nullcontext
+from flask import Blueprint, Response, g, jsonify, request, send_file, stream_with_context
+import numpy as np
 from datetime import datetime
 from .data_simulator import DataSimulator
 from .location_algorithm import LocationAlgorithm
 from .anomaly_detector import AnomalyDetector
 from .geo_converter import GeoConverter
+from .likelihood_grid import LikelihoodGrid
+from .emitter_tracker import EmitterTracker
+from .station_baseline import StationBaselines
+from .power_frame import PowerFrame
+from .path_loss_raster import PathLossRasters
+from .scenario_stream import ScenarioStream, WaypointTrajectory
+from .result_stream import ResultBroadcaster
+from .ingest_queue import IngestQueue
+from .propagation_model import PropagationModel
+from .station_layout import StationLayout
+from .station_store import StationStore, StationStateSync
+from .measurement_history import MeasurementHistory, parse_timestamp
+from .history_downsample import downsample_series, lttb_indices
+from .pipeline_metrics import pipeline_metrics
+from .request_profiler import RequestProfiler
 
 api_bp = Blueprint('api', __name__)
 
-# 初始化组件
-geo_converter = GeoConverter()
-data_simulator = DataSimulator()
+# 流水线指标（METRICS_ENABLED=0 关闭记录）
+pipeline_metrics.enabled = os.environ.get('METRICS_ENABLED', '1') != '0'
+
+# 初始化组件（GEO_PROJECTION=enu 时使用 WGS-84 椭球局部切平面投影）
+geo_projection = os.environ.get('GEO_PROJECTION', 'equirectangular')
+geo_converter = GeoConverter(projection=geo_projection)
+data_simulator = DataSimulator(projection=geo_projection)
 location_algorithm = LocationAlgorithm(geo_converter)
 anomaly_detector = AnomalyDetector()
+likelihood_grid = LikelihoodGrid(location_algorithm, geo_converter)
+emitter_tracker = EmitterTracker(location_algorithm)
+station_baselines = StationBaselines()
+
+# 可选：站点路径损耗栅格目录（内存映射，启动时只读取 grid.json）
+if os.environ.get('PATH_LOSS_RASTER_DIR'):
+    path_loss_rasters = PathLossRasters(os.environ['PATH_LOSS_RASTER_DIR'])
+    data_simulator.path_loss_rasters = path_loss_rasters
+    location_algorithm.path_loss_rasters = path_loss_rasters
+
+# 可选：多进程共享的电台存储（生产模式下各工作进程通过同一 SQLite 文件看到相同布局）
+station_sync = None
+if os.environ.get('STATION_DB'):
+    station_sync = StationStateSync(StationStore(os.environ['STATION_DB']), data_simulator)
+    station_sync.initialize()
+
+# 可选：测量历史（定位快照与结果批量写入 SQLite；默认与电台存储共用同一文件）
+measurement_history = None
+if os.environ.get('HISTORY_DB') or os.environ.get('STATION_DB'):
+    measurement_history = MeasurementHistory(
+        os.environ.get('HISTORY_DB') or os.environ['STATION_DB'],
+        batch_size=int(os.environ.get('HISTORY_BATCH_SIZE', 256)),
+        flush_interval_s=float(os.environ.get('HISTORY_FLUSH_S', 1.0))
+    )
+    atexit.register(measurement_history.stop)
+
+# 可选：按需请求剖析（带 X-Profile 头或 ?profile=1 的请求保存 cProfile 结果；未配置时无开销）
+request_profiler = None
+if os.environ.get('PROFILE_DIR'):
+    request_profiler = RequestProfiler(os.environ['PROFILE_DIR'],
+                                       max_profiles=int(os.environ.get('PROFILE_KEEP', 50)),
+                                       token=os.environ.get('PROFILE_TOKEN'))
+
+def _station_mutation():
+    """电台状态修改的上下文：配置了共享存储时持有跨进程写锁并在结束时写回"""
+    return station_sync.mutation() if station_sync is not None else nullcontext()
+
+@api_bp.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+
+@api_bp.after_request
+def _record_request_metrics(response):
+    """按端点记录请求数与总耗时（SSE 只记录建立连接的耗时）"""
+    endpoint = request.endpoint or 'unknown'
+    pipeline_metrics.inc('requests_total', help_text='API requests', endpoint=endpoint,
+                         status=str(response.status_code))
+    if 'request_start' in g:
+        pipeline_metrics.observe('request_duration_seconds', time.perf_counter() - g.request_start,
+                                 help_text='API request latency', endpoint=endpoint)
+    return response
+
+@api_bp.before_request
+def _start_profile():
+    if request_profiler is not None and request.endpoint not in ('api.list_profiles', 'api.download_profile') \
+            and request_profiler.wanted(request.headers, request.args):
+        g.profile = request_profiler.start()
+        g.profile_start = time.perf_counter()
+
+@api_bp.after_request
+def _save_profile(response):
+    """停止剖析并保存；响应头 X-Profile-Id 给出剖析文件名（剖析器忙时为 busy）"""
+    if 'profile_start' not in g:
+        return response
+    if g.profile is None:
+        response.headers['X-Profile-Id'] = 'busy'
+        return response
+    name = request_profiler.finish(g.profile, request.endpoint, time.perf_counter() - g.profile_start,
+                                   payload=request.get_data(cache=True), status=response.status_code)
+    response.headers['X-Profile-Id'] = name
+    return response
+
+@api_bp.before_request
+def _pull_station_state():
+    """其它工作进程修改过电台布局时，先同步到本进程"""
+    if station_sync is not None:
+        station_sync.pull()
+
+def _current_layout():
+    """后台线程（接入队列、推送流）取布局前先同步其它工作进程的电台修改"""
+    if station_sync is not None:
+        station_sync.pull()
+    return data_simulator.layout
+
+def _stream_source():
+    """推送流的结果源：模拟干扰源沿方形航线巡航，按 STREAM_RATE_HZ 实时扫描并定位"""
+    trajectory = WaypointTrajectory([(-60, -60), (60, -60), (60, 60), (-60, 60)], speed=2.0)
+    stream = ScenarioStream(data_simulator, trajectory, rate_hz=float(os.environ.get('STREAM_RATE_HZ', 1.0)),
+                            burst_probability=0.02, chunk_size=16, layout_provider=_current_layout)
+    return stream.locate(anomaly_detector, location_algorithm, realtime=True)
+
+# 所有 /stream 订阅者共享同一计算结果
+result_broadcaster = ResultBroadcaster(_stream_source)
+
+# 测量上报接入队列：结果同时推送给 /stream 订阅者（事件类型 ingest）
+ingest_queue = IngestQueue(
+    anomaly_detector, location_algorithm, _current_layout,
+    publish=lambda result: result_broadcaster.publish(result, event='ingest'),
+    capacity=int(os.environ.get('INGEST_QUEUE_SIZE', 1024)),
+    workers=int(os.environ.get('INGEST_WORKERS', 2))
+)
+
+def _request_model(params) -> PropagationModel:
+    """按请求参数构建本次调用的传播模型（不修改共享组件的默认模型）"""
+    model = location_algorithm.model
+    if params.get('path_loss_exponent') is not None:
+        model = model._replace(path_loss_exponent=float(params['path_loss_exponent']))
+    return model
+
+def _stations_with_xy(stations):
+    """请求电台列表中只带 lat/lon 的电台补上本地 x/y（异常检测按 x/y 计算距离）
+
+    Raises:
+        ValueError: 电台格式无效或坐标缺失 / 非有限值
+    """
+    if isinstance(stations, StationLayout):
+        return stations
+    if not isinstance(stations, list) or not all(isinstance(s, dict) for s in stations):
+        raise ValueError('stations 必须为电台对象列表')
+    try:
+        missing = [i for i, s in enumerate(stations) if s.get('x') is None or s.get('y') is None]
+        if missing:
+            x, y = location_algorithm.geo_converter.latlon_to_xy_array(
+                [stations[i]['lat'] for i in missing], [stations[i]['lon'] for i in missing])
+            stations = list(stations)
+            for i, xi, yi in zip(missing, x, y):
+                stations[i] = dict(stations[i], x=float(xi), y=float(yi))
+        positions = np.array([[s['x'], s['y']] for s in stations], dtype=float).reshape(-1, 2)
+    except (KeyError, TypeError) as exc:
+        raise ValueError(f'电台坐标缺失或无效: {exc}') from exc
+    if not np.isfinite(positions).all():
+        raise ValueError('电台坐标必须为有限数值')
+    return stations
 
 @api_bp.route('/stations')
 def get_stations():
@@ -24,7 +181,7 @@ def simulate_data():
     """模拟数据生成"""
     coord_mode = request.args.get('coord_mode', 'geographic')
     add_anomaly = request.args.get('add_anomaly', 'false').lower() == 'true'
-    path_loss_exponent = float(request.args.get('path_loss_exponent', 2.0))
+    model = _request_model(request.args)
 
     if coord_mode == 'geographic':
         target_lat = float(request.args.get('target_lat', 39.9042))
@@ -49,21 +206,19 @@ def simulate_data():
             'y': interference_y
         }
 
-    data_simulator.path_loss_exponent = path_loss_exponent
-    location_algorithm.path_loss_exponent = path_loss_exponent
-
-    power_data = data_simulator.generate_power_data(
+    power_frame = data_simulator.generate_power_frame(
         interference_pos=interference_pos,
         add_anomaly=add_anomaly,
-        use_geo_coordinates=(coord_mode == 'geographic')
+        use_geo_coordinates=(coord_mode == 'geographic'),
+        model=model
     )
 
     return jsonify({
         'timestamp': datetime.now().isoformat(),
         'interference_position': interference_position,
-        'power_data': power_data,
+        'power_data': power_frame.to_records(),
         'has_anomaly': add_anomaly,
-        'path_loss_exponent': path_loss_exponent,
+        'path_loss_exponent': model.path_loss_exponent,
         'coord_mode': coord_mode
     })
 
@@ -77,24 +232,249 @@ def locate_interference():
     if not power_data:
         return jsonify({'error': '没有功率数据'}), 400
 
-    anomaly_result = anomaly_detector.detect_anomalies(power_data)
-    location_result = location_algorithm.calculate_location(
-        power_data,
-        anomaly_result['normal_indices'],
-        use_geo_coordinates=(coord_mode == 'geographic')
+    online = bool(data.get('online', False))
+    use_geo = coord_mode == 'geographic'
+    model = _request_model(data)
+
+    # JSON 记录只在边界处转换一次，之后各阶段共享列式数据
+    with pipeline_metrics.timer('decode'):
+        power_frame = PowerFrame.from_records(power_data)
+    layout = data_simulator.layout
+    with pipeline_metrics.timer('anomaly_detection'):
+        anomaly_result = anomaly_detector.detect_anomalies(power_frame, layout,
+                                                           station_baselines if online else None, model)
+    with pipeline_metrics.timer('location'):
+        location_result = location_algorithm.calculate_location(
+            power_frame,
+            anomaly_result['normal_indices'],
+            use_geo_coordinates=use_geo,
+            layout=layout,
+            model=model
+        )
+
+    # 在线模式：用定位残差更新各电台的残差 EWMA
+    if online and 'error' not in location_result and power_frame.has_station_ids:
+        residuals = location_algorithm.station_residuals(power_frame, location_result, use_geo, layout, model)
+        station_baselines.update_residuals(power_frame.station_id, residuals)
+
+    if measurement_history is not None:
+        measurement_history.record(power_frame, location_result, anomaly_result['anomaly_indices'],
+                                   timestamp=data.get('timestamp'), coord_mode=coord_mode)
+
+    with pipeline_metrics.timer('json_encode'):
+        return jsonify({
+            'location': location_result,
+            'anomaly_detection': anomaly_result,
+            'timestamp': datetime.now().isoformat(),
+            'coord_mode': coord_mode
+        })
+
+@api_bp.route('/stream')
+def stream_results():
+    """定位结果推送（Server-Sent Events）：服务端持续定位，一次计算推送给所有订阅者"""
+    subscriber = result_broadcaster.subscribe()
+    return Response(stream_with_context(result_broadcaster.events(subscriber)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@api_bp.route('/ingest', methods=['POST'])
+def ingest_reports():
+    """接入电台功率上报（单条或 reports 列表），入队后立即返回，后台微批次定位"""
+    data = request.get_json()
+    if not isinstance(data, dict):
+        return jsonify({'error': '请求体必须为 JSON 对象'}), 400
+    reports = data.get('reports', [data])
+    if not isinstance(reports, list) or not all(isinstance(report, dict) for report in reports):
+        return jsonify({'error': 'reports 必须为上报对象列表'}), 400
+    if not reports or not all(report.get('power_data') for report in reports):
+        return jsonify({'error': '没有功率数据'}), 400
+
+    accepted = []
+    for report in reports:
+        report_id = ingest_queue.submit(
+            PowerFrame.from_records(report['power_data']),
+            use_geo_coordinates=report.get('coord_mode', 'geographic') == 'geographic',
+            report_id=report.get('report_id'),
+            timestamp=report.get('timestamp'),
+            model=_request_model(report)
+        )
+        if report_id is None:
+            # 队列已满：返回已接收的部分，客户端稍后重试其余上报
+            response = jsonify({
+                'status': 'queue_full',
+                'accepted': accepted,
+                'queue': ingest_queue.status()
+            })
+            response.headers['Retry-After'] = '1'
+            return response, 429
+        accepted.append(report_id)
+
+    return jsonify({'status': 'queued', 'accepted': accepted, 'queue': ingest_queue.status()}), 202
+
+@api_bp.route('/ingest/status')
+def ingest_status():
+    """接入队列深度与处理延迟"""
+    return jsonify(ingest_queue.status())
+
+@api_bp.route('/ingest/results')
+def ingest_results():
+    """最近的接入定位结果"""
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return jsonify({'error': '无效的查询参数'}), 400
+    return jsonify({'results': ingest_queue.recent_results(limit), 'queue': ingest_queue.status()})
+
+@api_bp.route('/locate_batch', methods=['POST'])
+def locate_batch():
+    """批量定位干扰源（N 个快照共享同一电台布局）"""
+    data = request.get_json()
+    power_matrix = data.get('power_matrix', [])
+    stations = data.get('stations') or data_simulator.layout
+    coord_mode = data.get('coord_mode', 'geographic')
+
+    if not power_matrix:
+        return jsonify({'error': '没有功率数据'}), 400
+    try:
+        power_matrix = np.asarray(power_matrix, dtype=float)
+        stations = _stations_with_xy(stations)
+    except (TypeError, ValueError) as exc:
+        return jsonify({'error': f'功率矩阵或电台格式无效: {exc}'}), 400
+    if power_matrix.ndim != 2 or power_matrix.shape[1] != len(stations):
+        return jsonify({'error': '功率矩阵必须为 N×M，且列数与电台数量一致'}), 400
+    # null / NaN / inf 会被当作 NaN 传入检测与定位，结果无法序列化为合法 JSON
+    if not np.isfinite(power_matrix).all():
+        return jsonify({'error': '功率矩阵只能包含有限数值'}), 400
+
+    model = _request_model(data)
+    anomaly_results = anomaly_detector.detect_anomalies_batch(power_matrix, stations, model)
+    location_results = location_algorithm.calculate_locations(
+        power_matrix,
+        stations,
+        [result['normal_indices'] for result in anomaly_results],
+        use_geo_coordinates=(coord_mode == 'geographic'),
+        model=model
     )
 
     return jsonify({
-        'location': location_result,
+        'results': [
+            {'location': location, 'anomaly_detection': anomaly}
+            for location, anomaly in zip(location_results, anomaly_results)
+        ],
+        'count': len(location_results),
+        'timestamp': datetime.now().isoformat(),
+        'coord_mode': coord_mode
+    })
+
+@api_bp.route('/likelihood_grid', methods=['POST'])
+def get_likelihood_grid():
+    """干扰源概率热力图"""
+    data = request.get_json()
+    power_data = data.get('power_data', [])
+    coord_mode = data.get('coord_mode', 'geographic')
+
+    if not power_data:
+        return jsonify({'error': '没有功率数据'}), 400
+
+    power_frame = PowerFrame.from_records(power_data)
+    layout = data_simulator.layout
+    anomaly_result = anomaly_detector.detect_anomalies(power_frame, layout)
+    stations_pos = location_algorithm.get_station_positions(power_frame, coord_mode == 'geographic', layout)
+    mask = np.zeros(len(power_frame))
+    mask[anomaly_result['normal_indices']] = 1.0
+
+    grid_result = likelihood_grid.evaluate(stations_pos, power_frame.power, mask, _request_model(data))
+
+    return jsonify({
+        'grid': likelihood_grid.to_compact(grid_result),
+        'excluded_stations': anomaly_result['anomaly_indices'],
+        'timestamp': datetime.now().isoformat(),
+        'coord_mode': coord_mode
+    })
+
+@api_bp.route('/track', methods=['POST'])
+def track_interference():
+    """跟踪模式定位：用新快照更新航迹"""
+    data = request.get_json()
+    power_data = data.get('power_data', [])
+    coord_mode = data.get('coord_mode', 'geographic')
+    track_id = data.get('track_id')
+
+    if not power_data:
+        return jsonify({'error': '没有功率数据'}), 400
+    # 时间戳接受 Unix 秒或 ISO 8601 字符串（/api/simulate_data 的返回值可直接回传）
+    try:
+        timestamp = parse_timestamp(data.get('timestamp'))
+        track_id = int(track_id) if track_id is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': '无效的时间戳或航迹ID'}), 400
+
+    power_frame = PowerFrame.from_records(power_data)
+    layout = data_simulator.layout
+    anomaly_result = anomaly_detector.detect_anomalies(power_frame, layout)
+    track_result = emitter_tracker.update(
+        power_frame,
+        anomaly_result['normal_indices'],
+        use_geo_coordinates=(coord_mode == 'geographic'),
+        track_id=track_id,
+        timestamp=timestamp,
+        layout=layout,
+        model=_request_model(data)
+    )
+    if 'error' in track_result:
+        return jsonify({'status': 'error', 'message': track_result['error']}), 404
+
+    track_result.update({
         'anomaly_detection': anomaly_result,
         'timestamp': datetime.now().isoformat(),
         'coord_mode': coord_mode
     })
+    return jsonify(track_result)
+
+@api_bp.route('/tracks')
+def get_tracks():
+    """获取所有航迹"""
+    return jsonify(emitter_tracker.list_tracks())
+
+@api_bp.route('/tracks/<int:track_id>')
+def get_track(track_id):
+    """获取航迹及其历史"""
+    track = emitter_tracker.get_track(track_id)
+    if track is None:
+        return jsonify({'status': 'error', 'message': 'Track not found'}), 404
+    return jsonify(track)
+
+@api_bp.route('/tracks/<int:track_id>', methods=['DELETE'])
+def delete_track(track_id):
+    """删除航迹"""
+    if emitter_tracker.delete_track(track_id):
+        return jsonify({
+            'status': 'success',
+            'message': 'Track deleted successfully',
+            'timestamp': datetime.now().isoformat()
+        })
+    return jsonify({'status': 'error', 'message': 'Track not found'}), 404
+
+@api_bp.route('/station_baselines')
+def get_station_baselines():
+    """获取电台在线基线统计"""
+    return jsonify(station_baselines.get_summary())
+
+@api_bp.route('/station_baselines', methods=['DELETE'])
+def reset_station_baselines():
+    """清空电台在线基线"""
+    station_baselines.reset()
+    return jsonify({
+        'status': 'success',
+        'message': '电台基线已清空',
+        'timestamp': datetime.now().isoformat()
+    })
 
 @api_bp.route('/reset_stations')
 def reset_stations():
     """重置电台位置"""
-    data_simulator.reset_stations_positions()
+    with _station_mutation():
+        data_simulator.reset_stations_positions()
     return jsonify({
         'status': 'success',
         'message': '电台位置已重置',
@@ -125,7 +505,8 @@ def add_station():
     name = data.get('name', 'NEW_SENSOR')
     lat = float(data.get('lat'))
     lon = float(data.get('lon'))
-    new_station = data_simulator.add_station(name, lat, lon)
+    with _station_mutation():
+        new_station = data_simulator.add_station(name, lat, lon)
     return jsonify({
         'status': 'success',
         'station': new_station,
@@ -141,7 +522,8 @@ def update_station(station_id):
     lon = data.get('lon')
     if lat is not None: lat = float(lat)
     if lon is not None: lon = float(lon)
-    success = data_simulator.update_station(station_id, name, lat, lon)
+    with _station_mutation():
+        success = data_simulator.update_station(station_id, name, lat, lon)
     if success:
         return jsonify({
             'status': 'success',
@@ -153,7 +535,8 @@ def update_station(station_id):
 @api_bp.route('/stations/<int:station_id>', methods=['DELETE'])
 def delete_station(station_id):
     """删除电台"""
-    success = data_simulator.delete_station(station_id)
+    with _station_mutation():
+        success = data_simulator.delete_station(station_id)
     if success:
         return jsonify({
             'status': 'success',
@@ -168,21 +551,133 @@ def set_center_coordinates():
     data = request.get_json()
     lat = float(data.get('lat'))
     lon = float(data.get('lon'))
-    data_simulator.set_center_coordinates(lat, lon)
+    with _station_mutation():
+        data_simulator.set_center_coordinates(lat, lon)
     return jsonify({
         'status': 'success',
         'center': {'lat': lat, 'lon': lon},
         'timestamp': datetime.now().isoformat()
     })
 
+def _history_range(params):
+    """历史查询的时间范围与点数（默认最近 1 小时、500 点）"""
+    end = float(params.get('end', datetime.now().timestamp()))
+    start = float(params.get('start', end - 3600))
+    points = min(max(int(params.get('points', 500)), 3), int(os.environ.get('HISTORY_MAX_POINTS', 5000)))
+    return start, end, points
+
+def _columns_to_json(columns):
+    """列式结果转 JSON（NaN 转为 null）"""
+    return {key: [None if isinstance(v, float) and v != v else v for v in np.asarray(values).tolist()]
+            for key, values in columns.items()}
+
+@api_bp.route('/history/power')
+def history_power():
+    """电台功率历史：按电台返回降采样后的序列（method=lttb 保留原始点，method=bucket 返回 min/max/mean）"""
+    if measurement_history is None:
+        return jsonify({'error': '未启用测量历史'}), 503
+    try:
+        start, end, points = _history_range(request.args)
+        station_ids = [int(s) for s in request.args['station_ids'].split(',')] \
+            if request.args.get('station_ids') else None
+    except ValueError:
+        return jsonify({'error': '无效的查询参数'}), 400
+    method = request.args.get('method', 'lttb')
+    if method not in ('lttb', 'bucket'):
+        return jsonify({'error': '未知的降采样方法'}), 400
+
+    columns = measurement_history.query_measurements(start, end, station_ids)
+    series = {}
+    order = np.argsort(columns['station_id'], kind='stable')
+    ids, first = np.unique(columns['station_id'][order], return_index=True)
+    for station_id, rows in zip(ids.tolist(), np.split(order, first[1:])):
+        sampled = downsample_series(columns['timestamp'][rows], columns['power'][rows], points, method, start, end)
+        series[str(station_id)] = dict(_columns_to_json(sampled), raw_count=int(rows.size))
+
+    return jsonify({'start': start, 'end': end, 'points': points, 'method': method, 'series': series})
+
+@api_bp.route('/history/track')
+def history_track():
+    """干扰源航迹历史：定位结果按时间桶取均值或 LTTB 抽取（面积按平面坐标计算）"""
+    if measurement_history is None:
+        return jsonify({'error': '未启用测量历史'}), 503
+    try:
+        start, end, points = _history_range(request.args)
+    except ValueError:
+        return jsonify({'error': '无效的查询参数'}), 400
+    method = request.args.get('method', 'lttb')
+    if method not in ('lttb', 'bucket'):
+        return jsonify({'error': '未知的降采样方法'}), 400
+
+    columns = measurement_history.query_locations(start, end)
+    located = ~np.isnan(columns['x'])
+    columns = {key: values[located] for key, values in columns.items()}
+    if method == 'lttb':
+        keep = lttb_indices(columns['x'], columns['y'], points)
+        track = {key: columns[key][keep] for key in ('timestamp', 'x', 'y', 'lat', 'lon', 'confidence')}
+    else:
+        track = {}
+        for key in ('x', 'y', 'lat', 'lon', 'confidence'):
+            bucketed = downsample_series(columns['timestamp'], columns[key], points, 'bucket', start, end)
+            track[key] = bucketed['mean']
+        track['timestamp'] = bucketed['timestamp']
+        track['count'] = bucketed['count']
+
+    return jsonify({'start': start, 'end': end, 'points': points, 'method': method,
+                    'raw_count': int(located.sum()), 'track': _columns_to_json(track)})
+
+@api_bp.route('/profiles')
+def list_profiles():
+    """已保存的请求剖析列表"""
+    if request_profiler is None:
+        return jsonify({'error': '未启用请求剖析'}), 503
+    if not request_profiler.authorized(request.headers, request.args):
+        return jsonify({'error': '需要剖析口令'}), 403
+    return jsonify({'profiles': request_profiler.list_profiles()})
+
+@api_bp.route('/profiles/<name>')
+def download_profile(name):
+    """下载剖析文件（pstats / snakeviz 可直接打开）；format=text 返回文本摘要，format=payload 返回原始请求体"""
+    if request_profiler is None:
+        return jsonify({'error': '未启用请求剖析'}), 503
+    if not request_profiler.authorized(request.headers, request.args):
+        return jsonify({'error': '需要剖析口令'}), 403
+    output = request.args.get('format', 'prof')
+    if output == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        try:
+            limit = int(request.args.get('limit', 30))
+        except ValueError:
+            return jsonify({'error': '无效的查询参数'}), 400
+        if sort not in ('cumulative', 'tottime', 'ncalls') or limit <= 0:
+            return jsonify({'error': '无效的查询参数'}), 400
+        text = request_profiler.summary(name, limit, sort)
+        if text is None:
+            return jsonify({'error': 'Profile not found'}), 404
+        return Response(text, mimetype='text/plain')
+
+    path = request_profiler.path_for(name, payload=(output == 'payload'))
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(os.path.abspath(path), as_attachment=True, download_name=os.path.basename(path),
+                     mimetype='application/octet-stream')
+
+@api_bp.route('/metrics')
+def export_metrics():
+    """流水线指标（Prometheus 文本格式；多进程部署时为当前工作进程的指标）"""
+    return Response(pipeline_metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @api_bp.route('/system_status')
 def system_status():
     """系统状态"""
     return jsonify({
         'status': 'running',
-        'stations_count': len(data_simulator.stations),
+        'stations_count': len(data_simulator.registry),
         'algorithm': 'least_squares',
-        'path_loss_exponent': data_simulator.path_loss_exponent,
+        'path_loss_exponent': location_algorithm.model.path_loss_exponent,
+        'path_loss_model': 'raster' if location_algorithm.path_loss_rasters is not None else 'log_distance',
+        'stream_subscribers': result_broadcaster.subscriber_count,
+        'history': measurement_history.status() if measurement_history is not None else None,
         'center_coordinates': {
             'lat': data_simulator.geo_converter.center_lat,
             'lon': data_simulator.geo_converter.center_lon
@@ -1,16 +1,63 @@
+import logging
 import numpy as np
 import random
 from typing import List, Dict, Tuple, Optional
 from .geo_converter import GeoConverter
+from .station_layout import StationLayout
+from .power_frame import PowerFrame
+from .station_registry import StationRegistry
+from .path_loss_raster import PathLossRasters
+from .propagation_model import PropagationModel
+
+logger = logging.getLogger(__name__)
 
 class DataSimulator:
     """数据模拟器 - 生成8个电台的位置和功率数据"""
     
-    def __init__(self, center_lat: float = 39.9042, center_lon: float = 116.4074):
-        """初始化8个电台的固定位置"""
+    def __init__(self, center_lat: float = 39.9042, center_lon: float = 116.4074, seed: Optional[int] = None,
+                 projection: str = 'equirectangular'):
+        """初始化8个电台的固定位置（seed 用于批量生成的随机数生成器，projection 见 GeoConverter）"""
         # 初始化地理坐标转换器
-        self.geo_converter = GeoConverter(center_lat, center_lon)
+        self.geo_converter = GeoConverter(center_lat, center_lon, projection=projection)
+
+        # 电台注册表：ID→槽位索引 + 连续坐标列
+        self.registry = StationRegistry()
+        self._load_default_stations()
+        logger.info("Initialized %d stations", len(self.registry))
+
+        # 信号传播参数
+        self.model = PropagationModel()  # 默认传播模型；各调用可传入自己的 model 覆盖
+        self.noise_std = 2.0          # 噪声标准差
+        self.distance_method = 'haversine'  # 地理坐标距离算法：'haversine' 或 'vincenty'
+        self.rng = np.random.default_rng(seed)  # 批量生成使用的可复现随机数生成器
+        self.path_loss_rasters: Optional[PathLossRasters] = None  # 站点路径损耗栅格（覆盖全部电台时替代对数距离模型）
+
+    @property
+    def path_loss_exponent(self) -> float:
+        return self.model.path_loss_exponent
+
+    @path_loss_exponent.setter
+    def path_loss_exponent(self, value: float) -> None:
+        self.model = self.model._replace(path_loss_exponent=value)
+
+    @property
+    def reference_power(self) -> float:
+        return self.model.reference_power
+
+    @reference_power.setter
+    def reference_power(self, value: float) -> None:
+        self.model = self.model._replace(reference_power=value)
 
+    @property
+    def reference_distance(self) -> float:
+        return self.model.reference_distance
+
+    @reference_distance.setter
+    def reference_distance(self, value: float) -> None:
+        self.model = self.model._replace(reference_distance=value)
+
+    def _load_default_stations(self) -> None:
+        """载入默认布局"""
         # 8个电台分布在200x200km的区域内，形成较好的几何分布
         # 使用更大的坐标范围，以北京为中心
         initial_stations = [
@@ -25,29 +72,33 @@ class DataSimulator:
         ]
 
         # 为每个电台计算经纬度坐标
-        self.stations = []
-        for station in initial_stations:
-            lat, lon = self.geo_converter.xy_to_latlon(station['x'], station['y'])
-            self.stations.append({
-                'id': station['id'],
-                'name': station['name'],
-                'x': station['x'],
-                'y': station['y'],
-                'lat': lat,
-                'lon': lon
-            })
-
-        print(f"Initialized {len(self.stations)} stations with coordinates:")
+        x = [s['x'] for s in initial_stations]
+        y = [s['y'] for s in initial_stations]
+        lat, lon = self.geo_converter.xy_to_latlon_array(x, y)
+        with self.registry.transaction():
+            self.registry.clear()
+            self.registry.add_many(
+                names=[s['name'] for s in initial_stations],
+                x=x,
+                y=y,
+                lat=lat,
+                lon=lon,
+                station_ids=[s['id'] for s in initial_stations]
+            )
+
+    @property
+    def stations(self) -> List[Dict]:
+        """当前电台信息列表（只读快照）"""
+        return self.layout.stations
 
-        # 信号传播参数
-        self.path_loss_exponent = 2.0  # 路径损耗指数
-        self.reference_power = 100.0   # 参考功率 (dBm)
-        self.reference_distance = 1.0  # 参考距离 (km)
-        self.noise_std = 2.0          # 噪声标准差
-        
     def get_stations_info(self) -> List[Dict]:
-        """获取所有电台信息"""
-        return self.stations.copy()
+        """获取所有电台信息（缓存的只读快照，电台未变化时不重复拷贝）"""
+        return self.layout.stations
+
+    @property
+    def layout(self) -> StationLayout:
+        """当前电台布局（带版本号的几何快照）"""
+        return self.registry.snapshot()
 
     def update_station_position(self, station_id: int, x: float, y: float) -> bool:
         """更新电台位置
@@ -60,47 +111,19 @@ class DataSimulator:
         Returns:
             更新是否成功
         """
-        for i, station in enumerate(self.stations):
-            if station['id'] == station_id:
-                self.stations[i]['x'] = x
-                self.stations[i]['y'] = y
-                return True
-        return False
+        return self.registry.update(station_id, x=x, y=y)
 
     def reset_stations_positions(self) -> None:
         """重置电台位置为默认布局"""
-        initial_stations = [
-            {'id': 1, 'name': 'SENSOR-1', 'x': -80, 'y': -80},
-            {'id': 2, 'name': 'SENSOR-2', 'x': 80, 'y': -80},
-            {'id': 3, 'name': 'SENSOR-3', 'x': 80, 'y': 80},
-            {'id': 4, 'name': 'SENSOR-4', 'x': -80, 'y': 80},
-            {'id': 5, 'name': 'SENSOR-5', 'x': 0, 'y': -80},
-            {'id': 6, 'name': 'SENSOR-6', 'x': 80, 'y': 0},
-            {'id': 7, 'name': 'SENSOR-7', 'x': 0, 'y': 80},
-            {'id': 8, 'name': 'SENSOR-8', 'x': -80, 'y': 0}
-        ]
-
-        # 重新计算经纬度坐标
-        self.stations = []
-        for station in initial_stations:
-            lat, lon = self.geo_converter.xy_to_latlon(station['x'], station['y'])
-            self.stations.append({
-                'id': station['id'],
-                'name': station['name'],
-                'x': station['x'],
-                'y': station['y'],
-                'lat': lat,
-                'lon': lon
-            })
-
-        print(f"Reset {len(self.stations)} stations to default positions")
+        self._load_default_stations()
+        logger.info("Reset %d stations to default positions", len(self.registry))
 
     def add_station(self, name: str, lat: float, lon: float) -> Dict:
         """添加新电台"""
-        new_id = max([s['id'] for s in self.stations]) + 1 if self.stations else 1
-        x, y = self.geo_converter.latlon_to_xy(lat, lon)
-
-        new_station = {
+        with self.registry.transaction():
+            x, y = self.geo_converter.latlon_to_xy(lat, lon)
+            new_id = self.registry.add(name, x, y, lat, lon)
+        return {
             'id': new_id,
             'name': name,
             'lat': lat,
@@ -109,43 +132,66 @@ class DataSimulator:
             'y': y
         }
 
-        self.stations.append(new_station)
-        return new_station
+    def add_stations(self, names: List[str], lats: List[float], lons: List[float]) -> List[int]:
+        """批量添加电台，返回新电台ID列表"""
+        with self.registry.transaction():
+            x, y = self.geo_converter.latlon_to_xy_array(lats, lons)
+            return self.registry.add_many(names, x, y, lats, lons)
 
     def update_station(self, station_id: int, name: str = None, lat: float = None, lon: float = None) -> bool:
         """更新电台信息"""
-        for i, station in enumerate(self.stations):
-            if station['id'] == station_id:
-                if name is not None:
-                    self.stations[i]['name'] = name
-                if lat is not None and lon is not None:
-                    self.stations[i]['lat'] = lat
-                    self.stations[i]['lon'] = lon
-                    x, y = self.geo_converter.latlon_to_xy(lat, lon)
-                    self.stations[i]['x'] = x
-                    self.stations[i]['y'] = y
-                return True
-        return False
+        if lat is not None and lon is not None:
+            with self.registry.transaction():
+                x, y = self.geo_converter.latlon_to_xy(lat, lon)
+                return self.registry.update(station_id, name=name, x=x, y=y, lat=lat, lon=lon)
+        return self.registry.update(station_id, name=name)
 
     def delete_station(self, station_id: int) -> bool:
         """删除电台"""
-        for i, station in enumerate(self.stations):
-            if station['id'] == station_id:
-                del self.stations[i]
-                return True
-        return False
+        return self.registry.delete(station_id)
+
+    def delete_stations(self, station_ids: List[int]) -> int:
+        """批量删除电台，返回删除数量"""
+        return self.registry.delete_many(station_ids)
 
     def set_center_coordinates(self, lat: float, lon: float) -> None:
         """设置新的中心坐标并重新计算所有电台的XY坐标"""
-        self.geo_converter.set_center(lat, lon)
-
-        # 重新计算所有电台的XY坐标
-        for i, station in enumerate(self.stations):
-            if 'lat' in station and 'lon' in station:
-                x, y = self.geo_converter.latlon_to_xy(station['lat'], station['lon'])
-                self.stations[i]['x'] = x
-                self.stations[i]['y'] = y
-    
+        # 写时复制：新建转换器后整体替换引用，并发读取方不会看到半更新的中心点参数
+        geo_converter = GeoConverter(lat, lon, projection=self.geo_converter.projection)
+
+        with self.registry.transaction():
+            # 重新计算所有电台的XY坐标（无经纬度的电台保持原坐标）
+            layout = self.layout
+            has_geo = ~np.isnan(layout.geo).any(axis=1)
+            xy = layout.positions.copy()
+            xy[has_geo] = geo_converter.latlon_to_xy_points(layout.geo[has_geo])
+            self.registry.set_positions(xy[:, 0], xy[:, 1])
+            self.geo_converter = geo_converter
+
+    def export_state(self) -> Dict:
+        """导出电台集合、中心坐标和ID计数（用于多进程共享存储）"""
+        with self.registry.transaction():
+            return {
+                'stations': self.layout.stations,
+                'center': (self.geo_converter.center_lat, self.geo_converter.center_lon),
+                'next_id': self.registry.next_id
+            }
+
+    def restore_state(self, stations: List[Dict], center: Tuple[float, float], next_id: int) -> None:
+        """以 export_state 的结果整体替换当前状态"""
+        with self.registry.transaction():
+            if (center[0], center[1]) != (self.geo_converter.center_lat, self.geo_converter.center_lon):
+                self.geo_converter = GeoConverter(center[0], center[1], projection=self.geo_converter.projection)
+            self.registry.restore(
+                station_ids=[s['id'] for s in stations],
+                names=[s['name'] for s in stations],
+                x=[s['x'] for s in stations],
+                y=[s['y'] for s in stations],
+                lat=[s['lat'] for s in stations],
+                lon=[s['lon'] for s in stations],
+                next_id=next_id
+            )
+
     def calculate_distance(self, pos1: Tuple[float, float], pos2: Tuple[float, float], use_geo: bool = False) -> float:
         """
         计算两点间距离
@@ -165,23 +211,49 @@ class DataSimulator:
             # 使用欧几里得距离计算平面坐标距离
             return np.sqrt((pos1[0] - pos2[0])**2 + (pos1[1] - pos2[1])**2)
     
+    def calculate_distance_matrix(self, positions: Optional[np.ndarray] = None, use_geo: bool = False,
+                                  dtype=np.float64) -> np.ndarray:
+        """
+        位置到各电台的距离矩阵
+
+        Args:
+            positions: (N × 2) 位置数组 (x,y) 或 (lat,lon)；省略时计算电台两两距离
+            use_geo: 是否使用地理坐标计算（按 distance_method 选择算法）
+            dtype: 返回精度
+
+        Returns:
+            (N × M) 距离矩阵（公里）
+        """
+        layout = self.layout
+        if use_geo:
+            return self.geo_converter.distance_matrix(layout.geo if positions is None else positions, layout.geo,
+                                                      method=self.distance_method, dtype=dtype)
+        if positions is None:
+            return layout.distance_matrix.astype(dtype)
+        positions = np.asarray(positions, dtype=dtype).reshape(-1, 2)
+        station_positions = layout.positions.astype(dtype)
+        return np.hypot(positions[:, None, 0] - station_positions[None, :, 0],
+                        positions[:, None, 1] - station_positions[None, :, 1])
+
     def calculate_received_power(self, interference_pos: Tuple[float, float],
-                               station_pos: Tuple[float, float], use_geo: bool = False) -> float:
+                               station_pos: Tuple[float, float], use_geo: bool = False,
+                               model: Optional[PropagationModel] = None) -> float:
         """
         计算电台接收到的功率
         使用路径损耗模型: P_r = P_t - 10*n*log10(d/d0)
         """
+        model = self.model if model is None else model
         distance = self.calculate_distance(interference_pos, station_pos, use_geo)
 
         # 避免距离为0的情况
-        if distance < self.reference_distance:
-            distance = self.reference_distance
+        if distance < model.reference_distance:
+            distance = model.reference_distance
 
         # 计算路径损耗
-        path_loss = 10 * self.path_loss_exponent * np.log10(distance / self.reference_distance)
+        path_loss = 10 * model.path_loss_exponent * np.log10(distance / model.reference_distance)
 
         # 接收功率 = 发射功率 - 路径损耗
-        received_power = self.reference_power - path_loss
+        received_power = model.reference_power - path_loss
 
         # 添加高斯噪声
         noise = np.random.normal(0, self.noise_std)
@@ -189,7 +261,8 @@ class DataSimulator:
         return received_power + noise
     
     def generate_power_data(self, interference_pos: Tuple[float, float],
-                          add_anomaly: bool = False, use_geo_coordinates: bool = False) -> List[Dict]:
+                          add_anomaly: bool = False, use_geo_coordinates: bool = False,
+                          model: Optional[PropagationModel] = None) -> List[Dict]:
         """
         生成所有电台的功率数据
 
@@ -201,42 +274,136 @@ class DataSimulator:
         Returns:
             包含所有电台功率数据的列表
         """
-        power_data = []
-        
+        return self.generate_power_frame(interference_pos, add_anomaly, use_geo_coordinates, model).to_records()
+
+    def generate_power_frame(self, interference_pos: Tuple[float, float],
+                             add_anomaly: bool = False, use_geo_coordinates: bool = False,
+                             model: Optional[PropagationModel] = None) -> PowerFrame:
+        """generate_power_data 的列式版本，结果可直接交给异常检测器和定位算法"""
+        layout = self.layout
+
         # 如果需要添加异常，随机选择1-2个电台
         anomaly_stations = []
         if add_anomaly:
             num_anomalies = random.randint(1, 2)
-            anomaly_stations = random.sample(range(len(self.stations)), num_anomalies)
-        
-        for i, station in enumerate(self.stations):
-            if use_geo_coordinates:
-                station_pos = (station['lat'], station['lon'])
-            else:
-                station_pos = (station['x'], station['y'])
-
-            if i in anomaly_stations:
-                # 生成异常数据
-                power = self._generate_anomaly_power(interference_pos, station_pos, use_geo_coordinates)
-                is_anomaly = True
-            else:
-                # 生成正常数据
-                power = self.calculate_received_power(interference_pos, station_pos, use_geo_coordinates)
-                is_anomaly = False
-            
-            power_data.append({
-                'station_id': station['id'],
-                'station_name': station['name'],
-                'x': station['x'],
-                'y': station['y'],
-                'power': round(power, 2),
-                'is_anomaly': is_anomaly
-            })
-        
-        return power_data
+            anomaly_stations = random.sample(range(len(layout)), num_anomalies)
+
+        # 正常数据：一次性计算所有电台的接收功率
+        station_positions = layout.geo if use_geo_coordinates else layout.positions
+        powers = self._received_powers(interference_pos, station_positions, use_geo_coordinates,
+                                       layout.station_ids, model)
+
+        for i in anomaly_stations:
+            # 生成异常数据
+            powers[i] = self._generate_anomaly_power(interference_pos, tuple(station_positions[i]),
+                                                     use_geo_coordinates, model)
+
+        anomaly = np.zeros(len(layout), dtype=bool)
+        anomaly[anomaly_stations] = True
+        return PowerFrame(
+            station_id=layout.station_ids,
+            power=np.round(powers, 2),
+            x=layout.positions[:, 0],
+            y=layout.positions[:, 1],
+            station_name=list(layout.names),
+            anomaly=anomaly
+        )
+
+    def generate_power_batch(self, emitter_positions, n_snapshots: int = 1, add_anomaly: bool = False,
+                             use_geo_coordinates: bool = False, seed: Optional[int] = None,
+                             model: Optional[PropagationModel] = None,
+                             layout: Optional[StationLayout] = None) -> Dict:
+        """
+        批量生成多个快照的功率矩阵（单次向量化计算）
+
+        Args:
+            emitter_positions: 干扰源位置 (x, y)/(lat, lon)，或 (K × 2) 位置数组
+            n_snapshots: 每个干扰源位置生成的快照数，共 N = K × n_snapshots 行（按位置分组）
+            add_anomaly: 是否注入异常（每个快照随机1-2个电台，类型与 generate_power_data 相同）
+            use_geo_coordinates: 干扰源位置是否为经纬度
+            seed: 随机种子（默认使用模拟器自身的随机数生成器）
+            model: 传播模型参数（默认 self.model）
+            layout: 电台布局快照（默认当前布局；调用方持有快照时传入，保证列与快照一致）
+
+        Returns:
+            包含 'powers' (N × M) 功率矩阵、'anomaly_mask' (N × M) 异常标签
+            和 'emitter_positions' (N × 2) 每行对应干扰源位置的字典
+        """
+        model = self.model if model is None else model
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        layout = self.layout if layout is None else layout
+        emitters = np.repeat(np.atleast_2d(np.asarray(emitter_positions, dtype=float)), n_snapshots, axis=0)
+        n_rows, n_stations = len(emitters), len(layout)
+
+        # 所有快照共享同一组干扰源-电台距离计算
+        if use_geo_coordinates:
+            distances = self.geo_converter.distance_matrix(emitters, layout.geo, method=self.distance_method)
+        else:
+            delta = emitters[:, None, :] - layout.positions[None, :, :]
+            distances = np.sqrt(np.einsum('nmi,nmi->nm', delta, delta))
+        distances = np.maximum(distances, model.reference_distance)
+        path_loss = 10 * model.path_loss_exponent * np.log10(distances / model.reference_distance)
+        path_loss = self._apply_site_path_loss(path_loss, emitters, use_geo_coordinates, layout.station_ids)
+        powers = model.reference_power - path_loss + rng.normal(0, self.noise_std, path_loss.shape)
+
+        anomaly_mask = np.zeros((n_rows, n_stations), dtype=bool)
+        if add_anomaly and n_stations > 0:
+            # 每行随机选取1-2个不重复的电台：随机键最小的前 k 个
+            max_count = min(2, n_stations)
+            counts = rng.integers(1, max_count + 1, size=n_rows)
+            chosen = np.argpartition(rng.random((n_rows, n_stations)), max_count - 1, axis=1)[:, :max_count]
+            rows = np.repeat(np.arange(n_rows)[:, None], max_count, axis=1)
+            keep = np.arange(max_count)[None, :] < counts[:, None]
+            anomaly_mask[rows[keep], chosen[keep]] = True
+
+            # 异常类型：0 功率过高，1 功率过低，2 随机噪声（只为异常单元抽样）
+            n_anomalies = int(keep.sum())
+            anomaly_type = rng.integers(0, 3, size=n_anomalies)
+            offset = np.select(
+                [anomaly_type == 0, anomaly_type == 1],
+                [rng.uniform(15, 30, n_anomalies), -rng.uniform(15, 25, n_anomalies)],
+                rng.uniform(-20, 20, n_anomalies))
+            powers[rows[keep], chosen[keep]] += offset
+
+        return {'powers': powers, 'anomaly_mask': anomaly_mask, 'emitter_positions': emitters}
+
+    def _apply_site_path_loss(self, path_loss: np.ndarray, emitters: np.ndarray, use_geo: bool,
+                              station_ids: np.ndarray) -> np.ndarray:
+        """配置了站点栅格时，用栅格插值替换栅格范围内的对数距离路径损耗 (N × M)"""
+        raster = self.path_loss_rasters.select(station_ids) if self.path_loss_rasters is not None else None
+        if raster is None:
+            return path_loss
+        if use_geo:
+            # 栅格位于本地坐标系
+            emitters = self.geo_converter.latlon_to_xy_points(emitters)
+        loss, _, inside = raster.loss_and_gradient(emitters)
+        return np.where(inside[:, None], loss, path_loss)
+
+    def _received_powers(self, interference_pos: Tuple[float, float], station_positions: np.ndarray,
+                         use_geo: bool = False, station_ids: Optional[np.ndarray] = None,
+                         model: Optional[PropagationModel] = None) -> np.ndarray:
+        """calculate_received_power 的向量版本：对 (M × 2) 电台位置一次计算接收功率"""
+        model = self.model if model is None else model
+        if use_geo:
+            distances = self.geo_converter.distance_matrix(
+                np.atleast_2d(interference_pos), station_positions, method=self.distance_method)[0]
+        else:
+            distances = np.hypot(station_positions[:, 0] - interference_pos[0],
+                                 station_positions[:, 1] - interference_pos[1])
+
+        # 避免距离为0的情况
+        distances = np.maximum(distances, model.reference_distance)
+        path_loss = 10 * model.path_loss_exponent * np.log10(distances / model.reference_distance)
+        if station_ids is not None:
+            path_loss = self._apply_site_path_loss(path_loss[None, :], np.atleast_2d(interference_pos),
+                                                   use_geo, station_ids)[0]
+
+        # 接收功率 = 发射功率 - 路径损耗 + 高斯噪声
+        return model.reference_power - path_loss + np.random.normal(0, self.noise_std, len(distances))
     
     def _generate_anomaly_power(self, interference_pos: Tuple[float, float],
-                              station_pos: Tuple[float, float], use_geo: bool = False) -> float:
+                              station_pos: Tuple[float, float], use_geo: bool = False,
+                              model: Optional[PropagationModel] = None) -> float:
         """
         生成异常功率数据
         异常类型：
@@ -244,7 +411,7 @@ class DataSimulator:
         2. 功率过低（信号阻塞）
         3. 随机噪声（环境干扰）
         """
-        normal_power = self.calculate_received_power(interference_pos, station_pos, use_geo)
+        normal_power = self.calculate_received_power(interference_pos, station_pos, use_geo, model)
         
         anomaly_type = random.choice(['high', 'low', 'noise'])
         
@@ -259,29 +426,29 @@ class DataSimulator:
             return normal_power + random.uniform(-20, 20)
     
     def generate_test_scenarios(self) -> List[Dict]:
-        """生成测试场景"""
+        """生成测试场景（位置与 ±80km 电台布局同一坐标系；持续移动场景见 ScenarioStream）"""
         scenarios = [
             {
                 'name': '中心位置干扰',
-                'interference_pos': (50, 50),
+                'interference_pos': (0, 0),
                 'add_anomaly': False,
                 'description': '干扰源位于区域中心'
             },
             {
                 'name': '边角位置干扰',
-                'interference_pos': (20, 20),
+                'interference_pos': (60, 60),
                 'add_anomaly': False,
                 'description': '干扰源位于区域边角'
             },
             {
                 'name': '中心位置干扰+异常',
-                'interference_pos': (50, 50),
+                'interference_pos': (0, 0),
                 'add_anomaly': True,
                 'description': '干扰源位于中心，包含异常电台数据'
             },
             {
                 'name': '随机位置干扰+异常',
-                'interference_pos': (random.uniform(20, 80), random.uniform(20, 80)),
+                'interference_pos': (random.uniform(-80, 80), random.uniform(-80, 80)),
                 'add_anomaly': True,
                 'description': '随机位置干扰源，包含异常数据'
             }
@@ -0,0 +1,185 @@
+import itertools
+import threading
+import time
+import numpy as np
+from collections import deque
+from typing import List, Dict, Optional, Union
+from .location_algorithm import LocationAlgorithm
+from .station_layout import StationLayout
+from .power_frame import PowerFrame
+from .propagation_model import PropagationModel
+
+
+class Track:
+    """单个干扰源航迹 - 常速度模型下的卡尔曼滤波状态 [x, y, vx, vy]"""
+
+    def __init__(self, track_id: int, position: np.ndarray, timestamp: float,
+                 position_std: float, velocity_std: float, max_history: int):
+        self.track_id = track_id
+        self.state = np.array([position[0], position[1], 0.0, 0.0])
+        self.covariance = np.diag([position_std ** 2, position_std ** 2,
+                                   velocity_std ** 2, velocity_std ** 2])
+        self.created_at = timestamp
+        self.last_update = timestamp
+        self.updates = 1
+        self.history = deque(maxlen=max_history)
+
+    def to_dict(self, include_history: bool = False) -> Dict:
+        """航迹摘要（可选包含历史点）"""
+        track = {
+            'track_id': self.track_id,
+            'position': {'x': float(self.state[0]), 'y': float(self.state[1])},
+            'velocity': {'vx': float(self.state[2]), 'vy': float(self.state[3])},
+            'position_std': float(np.sqrt(max(self.covariance[0, 0], self.covariance[1, 1]))),
+            'created_at': self.created_at,
+            'last_update': self.last_update,
+            'updates': self.updates
+        }
+        if include_history:
+            track['history'] = list(self.history)
+        return track
+
+
+class EmitterTracker:
+    """干扰源跟踪器 - 对移动干扰源做递推滤波，并以预测位置热启动定位求解"""
+
+    def __init__(self, location_algorithm: LocationAlgorithm):
+        """初始化跟踪参数"""
+        self.location_algorithm = location_algorithm
+        self.measurement_std = 5.0        # 单次定位结果的位置噪声 (km)
+        self.acceleration_std = 0.5       # 过程噪声：加速度标准差 (km/s²)
+        self.initial_velocity_std = 1.0   # 新航迹速度先验标准差 (km/s)
+        self.gate_distance = 30.0         # 自动关联门限 (km)
+        self.track_timeout = 300.0        # 航迹超时 (s)，超时未更新的航迹被清除
+        self.max_history = 500            # 每条航迹保留的历史点数
+
+        self._tracks: Dict[int, Track] = {}
+        self._next_id = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _predict(self, track: Track, timestamp: float) -> None:
+        """常速度模型预测到给定时刻"""
+        dt = max(0.0, timestamp - track.last_update)
+        if dt == 0.0:
+            return
+        transition = np.eye(4)
+        transition[0, 2] = transition[1, 3] = dt
+
+        # 白噪声加速度模型的过程噪声
+        q = self.acceleration_std ** 2
+        block = np.array([[dt ** 4 / 4, dt ** 3 / 2], [dt ** 3 / 2, dt ** 2]]) * q
+        process_noise = np.zeros((4, 4))
+        process_noise[np.ix_([0, 2], [0, 2])] = block
+        process_noise[np.ix_([1, 3], [1, 3])] = block
+
+        track.state = transition @ track.state
+        track.covariance = transition @ track.covariance @ transition.T + process_noise
+        track.last_update = timestamp
+
+    def _correct(self, track: Track, measurement: np.ndarray) -> None:
+        """用定位结果更新卡尔曼滤波状态"""
+        innovation = measurement - track.state[:2]
+        innovation_cov = track.covariance[:2, :2] + np.eye(2) * self.measurement_std ** 2
+        gain = track.covariance[:, :2] @ np.linalg.inv(innovation_cov)
+        track.state = track.state + gain @ innovation
+        track.covariance = track.covariance - gain @ track.covariance[:2, :]
+        track.updates += 1
+
+    def _expire(self, timestamp: float) -> None:
+        """清除超时航迹"""
+        expired = [tid for tid, t in self._tracks.items() if timestamp - t.last_update > self.track_timeout]
+        for tid in expired:
+            del self._tracks[tid]
+
+    def _associate(self, position: np.ndarray, timestamp: float) -> Optional[Track]:
+        """按预测位置最近邻关联到已有航迹（门限内）"""
+        best_track, best_dist = None, self.gate_distance
+        for track in self._tracks.values():
+            dt = max(0.0, timestamp - track.last_update)
+            predicted = track.state[:2] + track.state[2:] * dt
+            dist = float(np.hypot(*(predicted - position)))
+            if dist <= best_dist:
+                best_track, best_dist = track, dist
+        return best_track
+
+    def update(self, power_data: Union[PowerFrame, List[Dict]], normal_indices: Optional[List[int]] = None,
+               use_geo_coordinates: bool = False, track_id: Optional[int] = None,
+               timestamp: Optional[float] = None, layout: Optional[StationLayout] = None,
+               model: Optional[PropagationModel] = None) -> Dict:
+        """
+        用一个新快照更新航迹
+
+        Args:
+            power_data: 电台功率数据（PowerFrame 或记录列表）
+            normal_indices: 正常电台的索引列表
+            use_geo_coordinates: 是否使用地理坐标计算
+            track_id: 指定航迹ID；指定时以该航迹的预测位置热启动求解，
+                      未指定时冷启动求解并按最近邻关联或新建航迹
+            timestamp: 快照时间戳 (秒)，默认当前时间
+            layout: 电台布局缓存
+            model: 传播模型参数（默认使用定位算法的模型）
+
+        Returns:
+            包含定位结果与航迹状态的字典
+        """
+        timestamp = time.time() if timestamp is None else float(timestamp)
+
+        with self._lock:
+            self._expire(timestamp)
+            track = self._tracks.get(track_id) if track_id is not None else None
+            if track_id is not None and track is None:
+                return {'error': f'航迹 {track_id} 不存在'}
+            initial_guess = None
+            if track is not None:
+                self._predict(track, timestamp)
+                initial_guess = (float(track.state[0]), float(track.state[1]))
+
+        location = self.location_algorithm.calculate_location(
+            power_data, normal_indices, use_geo_coordinates, initial_guess=initial_guess, layout=layout,
+            model=model)
+        if 'error' in location:
+            return {'location': location}
+        measurement = np.array([location['position']['x'], location['position']['y']])
+
+        with self._lock:
+            if track is None:
+                track = self._associate(measurement, timestamp)
+                if track is not None:
+                    self._predict(track, timestamp)
+            if track is None:
+                track = Track(next(self._next_id), measurement, timestamp, self.measurement_std,
+                              self.initial_velocity_std, self.max_history)
+                self._tracks[track.track_id] = track
+            else:
+                self._correct(track, measurement)
+
+            lat, lon = self.location_algorithm.geo_converter.xy_to_latlon(float(track.state[0]),
+                                                                          float(track.state[1]))
+            track.history.append({
+                'timestamp': timestamp,
+                'x': float(track.state[0]),
+                'y': float(track.state[1]),
+                'lat': lat,
+                'lon': lon,
+                'measured_x': float(measurement[0]),
+                'measured_y': float(measurement[1])
+            })
+            track_info = track.to_dict()
+
+        return {'location': location, 'track': track_info, 'warm_start': initial_guess is not None}
+
+    def get_track(self, track_id: int, include_history: bool = True) -> Optional[Dict]:
+        """获取单条航迹"""
+        with self._lock:
+            track = self._tracks.get(track_id)
+            return track.to_dict(include_history) if track is not None else None
+
+    def list_tracks(self) -> List[Dict]:
+        """获取所有航迹摘要"""
+        with self._lock:
+            return [track.to_dict() for track in self._tracks.values()]
+
+    def delete_track(self, track_id: int) -> bool:
+        """删除航迹"""
+        with self._lock:
+            return self._tracks.pop(track_id, None) is not None
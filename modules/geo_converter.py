@@ -1,18 +1,36 @@
 import math
+import logging
 from typing import Tuple, Dict, List
 import numpy as np
 
+# 诊断输出走日志；默认级别下 debug 调用只做一次级别判断，不格式化字符串
+logger = logging.getLogger(__name__)
+
+# WGS-84 椭球参数
+WGS84_A = 6378137.0                      # 长半轴（米）
+WGS84_F = 1 / 298.257223563              # 扁率
+WGS84_B = WGS84_A * (1 - WGS84_F)        # 短半轴（米）
+WGS84_E2 = WGS84_F * (2 - WGS84_F)       # 第一偏心率平方
+WGS84_EP2 = WGS84_E2 / (1 - WGS84_E2)    # 第二偏心率平方
+
+PROJECTIONS = ('equirectangular', 'enu')
+
 class GeoConverter:
     """地理坐标转换器 - 处理经纬度与本地坐标系统的转换"""
     
-    def __init__(self, center_lat: float = 39.9042, center_lon: float = 116.4074):
+    def __init__(self, center_lat: float = 39.9042, center_lon: float = 116.4074,
+                 projection: str = 'equirectangular'):
         """
         初始化地理坐标转换器
 
         Args:
             center_lat: 中心纬度（默认北京）
             center_lon: 中心经度（默认北京）
+            projection: 投影方式，'equirectangular'（球面等距近似）或 'enu'（WGS-84 椭球局部东北天切平面）
         """
+        if projection not in PROJECTIONS:
+            raise ValueError(f'未知的投影方式: {projection}')
+        self.projection = projection
         self.center_lat = center_lat
         self.center_lon = center_lon
 
@@ -28,10 +46,11 @@ class GeoConverter:
 
         # 计算经度方向的米/度转换因子（考虑纬度影响）
         self.lon_to_meters = self.lat_to_meters * math.cos(self.center_lat_rad)
+        self._update_enu_terms()
 
         # 调试信息
-        print(f"GeoConverter initialized with center: ({center_lat}, {center_lon})")
-        print(f"Conversion factors: lat_to_meters={self.lat_to_meters}, lon_to_meters={self.lon_to_meters}")
+        logger.debug("GeoConverter initialized with center: (%s, %s)", center_lat, center_lon)
+        logger.debug("Conversion factors: lat_to_meters=%s, lon_to_meters=%s", self.lat_to_meters, self.lon_to_meters)
     
     def set_center(self, lat: float, lon: float) -> None:
         """设置新的中心点"""
@@ -40,6 +59,69 @@ class GeoConverter:
         self.center_lat_rad = math.radians(lat)
         self.center_lon_rad = math.radians(lon)
         self.lon_to_meters = self.lat_to_meters * math.cos(self.center_lat_rad)
+        self._update_enu_terms()
+
+    def set_projection(self, projection: str) -> None:
+        """切换投影方式（'equirectangular' 或 'enu'）"""
+        if projection not in PROJECTIONS:
+            raise ValueError(f'未知的投影方式: {projection}')
+        self.projection = projection
+
+    def _update_enu_terms(self) -> None:
+        """缓存当前中心点的 ECEF 坐标与 ECEF→ENU 旋转矩阵（每次 set_center 计算一次）"""
+        sin_lat, cos_lat = math.sin(self.center_lat_rad), math.cos(self.center_lat_rad)
+        sin_lon, cos_lon = math.sin(self.center_lon_rad), math.cos(self.center_lon_rad)
+        self._enu_origin = self._geodetic_to_ecef(np.array(self.center_lat), np.array(self.center_lon))
+        # 行依次为东、北、天方向的单位向量
+        self._enu_rotation = np.array([
+            [-sin_lon, cos_lon, 0.0],
+            [-sin_lat * cos_lon, -sin_lat * sin_lon, cos_lat],
+            [cos_lat * cos_lon, cos_lat * sin_lon, sin_lat]
+        ])
+
+    @staticmethod
+    def _geodetic_to_ecef(lat, lon) -> np.ndarray:
+        """WGS-84 大地坐标（高度为 0）→ ECEF (..., 3)，单位米"""
+        lat_rad, lon_rad = np.radians(lat), np.radians(lon)
+        sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+        prime_vertical = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat ** 2)
+        return np.stack([prime_vertical * cos_lat * np.cos(lon_rad),
+                         prime_vertical * cos_lat * np.sin(lon_rad),
+                         prime_vertical * (1 - WGS84_E2) * sin_lat], axis=-1)
+
+    def _enu_forward(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """经纬度 → 切平面东/北坐标（公里）"""
+        enu = (self._geodetic_to_ecef(lat, lon) - self._enu_origin) @ self._enu_rotation.T
+        return enu[..., 0] / 1000.0, enu[..., 1] / 1000.0
+
+    def _enu_inverse(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        切平面东/北坐标（公里）→ 经纬度
+
+        沿切平面法向（天方向）投回椭球面：求解 |P0 + u·up| 落在椭球上的二次方程，
+        再用 Bowring 公式由 ECEF 求大地纬度（地表附近误差远小于 1 mm）
+        """
+        east = np.asarray(x, dtype=float) * 1000.0
+        north = np.asarray(y, dtype=float) * 1000.0
+        rotation = self._enu_rotation
+        p0 = self._enu_origin + east[..., None] * rotation[0] + north[..., None] * rotation[1]
+        up = rotation[2]
+
+        scale = np.array([1 / WGS84_A ** 2, 1 / WGS84_A ** 2, 1 / WGS84_B ** 2])
+        qa = np.sum(up * up * scale)
+        qb = 2 * np.sum(p0 * up * scale, axis=-1)
+        qc = np.sum(p0 * p0 * scale, axis=-1) - 1
+        # 数值稳定的小根
+        u = -2 * qc / (qb + np.sqrt(np.maximum(qb * qb - 4 * qa * qc, 0.0)))
+        ecef = p0 + u[..., None] * up
+
+        px, py, pz = ecef[..., 0], ecef[..., 1], ecef[..., 2]
+        p = np.hypot(px, py)
+        theta = np.arctan2(pz * WGS84_A, p * WGS84_B)
+        lat = np.arctan2(pz + WGS84_EP2 * WGS84_B * np.sin(theta) ** 3,
+                         p - WGS84_E2 * WGS84_A * np.cos(theta) ** 3)
+        lon = np.arctan2(py, px)
+        return np.degrees(lat), np.degrees(lon)
     
     def latlon_to_xy(self, lat: float, lon: float) -> Tuple[float, float]:
         """
@@ -52,6 +134,10 @@ class GeoConverter:
         Returns:
             (x, y) 坐标，单位为公里
         """
+        if self.projection == 'enu':
+            x_km, y_km = self._enu_forward(lat, lon)
+            return float(x_km), float(y_km)
+
         # 计算相对于中心点的偏移（度）
         delta_lat = lat - self.center_lat
         delta_lon = lon - self.center_lon
@@ -64,7 +150,7 @@ class GeoConverter:
         x_km = x_meters / 1000.0
         y_km = y_meters / 1000.0
 
-        print(f"LatLon to XY: ({lat}, {lon}) -> ({x_km:.2f}, {y_km:.2f})")
+        logger.debug("LatLon to XY: (%s, %s) -> (%.2f, %.2f)", lat, lon, x_km, y_km)
 
         return x_km, y_km
     
@@ -79,6 +165,10 @@ class GeoConverter:
         Returns:
             (lat, lon) 经纬度
         """
+        if self.projection == 'enu':
+            lat, lon = self._enu_inverse(x, y)
+            return float(lat), float(lon)
+
         # 转换为米
         x_meters = x * 1000.0
         y_meters = y * 1000.0
@@ -91,9 +181,57 @@ class GeoConverter:
         lat = self.center_lat + delta_lat
         lon = self.center_lon + delta_lon
 
-        print(f"XY to LatLon: ({x:.2f}, {y:.2f}) -> ({lat:.6f}, {lon:.6f})")
+        logger.debug("XY to LatLon: (%.2f, %.2f) -> (%.6f, %.6f)", x, y, lat, lon)
 
         return lat, lon
+
+    def latlon_to_xy_array(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        latlon_to_xy 的数组版本：一次 NumPy 运算转换任意形状的经纬度数组
+
+        Args:
+            lat: 纬度数组
+            lon: 经度数组
+
+        Returns:
+            (x, y) 数组，单位为公里
+        """
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        if self.projection == 'enu':
+            return self._enu_forward(lat, lon)
+        x_km = (lon - self.center_lon) * self.lon_to_meters / 1000.0
+        y_km = (lat - self.center_lat) * self.lat_to_meters / 1000.0
+        return x_km, y_km
+
+    def xy_to_latlon_array(self, x, y) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        xy_to_latlon 的数组版本
+
+        Args:
+            x: X坐标数组（公里）
+            y: Y坐标数组（公里）
+
+        Returns:
+            (lat, lon) 数组
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if self.projection == 'enu':
+            return self._enu_inverse(x, y)
+        lat = self.center_lat + y * 1000.0 / self.lat_to_meters
+        lon = self.center_lon + x * 1000.0 / self.lon_to_meters
+        return lat, lon
+
+    def latlon_to_xy_points(self, points: np.ndarray) -> np.ndarray:
+        """(N × 2) [lat, lon] 数组 → (N × 2) [x, y] 数组"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return np.column_stack(self.latlon_to_xy_array(points[:, 0], points[:, 1]))
+
+    def xy_to_latlon_points(self, points: np.ndarray) -> np.ndarray:
+        """(N × 2) [x, y] 数组 → (N × 2) [lat, lon] 数组"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return np.column_stack(self.xy_to_latlon_array(points[:, 0], points[:, 1]))
     
     def haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
@@ -125,6 +263,113 @@ class GeoConverter:
         
         return distance
     
+    def haversine_distance_array(self, lat1, lon1, lat2, lon2, dtype=np.float64) -> np.ndarray:
+        """
+        haversine_distance 的数组版本（参数按 NumPy 规则广播，例如 (N, 1) 与 (1, M) 得到 N × M 距离矩阵）
+
+        Args:
+            dtype: 计算精度，大批量时可用 np.float32 减半内存（百公里尺度误差约 1 m）
+
+        Returns:
+            距离数组（公里）
+        """
+        lat1_rad, lon1_rad = np.radians(np.asarray(lat1, dtype=dtype)), np.radians(np.asarray(lon1, dtype=dtype))
+        lat2_rad, lon2_rad = np.radians(np.asarray(lat2, dtype=dtype)), np.radians(np.asarray(lon2, dtype=dtype))
+        a = (np.sin((lat2_rad - lat1_rad) / 2) ** 2
+             + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin((lon2_rad - lon1_rad) / 2) ** 2)
+        c = 2 * np.arcsin(np.sqrt(np.minimum(a, 1)))
+        return (c * (self.earth_radius / 1000.0)).astype(dtype, copy=False)
+
+    def vincenty_distance_array(self, lat1, lon1, lat2, lon2, dtype=np.float64,
+                                max_iter: int = 200, tol: float = 1e-12) -> np.ndarray:
+        """
+        WGS-84 椭球面上的 Vincenty 反解距离（参数按 NumPy 规则广播）
+
+        迭代对整个数组同时进行，已收敛的元素不再更新；近对跖点等未收敛的元素退回 Haversine 结果。
+        迭代始终以 float64 进行，dtype 只决定返回精度。
+
+        Returns:
+            距离数组（公里）
+        """
+        lat1, lon1, lat2, lon2 = np.broadcast_arrays(*(np.radians(np.asarray(v, dtype=float))
+                                                        for v in (lat1, lon1, lat2, lon2)))
+        f = WGS84_F
+        lon_diff = lon2 - lon1
+        u1 = np.arctan((1 - f) * np.tan(lat1))
+        u2 = np.arctan((1 - f) * np.tan(lat2))
+        sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+        sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+
+        lam = lon_diff.copy()
+        active = np.ones(lam.shape, dtype=bool)
+        for _ in range(max_iter):
+            sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+            sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.divide(cos_u1 * cos_u2 * sin_lam, sin_sigma,
+                                  out=np.zeros_like(sin_sigma), where=sin_sigma != 0)
+            cos2_alpha = 1 - sin_alpha ** 2
+            # 赤道线上 cos²α = 0，此时 cos2σm 取 0
+            cos_2sigma_m = np.divide(cos_sigma * cos2_alpha - 2 * sin_u1 * sin_u2, cos2_alpha,
+                                     out=np.zeros_like(cos_sigma), where=cos2_alpha != 0)
+            c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_next = lon_diff + (1 - c) * f * sin_alpha * (
+                sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+            converged = np.abs(lam_next - lam) < tol
+            lam = np.where(active, lam_next, lam)
+            active &= ~converged
+            if not active.any():
+                break
+
+        # 以收敛后的 λ 重新计算 σ 相关项
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        sin_alpha = np.divide(cos_u1 * cos_u2 * sin_lam, sin_sigma,
+                              out=np.zeros_like(sin_sigma), where=sin_sigma != 0)
+        cos2_alpha = 1 - sin_alpha ** 2
+        cos_2sigma_m = np.divide(cos_sigma * cos2_alpha - 2 * sin_u1 * sin_u2, cos2_alpha,
+                                 out=np.zeros_like(cos_sigma), where=cos2_alpha != 0)
+
+        u_sq = cos2_alpha * WGS84_EP2
+        big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+            cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+            - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+        distance = WGS84_B * big_a * (sigma - delta_sigma) / 1000.0
+
+        if active.any():
+            distance[active] = self.haversine_distance_array(
+                np.degrees(lat1[active]), np.degrees(lon1[active]),
+                np.degrees(lat2[active]), np.degrees(lon2[active]))
+        return distance.astype(dtype, copy=False)
+
+    def distance_matrix(self, points_a, points_b=None, method: str = 'haversine',
+                        dtype=np.float64) -> np.ndarray:
+        """
+        两组经纬度点之间的大圆距离矩阵
+
+        Args:
+            points_a: (N × 2) [lat, lon] 数组
+            points_b: (M × 2) [lat, lon] 数组；省略时计算 points_a 的两两距离
+            method: 'haversine'（球面）或 'vincenty'（WGS-84 椭球）
+            dtype: 返回精度（np.float64 或 np.float32）
+
+        Returns:
+            (N × M) 距离矩阵（公里）
+        """
+        points_a = np.asarray(points_a, dtype=float).reshape(-1, 2)
+        points_b = points_a if points_b is None else np.asarray(points_b, dtype=float).reshape(-1, 2)
+        args = (points_a[:, 0:1], points_a[:, 1:2], points_b[None, :, 0], points_b[None, :, 1])
+        if method == 'haversine':
+            return self.haversine_distance_array(*args, dtype=dtype)
+        if method == 'vincenty':
+            return self.vincenty_distance_array(*args, dtype=dtype)
+        raise ValueError(f'未知的距离算法: {method}')
+
     def euclidean_distance_km(self, x1: float, y1: float, x2: float, y2: float) -> float:
         """
         计算本地坐标系统中两点间的欧几里得距离（公里）
@@ -148,21 +393,23 @@ class GeoConverter:
         Returns:
             包含XY坐标的电台列表
         """
+        geo_rows = [i for i, station in enumerate(stations) if 'lat' in station and 'lon' in station]
+        xs, ys = self.latlon_to_xy_array([stations[i]['lat'] for i in geo_rows],
+                                         [stations[i]['lon'] for i in geo_rows])
+        converted = {i: (float(x), float(y)) for i, x, y in zip(geo_rows, xs, ys)}
+
         converted_stations = []
-        
-        for station in stations:
-            if 'lat' in station and 'lon' in station:
-                x, y = self.latlon_to_xy(station['lat'], station['lon'])
+        for i, station in enumerate(stations):
+            if i in converted:
                 converted_station = station.copy()
-                converted_station['x'] = x
-                converted_station['y'] = y
+                converted_station['x'], converted_station['y'] = converted[i]
                 converted_stations.append(converted_station)
             elif 'x' in station and 'y' in station:
                 # 已经是XY坐标，直接复制
                 converted_stations.append(station.copy())
-        
+
         return converted_stations
-    
+
     def convert_stations_to_latlon(self, stations: List[Dict]) -> List[Dict]:
         """
         将电台列表从XY坐标转换为经纬度
@@ -173,21 +420,23 @@ class GeoConverter:
         Returns:
             包含经纬度的电台列表
         """
+        xy_rows = [i for i, station in enumerate(stations) if 'x' in station and 'y' in station]
+        lats, lons = self.xy_to_latlon_array([stations[i]['x'] for i in xy_rows],
+                                             [stations[i]['y'] for i in xy_rows])
+        converted = {i: (float(lat), float(lon)) for i, lat, lon in zip(xy_rows, lats, lons)}
+
         converted_stations = []
-        
-        for station in stations:
-            if 'x' in station and 'y' in station:
-                lat, lon = self.xy_to_latlon(station['x'], station['y'])
+        for i, station in enumerate(stations):
+            if i in converted:
                 converted_station = station.copy()
-                converted_station['lat'] = lat
-                converted_station['lon'] = lon
+                converted_station['lat'], converted_station['lon'] = converted[i]
                 converted_stations.append(converted_station)
             elif 'lat' in station and 'lon' in station:
                 # 已经是经纬度，直接复制
                 converted_stations.append(station.copy())
-        
+
         return converted_stations
-    
+
     def get_bounds_for_area(self, size_km: float = 100) -> Dict:
         """
         获取指定大小区域的边界坐标
@@ -225,6 +474,11 @@ class GeoConverter:
         """
         distance = self.haversine_distance(self.center_lat, self.center_lon, lat, lon)
         return distance <= max_distance_km
+
+    def validate_coordinates_array(self, lats, lons, max_distance_km: float = 100) -> np.ndarray:
+        """validate_coordinates 的数组版本，用于批量校验上传的电台列表，返回布尔数组"""
+        distances = self.haversine_distance_array(self.center_lat, self.center_lon, lats, lons)
+        return distances <= max_distance_km
     
     def get_grid_coordinates(self, grid_size: int = 10) -> List[Dict]:
         """
@@ -236,17 +490,14 @@ class GeoConverter:
         Returns:
             网格点列表
         """
-        grid_points = []
-        
         # 生成从-50到50公里的网格点
-        for x in range(-50, 51, grid_size):
-            for y in range(-50, 51, grid_size):
-                lat, lon = self.xy_to_latlon(x, y)
-                grid_points.append({
-                    'x': x,
-                    'y': y,
-                    'lat': lat,
-                    'lon': lon
-                })
-        
-        return grid_points
+        axis = np.arange(-50, 51, grid_size)
+        gx, gy = np.meshgrid(axis, axis, indexing='ij')
+        lats, lons = self.xy_to_latlon_array(gx.ravel(), gy.ravel())
+
+        return [{
+            'x': int(x),
+            'y': int(y),
+            'lat': float(lat),
+            'lon': float(lon)
+        } for x, y, lat, lon in zip(gx.ravel(), gy.ravel(), lats, lons)]
@@ -0,0 +1,91 @@
+from typing import Dict, Optional
+import numpy as np
+
+
+def bucket_aggregate(t: np.ndarray, values: np.ndarray, start: float, end: float,
+                     buckets: int) -> Dict[str, np.ndarray]:
+    """
+    按等宽时间桶聚合（min / max / mean / count），只返回非空桶
+
+    Args:
+        t: 时间戳（已按升序排列）
+        values: 与 t 对齐的数值
+        start, end: 时间范围 [start, end)
+        buckets: 桶数
+
+    Returns:
+        列式结果 {'timestamp'（桶起点）, 'min', 'max', 'mean', 'count'}
+    """
+    t = np.asarray(t, dtype=float)
+    values = np.asarray(values, dtype=float)
+    width = (end - start) / max(int(buckets), 1)
+    empty = np.empty(0)
+    if t.size == 0 or width <= 0:
+        return {'timestamp': empty, 'min': empty, 'max': empty, 'mean': empty, 'count': np.empty(0, dtype=int)}
+
+    index = np.clip(((t - start) // width).astype(int), 0, buckets - 1)
+    # t 已排序，桶号单调不减：每个非空桶是一段连续区间，可直接 reduceat
+    starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+    counts = np.diff(np.r_[starts, t.size])
+    return {
+        'timestamp': start + index[starts] * width,
+        'min': np.minimum.reduceat(values, starts),
+        'max': np.maximum.reduceat(values, starts),
+        'mean': np.add.reduceat(values, starts) / counts,
+        'count': counts
+    }
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留点的索引
+
+    首尾点始终保留，其余点按顺序均分为 threshold-2 个桶，每个桶选出与
+    「上一个选中点」和「下一个桶均值点」构成三角形面积最大的点，保留峰值和形状。
+    x, y 为计算面积用的坐标：功率曲线传 (时间, 功率)，航迹传 (x, y)。
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1], dtype=int)[:max(threshold, 0)]
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for b in range(threshold - 2):
+        lo, hi = edges[b], edges[b + 1]
+        next_lo, next_hi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        areas = np.abs((x[previous] - avg_x) * (y[lo:hi] - y[previous])
+                       - (x[previous] - x[lo:hi]) * (avg_y - y[previous]))
+        previous = lo + int(np.argmax(areas))
+        selected[b + 1] = previous
+    return selected
+
+
+def downsample_series(t: np.ndarray, values: np.ndarray, points: int, method: str = 'lttb',
+                      start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+    """
+    把时间序列降到至多 points 个点
+
+    Args:
+        method: 'lttb'（保留形状的原始点）或 'bucket'（每桶 min/max/mean/count）
+        start, end: 桶聚合的时间范围（默认取数据首尾）
+    """
+    t = np.asarray(t, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if method == 'bucket':
+        if start is None:
+            start = t[0] if t.size else 0.0
+        if end is None:
+            end = np.nextafter(t[-1], np.inf) if t.size else start
+        return bucket_aggregate(t, values, start, end, points)
+    if method != 'lttb':
+        raise ValueError(f"Unknown downsampling method: {method}")
+    keep = lttb_indices(t, values, points)
+    return {'timestamp': t[keep], 'value': values[keep]}
@@ -0,0 +1,220 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from .power_frame import PowerFrame
+from .station_layout import StationLayout
+from .propagation_model import PropagationModel
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueue:
+    """测量上报接入队列 - 有界队列 + 后台工作线程池按微批次处理
+
+    上报只做入队即返回，接入延迟与求解延迟解耦；队列满时 submit 返回 None 由调用方反压。
+    工作线程每次取出至多 batch_size 条上报（最多等待 max_wait_s 凑批），
+    电台集合相同的上报合并为功率矩阵，走 detect_anomalies_batch / calculate_locations 批量路径；
+    布局中没有的电台逐条处理。批量核心是 NumPy/SciPy 数组运算，多线程即可并行利用多核，
+    且各线程共享同一布局缓存和栅格，无需跨进程序列化。
+    """
+
+    def __init__(self, anomaly_detector, location_algorithm, layout_provider: Callable[[], StationLayout],
+                 publish: Optional[Callable[[Dict], None]] = None, capacity: int = 1024,
+                 batch_size: int = 32, max_wait_s: float = 0.05, workers: int = 2, history: int = 256):
+        """
+        Args:
+            anomaly_detector: 异常检测器
+            location_algorithm: 定位算法
+            layout_provider: 返回当前电台布局的函数（每个批次调用一次）
+            publish: 结果回调（例如推送给 SSE 订阅者）
+            capacity: 队列容量（上报条数）
+            batch_size: 每个微批次的最大上报数
+            max_wait_s: 凑批的最长等待时间 (s)
+            workers: 工作线程数
+            history: 保留的最近结果数
+        """
+        self.anomaly_detector = anomaly_detector
+        self.location_algorithm = location_algorithm
+        self.layout_provider = layout_provider
+        self.publish = publish
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.max_wait_s = max_wait_s
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=capacity)
+        self._results = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._next_id = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self.batches = 0
+        self.last_lag_ms: Optional[float] = None
+
+    def start(self) -> None:
+        """启动工作线程（已启动时忽略）"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            self._threads = [threading.Thread(target=self._worker_loop, name=f'ingest-worker-{i}', daemon=True)
+                             for i in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """通知工作线程退出并等待"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        with self._lock:
+            self._threads = []
+
+    def submit(self, frame: PowerFrame, use_geo_coordinates: bool = False, report_id=None,
+               timestamp: Optional[float] = None, model: Optional[PropagationModel] = None) -> Optional[int]:
+        """
+        上报入队（不阻塞）；model 为该上报使用的传播模型（默认使用定位算法的模型）
+
+        Returns:
+            分配的上报编号；队列已满时返回 None
+        """
+        self.start()
+        with self._lock:
+            if report_id is None:
+                report_id = self._next_id
+            self._next_id += 1
+        item = {
+            'report_id': report_id,
+            'frame': frame,
+            'use_geo': use_geo_coordinates,
+            'model': model,
+            'timestamp': time.time() if timestamp is None else timestamp,
+            'enqueued': time.monotonic()
+        }
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return None
+        with self._lock:
+            self.accepted += 1
+        return report_id
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def status(self) -> Dict:
+        """队列深度、处理延迟与计数"""
+        with self._queue.mutex:
+            oldest = self._queue.queue[0]['enqueued'] if self._queue.queue else None
+        return {
+            'depth': self.depth,
+            'capacity': self.capacity,
+            'oldest_wait_ms': (time.monotonic() - oldest) * 1000 if oldest is not None else 0.0,
+            'last_lag_ms': self.last_lag_ms,
+            'accepted': self.accepted,
+            'rejected': self.rejected,
+            'processed': self.processed,
+            'batches': self.batches,
+            'workers': len(self._threads)
+        }
+
+    def recent_results(self, limit: int = 50) -> List[Dict]:
+        """最近处理完成的结果（新结果在后）"""
+        with self._lock:
+            results = list(self._results)
+        return results[-limit:] if limit > 0 else []
+
+    def _next_batch(self) -> List[Dict]:
+        """阻塞取出第一条上报，再在 max_wait_s 内凑满至多 batch_size 条"""
+        try:
+            batch = [self._queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_loop(self) -> None:
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                results = self.process_batch(batch)
+            except Exception:
+                logger.exception("Failed to process ingest batch of %d reports", len(batch))
+                results = [{'report_id': item['report_id'], 'timestamp': item['timestamp'],
+                            'error': '处理失败'} for item in batch]
+
+            finished = time.monotonic()
+            for item, result in zip(batch, results):
+                result['lag_ms'] = (finished - item['enqueued']) * 1000
+            with self._lock:
+                self._results.extend(results)
+                self.processed += len(results)
+                self.batches += 1
+                self.last_lag_ms = results[-1]['lag_ms']
+            if self.publish is not None:
+                for result in results:
+                    self.publish(result)
+
+    def process_batch(self, batch: List[Dict]) -> List[Dict]:
+        """处理一个微批次，按输入顺序返回结果"""
+        layout = self.layout_provider()
+        results: List[Optional[Dict]] = [None] * len(batch)
+
+        # 按（电台集合, 坐标模式, 传播模型）分组；电台全部在布局中且上报坐标与布局一致的走批量路径
+        groups: Dict[tuple, List[int]] = {}
+        for i, item in enumerate(batch):
+            frame = item['frame']
+            if layout.indices_matching(frame, item['use_geo']) is not None:
+                key = (tuple(frame.station_id.tolist()), item['use_geo'], item['model'])
+                groups.setdefault(key, []).append(i)
+            else:
+                results[i] = self._process_single(item, layout)
+
+        for (station_ids, use_geo, model), rows in groups.items():
+            indices = layout.indices_for(station_ids)
+            sub_layout = StationLayout.from_columns(
+                layout.station_ids[indices], [layout.names[i] for i in indices],
+                layout.positions[indices], layout.geo[indices], layout.version)
+            power_matrix = np.vstack([batch[row]['frame'].power for row in rows])
+            anomaly_results = self.anomaly_detector.detect_anomalies_batch(power_matrix, sub_layout)
+            locations = self.location_algorithm.calculate_locations(
+                power_matrix, sub_layout, [result['normal_indices'] for result in anomaly_results],
+                use_geo_coordinates=use_geo, model=model)
+            for row, anomaly, location in zip(rows, anomaly_results, locations):
+                results[row] = self._format_result(batch[row], location, anomaly)
+        return results
+
+    def _process_single(self, item: Dict, layout: StationLayout) -> Dict:
+        """逐条处理（上报中含布局外的电台或缺少 station_id）"""
+        frame = item['frame']
+        anomaly_result = self.anomaly_detector.detect_anomalies(frame, layout)
+        location = self.location_algorithm.calculate_location(
+            frame, anomaly_result['normal_indices'], use_geo_coordinates=item['use_geo'], layout=layout,
+            model=item['model'])
+        return self._format_result(item, location, anomaly_result)
+
+    @staticmethod
+    def _format_result(item: Dict, location: Dict, anomaly_result: Dict) -> Dict:
+        return {
+            'report_id': item['report_id'],
+            'timestamp': item['timestamp'],
+            'location': location,
+            'anomaly_indices': anomaly_result['anomaly_indices']
+        }
@@ -0,0 +1,157 @@
+import base64
+import numpy as np
+from typing import Dict, Tuple, Optional
+from .geo_converter import GeoConverter
+from .location_algorithm import LocationAlgorithm
+from .propagation_model import PropagationModel
+
+
+class LikelihoodGrid:
+    """似然网格引擎 - 在区域网格上评估功率衰减模型，生成干扰源概率热力图"""
+
+    def __init__(self, location_algorithm: LocationAlgorithm, geo_converter: GeoConverter = None,
+                 extent_km: float = 120.0, resolution_km: float = 2.0):
+        """
+        初始化网格参数
+
+        Args:
+            location_algorithm: 提供路径损耗模型参数的定位算法
+            geo_converter: 坐标转换器（默认使用定位算法的转换器）
+            extent_km: 网格半宽（公里），网格覆盖 [-extent, extent]²
+            resolution_km: 粗网格分辨率（公里）
+        """
+        self.location_algorithm = location_algorithm
+        self.geo_converter = geo_converter or location_algorithm.geo_converter
+        self.extent_km = extent_km
+        self.resolution_km = resolution_km
+        self.refine_factor = 10        # 细网格分辨率 = 粗网格分辨率 / refine_factor
+        self.refine_window_cells = 2   # 细化窗口半宽（粗网格单元数）
+        self.noise_std = 2.0           # 似然计算使用的测量噪声标准差 (dB)
+
+        # (key, grid_x, grid_y, 预测功率 (G × M), 预测功率平方 (G × M))；整体替换，并发请求读到的总是一致的表
+        self._tables = None
+
+    def _model_key(self, stations_pos: np.ndarray, model: PropagationModel) -> Tuple:
+        """缓存键：电台布局 + 网格参数 + 模型参数"""
+        return (stations_pos.tobytes(), stations_pos.shape, self.extent_km, self.resolution_km, model)
+
+    def _predicted_power(self, cells: np.ndarray, stations_pos: np.ndarray,
+                         model: PropagationModel) -> np.ndarray:
+        """在给定网格点上计算每个电台的预测接收功率 (G × M)"""
+        delta = cells[:, None, :] - stations_pos[None, :, :]
+        dist = np.maximum(np.sqrt(np.einsum('gmi,gmi->gm', delta, delta)), model.reference_distance)
+        path_loss = 10 * model.path_loss_exponent * np.log10(dist / model.reference_distance)
+        return model.reference_power - path_loss
+
+    def _ensure_tables(self, stations_pos: np.ndarray, model: PropagationModel) -> Tuple:
+        """按电台布局和模型预计算并缓存粗网格的路径损耗表，返回 (grid_x, grid_y, 预测功率, 预测功率平方)"""
+        key = self._model_key(stations_pos, model)
+        tables = self._tables
+        if tables is not None and tables[0] == key:
+            return tables[1:]
+
+        n_cells = int(round(2 * self.extent_km / self.resolution_km)) + 1
+        grid_x = np.linspace(-self.extent_km, self.extent_km, n_cells)
+        grid_y = np.linspace(-self.extent_km, self.extent_km, n_cells)
+        gx, gy = np.meshgrid(grid_x, grid_y)
+        cells = np.column_stack([gx.ravel(), gy.ravel()])
+
+        model_power = self._predicted_power(cells, stations_pos, model)
+        self._tables = (key, grid_x, grid_y, model_power, model_power ** 2)
+        return self._tables[1:]
+
+    def _sum_squared_residuals(self, model_power: np.ndarray, model_power_sq: np.ndarray,
+                               received_powers: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        所有网格点的残差平方和，一次矩阵运算完成：
+            Σ_m w_m (a_gm - p_m)² = (a²)·w - 2 a·(w p) + Σ w p²
+        """
+        weighted = mask * received_powers
+        return model_power_sq @ mask - 2 * (model_power @ weighted) + weighted @ received_powers
+
+    def evaluate(self, stations_pos: np.ndarray, received_powers: np.ndarray,
+                 mask: Optional[np.ndarray] = None, model: Optional[PropagationModel] = None) -> Dict:
+        """
+        评估似然网格（粗网格 + 峰值附近细化）
+
+        Args:
+            stations_pos: (M × 2) 电台本地坐标（公里）
+            received_powers: (M,) 接收功率
+            mask: (M,) 参与计算的电台（默认全部）
+            model: 传播模型参数（默认使用定位算法的模型）
+
+        Returns:
+            包含概率矩阵、网格范围和峰值位置的字典
+        """
+        stations_pos = np.ascontiguousarray(stations_pos, dtype=float)
+        received_powers = np.asarray(received_powers, dtype=float)
+        mask = np.ones(len(received_powers)) if mask is None else np.asarray(mask, dtype=float)
+
+        model = self.location_algorithm.model if model is None else model
+        grid_x, grid_y, model_power, model_power_sq = self._ensure_tables(stations_pos, model)
+        sse = self._sum_squared_residuals(model_power, model_power_sq, received_powers, mask)
+
+        # 高斯噪声下的对数似然，减去最大值后归一化为概率
+        log_likelihood = -sse / (2 * self.noise_std ** 2)
+        probability = np.exp(log_likelihood - log_likelihood.max())
+        probability /= probability.sum()
+        shape = (len(grid_y), len(grid_x))
+        probability = probability.reshape(shape)
+
+        peak_row, peak_col = np.unravel_index(int(np.argmax(probability)), shape)
+        coarse_peak = (float(grid_x[peak_col]), float(grid_y[peak_row]))
+        refined_peak = self._refine_peak(coarse_peak, stations_pos, received_powers, mask, model)
+
+        return {
+            'probability': probability,
+            'x': grid_x,
+            'y': grid_y,
+            'coarse_peak': coarse_peak,
+            'peak': refined_peak
+        }
+
+    def _refine_peak(self, center: Tuple[float, float], stations_pos: np.ndarray,
+                     received_powers: np.ndarray, mask: np.ndarray,
+                     model: PropagationModel) -> Tuple[float, float]:
+        """在粗网格峰值附近以更细分辨率重新评估，返回细化后的峰值"""
+        half_width = self.refine_window_cells * self.resolution_km
+        fine_step = self.resolution_km / self.refine_factor
+        offsets = np.arange(-half_width, half_width + fine_step / 2, fine_step)
+        gx, gy = np.meshgrid(center[0] + offsets, center[1] + offsets)
+        cells = np.column_stack([gx.ravel(), gy.ravel()])
+
+        model_power = self._predicted_power(cells, stations_pos, model)
+        sse = self._sum_squared_residuals(model_power, model_power ** 2, received_powers, mask)
+        best = int(np.argmin(sse))
+        return float(cells[best, 0]), float(cells[best, 1])
+
+    def initial_guess(self, stations_pos: np.ndarray, received_powers: np.ndarray,
+                      mask: Optional[np.ndarray] = None, model: Optional[PropagationModel] = None) -> np.ndarray:
+        """返回细化后的网格峰值，可作为优化器初值"""
+        return np.array(self.evaluate(stations_pos, received_powers, mask, model)['peak'])
+
+    def to_compact(self, result: Dict) -> Dict:
+        """
+        将网格结果压缩为 JSON 友好的紧凑格式：
+        概率按峰值归一化后量化为 uint8，按行优先顺序 base64 编码
+        """
+        probability = result['probability']
+        quantized = np.round(probability / probability.max() * 255).astype(np.uint8)
+        peak_lat, peak_lon = self.geo_converter.xy_to_latlon(*result['peak'])
+        sw_lat, sw_lon = self.geo_converter.xy_to_latlon(float(result['x'][0]), float(result['y'][0]))
+        ne_lat, ne_lon = self.geo_converter.xy_to_latlon(float(result['x'][-1]), float(result['y'][-1]))
+
+        return {
+            'shape': list(probability.shape),
+            'encoding': 'uint8-base64',
+            'data': base64.b64encode(quantized.tobytes()).decode('ascii'),
+            'max_probability': float(probability.max()),
+            'bounds': {
+                'x_min': float(result['x'][0]), 'x_max': float(result['x'][-1]),
+                'y_min': float(result['y'][0]), 'y_max': float(result['y'][-1]),
+                'southwest': {'lat': sw_lat, 'lon': sw_lon},
+                'northeast': {'lat': ne_lat, 'lon': ne_lon}
+            },
+            'resolution_km': self.resolution_km,
+            'peak': {'x': result['peak'][0], 'y': result['peak'][1], 'lat': peak_lat, 'lon': peak_lon}
+        }
@@ -1,178 +1,550 @@
 import numpy as np
-from scipy.optimize import minimize
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Union
 import math
-import random
 from .geo_converter import GeoConverter
+from .station_layout import StationLayout
+from .power_frame import PowerFrame
+from .path_loss_raster import PathLossRasters, RasterSelection
+from .propagation_model import PropagationModel
+from .pipeline_metrics import pipeline_metrics, COUNT_BUCKETS
 
 class LocationAlgorithm:
     """定位算法引擎 - 基于功率衰减模型的干扰源定位"""
     
-    def __init__(self, geo_converter: GeoConverter = None):
+    def __init__(self, geo_converter: GeoConverter = None, seed: Optional[int] = None):
         """初始化算法参数"""
-        self.path_loss_exponent = 2.0  # 路径损耗指数
-        self.reference_power = 100.0   # 参考功率 (dBm)
-        self.reference_distance = 1.0  # 参考距离 (km)
+        self.model = PropagationModel()  # 默认传播模型；各调用可传入自己的 model 覆盖
+        self.ransac_max_iterations = 50  # RANSAC 最大假设数
+        self.ransac_threshold = 5.0      # RANSAC 内点残差阈值 (dB)
+        self.ransac_confidence = 0.99    # 自适应终止的置信度
+        self.ransac_chunk_size = 16      # 每批同时评估的假设数
+        self.rng = np.random.default_rng(seed)  # 可复现的随机数生成器
+        self.seed_residual_threshold = 10.0  # 线性化初值拟合的RMS残差阈值 (dB)，超过则启用多起点
         self.geo_converter = geo_converter or GeoConverter()
+        self.path_loss_rasters: Optional[PathLossRasters] = None  # 站点路径损耗栅格（覆盖全部电台时替代对数距离模型）
         
-    def calculate_location(self, power_data: List[Dict],
+    @property
+    def path_loss_exponent(self) -> float:
+        return self.model.path_loss_exponent
+
+    @path_loss_exponent.setter
+    def path_loss_exponent(self, value: float) -> None:
+        self.model = self.model._replace(path_loss_exponent=value)
+
+    @property
+    def reference_power(self) -> float:
+        return self.model.reference_power
+
+    @reference_power.setter
+    def reference_power(self, value: float) -> None:
+        self.model = self.model._replace(reference_power=value)
+
+    @property
+    def reference_distance(self) -> float:
+        return self.model.reference_distance
+
+    @reference_distance.setter
+    def reference_distance(self, value: float) -> None:
+        self.model = self.model._replace(reference_distance=value)
+
+    def calculate_location(self, power_data: Union[PowerFrame, List[Dict]],
                          normal_indices: Optional[List[int]] = None,
-                         use_geo_coordinates: bool = False) -> Dict:
+                         use_geo_coordinates: bool = False,
+                         initial_guess: Optional[Tuple[float, float]] = None,
+                         layout: Optional[StationLayout] = None,
+                         model: Optional[PropagationModel] = None) -> Dict:
         """
         计算干扰源位置
 
         Args:
-            power_data: 电台功率数据列表
+            power_data: 电台功率数据（PowerFrame 或记录列表）
             normal_indices: 正常电台的索引列表（用于排除异常数据）
             use_geo_coordinates: 是否使用地理坐标计算
+            initial_guess: 优化初值 (x, y)，例如跟踪滤波器的预测位置；默认使用线性化初值
+            layout: 电台布局缓存（提供且包含全部 station_id 时直接读取其位置矩阵）
+            model: 本次调用使用的传播模型参数（默认 self.model）
 
         Returns:
             定位结果字典
         """
-        if not power_data:
+        if power_data is None or len(power_data) == 0:
             return {'error': '没有功率数据'}
+        frame = PowerFrame.coerce(power_data)
 
-        # 如果没有指定正常电台索引，使用所有电台
-        if normal_indices is None:
-            normal_indices = list(range(len(power_data)))
-
-        # 提取正常电台的数据
-        valid_data = [power_data[i] for i in normal_indices]
+        # 提取正常电台的数据（未指定时使用所有电台）
+        valid_data = frame if normal_indices is None else frame.subset(normal_indices)
 
         if len(valid_data) < 3:
             return {'error': '有效电台数量不足，至少需要3个电台进行定位'}
 
         # 准备数据
-        if use_geo_coordinates and 'lat' in valid_data[0] and 'lon' in valid_data[0]:
-            # 使用地理坐标
-            stations_geo = np.array([[d['lat'], d['lon']] for d in valid_data])
-            # 转换为本地坐标进行计算
-            stations_pos = np.array([self.geo_converter.latlon_to_xy(d['lat'], d['lon']) for d in valid_data])
-        else:
-            # 使用本地坐标
-            stations_pos = np.array([[d['x'], d['y']] for d in valid_data])
-            stations_geo = None
-
-        received_powers = np.array([d['power'] for d in valid_data])
+        stations_pos = self.get_station_positions(valid_data, use_geo_coordinates, layout)
+        received_powers = valid_data.power
+        raster = self._raster_for(valid_data.station_id) if valid_data.has_station_ids else None
 
         # --- Patch 03: Robust Localization Pipeline ---
         # Step 1: RANSAC 离群值过滤
-        inlier_indices = self._ransac_outlier_filtering(stations_pos, received_powers)
+        with pipeline_metrics.timer('ransac'):
+            inlier_indices = self._ransac_outlier_filtering(stations_pos, received_powers, raster, model)
         inlier_pos = stations_pos[inlier_indices]
         inlier_powers = received_powers[inlier_indices]
+        inlier_raster = raster.subset(inlier_indices) if raster is not None else None
 
-        # Step 2: 多起点鲁棒优化 (Multi-start BFGS)
-        best_result = self._robust_minimize_location(inlier_pos, inlier_powers)
-        best_method = "robust_bfgs_ransac"
-        
+        # Step 2: 线性化初值 + Levenberg-Marquardt 精化（拟合差时多起点）
+        with pipeline_metrics.timer('optimizer'):
+            best_result = self._robust_minimize_location(inlier_pos, inlier_powers, initial_guess, inlier_raster,
+                                                        model)
+
+        return self._build_location_result(best_result, len(inlier_indices),
+                                           len(frame) - len(valid_data), use_geo_coordinates)
+
+    def get_station_positions(self, power_data: Union[PowerFrame, List[Dict]], use_geo_coordinates: bool = False,
+                            layout: Optional[StationLayout] = None) -> np.ndarray:
+        """提取电台本地坐标 (M × 2)：上报坐标与布局缓存一致时使用缓存，其次经纬度转换，最后直接使用 x/y"""
+        frame = PowerFrame.coerce(power_data)
+        layout_indices = None
+        if layout is not None:
+            layout_indices = layout.indices_matching(frame, use_geo_coordinates)
+        if layout_indices is not None:
+            # 使用布局缓存中的本地坐标
+            return layout.positions[layout_indices]
+        if use_geo_coordinates and frame.has_geo:
+            # 使用地理坐标，转换为本地坐标进行计算
+            return np.column_stack(self.geo_converter.latlon_to_xy_array(frame.lat, frame.lon))
+        # 使用本地坐标
+        return frame.positions
+
+    def _raster_for(self, station_ids) -> Optional[RasterSelection]:
+        """选取一组电台的路径损耗栅格；未配置或有电台缺少栅格时返回 None"""
+        if self.path_loss_rasters is None:
+            return None
+        return self.path_loss_rasters.select(station_ids)
+
+    def _predicted_powers(self, positions: np.ndarray, stations_pos: np.ndarray,
+                          raster: Optional[RasterSelection] = None,
+                          model: Optional[PropagationModel] = None) -> np.ndarray:
+        """(K × 2) 候选位置处各电台的预测接收功率 (K × M)；栅格范围内使用站点栅格"""
+        model = self.model if model is None else model
+        delta = positions[:, None, :] - stations_pos[None, :, :]
+        dist = np.maximum(np.sqrt(np.einsum('kmi,kmi->km', delta, delta)), model.reference_distance)
+        pred = model.reference_power - 10 * model.path_loss_exponent * np.log10(dist / model.reference_distance)
+        if raster is not None:
+            loss, _, inside = raster.loss_and_gradient(positions)
+            pred = np.where(inside[:, None], model.reference_power - loss, pred)
+        return pred
+
+    def predict_powers(self, position: Tuple[float, float], stations_pos: np.ndarray,
+                       raster: Optional[RasterSelection] = None,
+                       model: Optional[PropagationModel] = None) -> np.ndarray:
+        """预测干扰源位于 position 时各电台的接收功率（对数距离模型或站点栅格）"""
+        return self._predicted_powers(np.asarray(position, dtype=float).reshape(1, 2), stations_pos, raster,
+                                      model)[0]
+
+    def station_residuals(self, power_data: Union[PowerFrame, List[Dict]], location_result: Dict,
+                          use_geo_coordinates: bool = False,
+                          layout: Optional[StationLayout] = None,
+                          model: Optional[PropagationModel] = None) -> np.ndarray:
+        """定位结果下各电台的模型残差（实测功率 - 预测功率）"""
+        position = location_result['position']
+        frame = PowerFrame.coerce(power_data)
+        stations_pos = self.get_station_positions(frame, use_geo_coordinates, layout)
+        raster = self._raster_for(frame.station_id) if frame.has_station_ids else None
+        return frame.power - self.predict_powers((position['x'], position['y']), stations_pos, raster, model)
+
+    def calculate_locations(self, power_matrix: np.ndarray, stations: Union[List[Dict], StationLayout],
+                            normal_indices: Optional[List[List[int]]] = None,
+                            use_geo_coordinates: bool = False,
+                            model: Optional[PropagationModel] = None) -> List[Dict]:
+        """
+        批量计算多个快照的干扰源位置（共享同一电台布局）
+
+        Args:
+            power_matrix: (N 快照 × M 电台) 功率矩阵
+            stations: 电台布局（电台列表或 StationLayout），与矩阵列一一对应
+            normal_indices: 每个快照的正常电台索引列表（用于排除异常数据）
+            use_geo_coordinates: 是否使用地理坐标计算
+            model: 本次调用使用的传播模型参数（默认 self.model）
+
+        Returns:
+            每个快照一个定位结果字典，结构与 calculate_location 相同
+        """
+        powers = np.atleast_2d(np.asarray(power_matrix, dtype=float))
+        n_snapshots, n_stations = powers.shape
+        if n_snapshots == 0 or n_stations == 0:
+            return []
+        if len(stations) != n_stations:
+            return [{'error': '电台布局与功率矩阵列数不一致'} for _ in range(n_snapshots)]
+
+        # 电台位置只构建一次，所有快照共享
+        if isinstance(stations, StationLayout):
+            stations_pos = stations.positions
+            station_ids = stations.station_ids
+        else:
+            if use_geo_coordinates and 'lat' in stations[0] and 'lon' in stations[0]:
+                stations_pos = np.column_stack(self.geo_converter.latlon_to_xy_array(
+                    [s['lat'] for s in stations], [s['lon'] for s in stations]))
+            else:
+                stations_pos = np.array([[s['x'], s['y']] for s in stations], dtype=float)
+            station_ids = [s.get('id', s.get('station_id')) for s in stations]
+        raster = self._raster_for(station_ids)
+
+        valid_mask = np.ones((n_snapshots, n_stations), dtype=bool)
+        if normal_indices is not None:
+            valid_mask[:] = False
+            for n, indices in enumerate(normal_indices):
+                valid_mask[n, indices] = True
+        valid_counts = valid_mask.sum(axis=1)
+
+        # Step 1: 逐快照 RANSAC 离群值过滤，得到内点掩码
+        inlier_mask = np.zeros_like(valid_mask)
+        with pipeline_metrics.timer('ransac'):
+            for n in np.flatnonzero(valid_counts >= 3):
+                valid_idx = np.flatnonzero(valid_mask[n])
+                inliers = self._ransac_outlier_filtering(stations_pos[valid_idx], powers[n, valid_idx],
+                                                         raster.subset(valid_idx) if raster is not None else None,
+                                                         model)
+                inlier_mask[n, valid_idx[inliers]] = True
+        inlier_counts = inlier_mask.sum(axis=1)
+
+        # Step 2: 所有快照堆叠为一次求解（线性化初值 + 按需多起点）
+        solvable = np.flatnonzero(valid_counts >= 3)
+        best_results = {}
+        if len(solvable):
+            with pipeline_metrics.timer('optimizer'):
+                solved = self._solve_snapshots(stations_pos, powers[solvable], inlier_mask[solvable],
+                                               raster=raster, model=model)
+            for k, n in enumerate(solvable):
+                best_results[n] = self._format_solution(solved, k, int(inlier_counts[n]))
+
+        results = []
+        for n in range(n_snapshots):
+            if n not in best_results:
+                results.append({'error': '有效电台数量不足，至少需要3个电台进行定位'})
+                continue
+            results.append(self._build_location_result(best_results[n], int(inlier_counts[n]),
+                                                       int(n_stations - valid_counts[n]), use_geo_coordinates))
+        return results
+
+    def _build_location_result(self, best_result: Dict, valid_stations_count: int,
+                               excluded_stations: int, use_geo_coordinates: bool) -> Dict:
+        """组装定位结果（质量评估与经纬度转换）"""
         # Step 3: 质量评估
-        quality_info = self._assess_location_quality(best_result, len(inlier_indices))
+        quality_info = self._assess_location_quality(best_result, valid_stations_count)
 
         # 转换结果坐标 - 始终包含经纬度坐标
         final_position = best_result['position'].copy()
-
-        # 确保结果包含经纬度坐标
-        if 'lat' not in final_position or 'lon' not in final_position:
-            lat, lon = self.geo_converter.xy_to_latlon(final_position['x'], final_position['y'])
-            final_position['lat'] = lat
-            final_position['lon'] = lon
-
-        # 如果使用地理坐标模式，确保坐标一致性
-        if use_geo_coordinates and stations_geo is not None:
-            # 重新转换以确保精度
-            lat, lon = self.geo_converter.xy_to_latlon(final_position['x'], final_position['y'])
-            final_position['lat'] = lat
-            final_position['lon'] = lon
+        lat, lon = self.geo_converter.xy_to_latlon(final_position['x'], final_position['y'])
+        final_position['lat'] = lat
+        final_position['lon'] = lon
 
         return {
             'position': final_position,
             'confidence': best_result['confidence'],
             'residual': best_result['residual'],
-            'method_used': best_method,
-            'valid_stations_count': len(inlier_indices),
-            'excluded_stations': len(power_data) - len(valid_data),
+            'method_used': "robust_lm_ransac",
+            'valid_stations_count': valid_stations_count,
+            'excluded_stations': excluded_stations,
             'quality_assessment': quality_info,
             'coordinate_system': 'geographic' if use_geo_coordinates else 'local'
         }
 
-    def _ransac_outlier_filtering(self, stations_pos: np.ndarray, received_powers: np.ndarray) -> List[int]:
+    def _ransac_outlier_filtering(self, stations_pos: np.ndarray, received_powers: np.ndarray,
+                                  raster: Optional[RasterSelection] = None,
+                                  model: Optional[PropagationModel] = None) -> List[int]:
         """
         RANSAC implementation to filter out outlier stations.
         Returns indices of inlier stations.
+
+        Hypotheses are drawn in chunks and scored together as a (hypotheses x stations) residual
+        matrix. Sampling stops early once the adaptive bound
+            N = log(1 - p) / log(1 - w^3)
+        (w = best inlier ratio so far, p = ransac_confidence) says further samples are pointless.
         """
-        best_inliers = []
         n_stations = len(stations_pos)
         if n_stations < 4:
             return list(range(n_stations))
 
-        iterations = 50
-        threshold = 5.0  # dB residual threshold
-
-        for _ in range(iterations):
-            # Randomly sample 3 stations to fit a candidate model
-            sample_idx = random.sample(range(n_stations), 3)
-            
-            # Quick centroid-based fit for the sample
-            guess = np.mean(stations_pos[sample_idx], axis=0)
-            
-            # Count inliers for this model
-            current_inliers = []
-            for i in range(n_stations):
-                dist = np.linalg.norm(guess - stations_pos[i])
-                dist = max(dist, self.reference_distance)
-                pred_p = self.reference_power - 10 * self.path_loss_exponent * np.log10(dist / self.reference_distance)
-                if abs(pred_p - received_powers[i]) < threshold:
-                    current_inliers.append(i)
-            
-            if len(current_inliers) > len(best_inliers):
-                best_inliers = current_inliers
-                
-        return best_inliers if len(best_inliers) >= 3 else list(range(n_stations))
-
-    def _robust_minimize_location(self, stations_pos: np.ndarray, received_powers: np.ndarray) -> Dict:
-        """
-        Robust optimization using Multi-start BFGS to avoid local minima.
-        NOTE: 'stations_pos' are expected to be local flat projections (e.g., meters or km) 
-        converted by GeoConverter. Euclidean distances are calculated in this local frame 
-        to avoid spherical projection errors during optimization.
+        sample_size = 3
+        best_inliers = np.zeros(n_stations, dtype=bool)
+        best_count = 0
+        required = self.ransac_max_iterations
+        done = 0
+
+        while done < required:
+            chunk = min(self.ransac_chunk_size, required - done)
+            # Randomly sample 3 distinct stations per hypothesis
+            sample_idx = np.argpartition(self.rng.random((chunk, n_stations)), sample_size, axis=1)[:, :sample_size]
+            # Quick centroid-based fit for each sample
+            guesses = stations_pos[sample_idx].mean(axis=1)
+
+            # Count inliers for all hypotheses at once
+            pred = self._predicted_powers(guesses, stations_pos, raster, model)
+            inliers = np.abs(pred - received_powers) < self.ransac_threshold
+            counts = inliers.sum(axis=1)
+
+            best = int(np.argmax(counts))
+            if counts[best] > best_count:
+                best_count = int(counts[best])
+                best_inliers = inliers[best]
+            done += chunk
+
+            # 自适应终止：按当前最优内点比例更新所需迭代次数
+            inlier_ratio = best_count / n_stations
+            if inlier_ratio >= 1.0:
+                break
+            if inlier_ratio > 0:
+                all_inlier_prob = inlier_ratio ** sample_size
+                needed = np.log(1 - self.ransac_confidence) / np.log1p(-all_inlier_prob)
+                required = min(required, int(np.ceil(needed)))
+
+        pipeline_metrics.inc('ransac_hypotheses_total', done, help_text='RANSAC hypotheses evaluated')
+        pipeline_metrics.observe('ransac_inliers', best_count, COUNT_BUCKETS,
+                                 help_text='Best RANSAC inlier count per snapshot')
+        return np.flatnonzero(best_inliers).tolist() if best_count >= 3 else list(range(n_stations))
+
+    def _residuals_and_jacobian(self, positions: np.ndarray, stations_pos: np.ndarray,
+                                received_powers: np.ndarray, weights: Optional[np.ndarray] = None,
+                                raster: Optional[RasterSelection] = None,
+                                model: Optional[PropagationModel] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized residuals of the log-distance model and their analytic Jacobian.
+
+        positions has shape (K, 2); residuals are (K, M) and the Jacobian is (K, M, 2):
+            pred_i = P0 - 10 * n * log10(max(d_i, d0) / d0)
+            d pred_i / d pos = -10 * n / ln(10) * (pos - s_i) / d_i^2   (zero where d_i is clamped to d0)
+
+        received_powers may be (M,) or (K, M); optional (K, M) weights mask stations out per row.
+        With a raster selection, positions inside the raster use the bilinearly interpolated site-specific
+        loss and its gradient instead (pred_i = P0 - L_i(pos), d pred_i / d pos = -grad L_i).
+        """
+        model = self.model if model is None else model
+        delta = positions[:, None, :] - stations_pos[None, :, :]
+        dist_sq = np.einsum('kmi,kmi->km', delta, delta)
+        clamped = dist_sq < model.reference_distance ** 2
+        safe_dist_sq = np.where(clamped, model.reference_distance ** 2, dist_sq)
+
+        # log10(d) = 0.5 * log10(d^2)，避免额外的开方
+        pred = model.reference_power - 5 * model.path_loss_exponent * np.log10(
+            safe_dist_sq / model.reference_distance ** 2)
+        scale = -10 * model.path_loss_exponent / np.log(10)
+        coeff = np.where(clamped, 0.0, scale / safe_dist_sq)
+        jacobian = coeff[:, :, None] * delta
+        if raster is not None:
+            loss, gradient, inside = raster.loss_and_gradient(positions)
+            pred = np.where(inside[:, None], model.reference_power - loss, pred)
+            jacobian = np.where(inside[:, None, None], -gradient, jacobian)
+
+        residuals = pred - received_powers
+        if weights is not None:
+            residuals = residuals * weights
+            jacobian = jacobian * weights[:, :, None]
+        return residuals, jacobian
+
+    def _objective_and_gradient(self, pos: np.ndarray, stations_pos: np.ndarray,
+                                received_powers: np.ndarray,
+                                model: Optional[PropagationModel] = None) -> Tuple[float, np.ndarray]:
+        """单点的残差平方和及其解析梯度"""
+        residuals, jacobian = self._residuals_and_jacobian(
+            np.asarray(pos, dtype=float).reshape(1, 2), stations_pos, received_powers, model=model)
+        return float(residuals[0] @ residuals[0]), 2 * residuals[0] @ jacobian[0]
+
+    def _minimize_from_starts(self, starts: np.ndarray, stations_pos: np.ndarray,
+                              received_powers: np.ndarray, weights: Optional[np.ndarray] = None,
+                              max_iter: int = 100, gtol: float = 1e-5,
+                              raster: Optional[RasterSelection] = None,
+                              model: Optional[PropagationModel] = None) -> Dict:
+        """
+        Levenberg-Marquardt run from all start points at once.
+
+        Every start point is an independent damped Newton solve using the analytic Hessian of the
+        log-distance model; residuals and Jacobians of all starts are evaluated together in a single
+        (K, M) broadcast per iteration, and the 2x2 systems are solved in closed form.
+        With a raster selection the model has no closed-form curvature, so plain Gauss-Newton
+        (J^T J) is damped instead.
+        Returns per-start arrays: 'x' (K, 2), 'fun' (K,) and 'success' (K,).
+        """
+        model = self.model if model is None else model
+        x = np.array(starts, dtype=float).reshape(-1, 2)
+        residuals, jacobian = self._residuals_and_jacobian(x, stations_pos, received_powers, weights, raster,
+                                                           model)
+        cost = np.einsum('km,km->k', residuals, residuals)
+        damping = np.full(len(x), 1e-3)
+        done = np.zeros(len(x), dtype=bool)
+        stalled = np.zeros(len(x), dtype=bool)
+        n_iter = 0
+
+        scale = -10 * model.path_loss_exponent / np.log(10)
+        for n_iter in range(1, max_iter + 1):
+            jtj = np.einsum('kmi,kmj->kij', jacobian, jacobian)
+            jtr = np.einsum('kmi,km->ki', jacobian, residuals)
+            # 梯度足够小即视为收敛（与 BFGS 默认 gtol 一致）
+            done |= 2 * np.abs(jtr).max(axis=1) <= gtol
+            if done.all():
+                break
+
+            if raster is None:
+                # 对数距离模型的二阶项: ∇²pred_i = (|J_i|²·I - 2·J_i J_iᵀ) / scale
+                weighted = residuals / scale
+                curvature = -2 * np.einsum('km,kmi,kmj->kij', weighted, jacobian, jacobian)
+                curvature[:, [0, 1], [0, 1]] += np.einsum('km,kmi,kmi->k', weighted, jacobian, jacobian)[:, None]
+                hessian = jtj + curvature
+                # 完整 Hessian 非正定时退回 Gauss-Newton 近似
+                indefinite = (hessian[:, 0, 0] <= 0) | (
+                    hessian[:, 0, 0] * hessian[:, 1, 1] - hessian[:, 0, 1] ** 2 <= 0)
+                hessian[indefinite] = jtj[indefinite]
+            else:
+                hessian = jtj
+
+            # Marquardt 阻尼: (H + λ·diag(H)) Δ = -Jtr，2x2 闭式求解
+            a = hessian[:, 0, 0] * (1 + damping) + 1e-12
+            d = hessian[:, 1, 1] * (1 + damping) + 1e-12
+            b = hessian[:, 0, 1]
+            det = a * d - b * b
+            step = np.stack([-(d * jtr[:, 0] - b * jtr[:, 1]) / det,
+                             -(a * jtr[:, 1] - b * jtr[:, 0]) / det], axis=1)
+            step[done] = 0.0
+
+            trial = x + step
+            trial_res, trial_jac = self._residuals_and_jacobian(trial, stations_pos, received_powers, weights,
+                                                                raster, model)
+            trial_cost = np.einsum('km,km->k', trial_res, trial_res)
+            improved = (trial_cost < cost) & ~done
+
+            x[improved] = trial[improved]
+            residuals[improved] = trial_res[improved]
+            jacobian[improved] = trial_jac[improved]
+            cost[improved] = trial_cost[improved]
+            damping = np.where(done, damping, np.where(improved, damping * 0.3, damping * 10.0))
+            # 阻尼过大说明步长已无法再降低代价
+            stalled |= damping > 1e10
+            done |= stalled
+
+        # 每个起点每次迭代一次残差/雅可比评估（另加初始评估）
+        pipeline_metrics.inc('optimizer_starts_total', len(x), help_text='Levenberg-Marquardt start points solved')
+        pipeline_metrics.inc('optimizer_iterations_total', n_iter, help_text='Levenberg-Marquardt iterations')
+        pipeline_metrics.inc('optimizer_evaluations_total', len(x) * (n_iter + 1),
+                             help_text='Residual/Jacobian evaluations per start point')
+        return {
+            'x': x,
+            'fun': cost,
+            'success': done & ~stalled,
+            'nit': n_iter
+        }
+
+    def _linearized_initial_guess(self, stations_pos: np.ndarray, received_powers: np.ndarray,
+                                  weights: Optional[np.ndarray] = None,
+                                  model: Optional[PropagationModel] = None) -> np.ndarray:
+        """
+        Closed-form seed from linearized multilateration.
+
+        Powers are converted to ranges r_i with calculate_distance_from_power; subtracting the
+        weighted mean of |x - s_i|^2 = r_i^2 removes the |x|^2 term and leaves the linear system
+            2 (s_i - s_bar) . x = |s_i|^2 - mean|s|^2 - (r_i^2 - mean r^2)
+        which is solved by weighted least squares (weights 1 / r_i^2) for every row at once.
+        received_powers is (N, M); weights is an optional (N, M) station mask. Returns (N, 2).
+        """
+        model = self.model if model is None else model
+        powers = np.atleast_2d(received_powers)
+        mask = np.ones_like(powers) if weights is None else np.asarray(weights, dtype=float)
+        ranges = self.calculate_distance_from_power(powers, model)
+        w = mask / np.maximum(ranges, model.reference_distance) ** 2
+        w = w / w.sum(axis=1, keepdims=True)
+
+        sq_norm = np.einsum('mi,mi->m', stations_pos, stations_pos)
+        s_bar = w @ stations_pos
+        a = 2 * (stations_pos[None, :, :] - s_bar[:, None, :])
+        b = (sq_norm - (w @ sq_norm)[:, None]) - (ranges ** 2 - np.sum(w * ranges ** 2, axis=1, keepdims=True))
+
+        # 加权正规方程 (AᵀWA) x = AᵀWb，2x2 闭式求解
+        ata = np.einsum('nm,nmi,nmj->nij', w, a, a)
+        atb = np.einsum('nm,nmi,nm->ni', w, a, b)
+        det = ata[:, 0, 0] * ata[:, 1, 1] - ata[:, 0, 1] ** 2
+        degenerate = np.abs(det) <= 1e-9 * np.maximum(ata[:, 0, 0] * ata[:, 1, 1], 1e-300)
+        det = np.where(degenerate, 1.0, det)
+        seeds = np.stack([(ata[:, 1, 1] * atb[:, 0] - ata[:, 0, 1] * atb[:, 1]) / det,
+                          (ata[:, 0, 0] * atb[:, 1] - ata[:, 0, 1] * atb[:, 0]) / det], axis=1)
+        # 电台共线等退化几何时退回加权质心
+        seeds[degenerate] = s_bar[degenerate]
+        return seeds
+
+    def _solve_snapshots(self, stations_pos: np.ndarray, received_powers: np.ndarray,
+                         weights: np.ndarray, seeds: Optional[np.ndarray] = None,
+                         raster: Optional[RasterSelection] = None,
+                         model: Optional[PropagationModel] = None) -> Dict:
+        """
+        Solve N snapshots sharing one station layout.
+
+        Each row is refined once from its seed (the linearized multilateration seed unless warm-start
+        seeds are given); only rows whose fit is poor (RMS residual above seed_residual_threshold,
+        not converged, or outside the raster) are re-solved from the fixed multi-start set
+        (centroid, strongest station, centroid +/-10 km). Returns per-row arrays
+        'x', 'fun', 'success' and 'optimizer_runs'.
         """
-        def objective(pos):
-            total_err = 0
-            for i, (sx, sy) in enumerate(stations_pos):
-                # Euclidean distance in local projection frame
-                dist = np.sqrt((pos[0] - sx)**2 + (pos[1] - sy)**2)
-                dist = max(dist, self.reference_distance)
-                # Power decay model (Log-distance path loss)
-                pred = self.reference_power - 10 * self.path_loss_exponent * np.log10(dist / self.reference_distance)
-                total_err += (pred - received_powers[i])**2
-            return total_err
-
-        # Starting points: 1. Centroid, 2. Max power station, 3-5. Jittered points
-        centroid = np.mean(stations_pos, axis=0)
-        max_power_idx = np.argmax(received_powers)
-        starts = [
-            centroid,
-            stations_pos[max_power_idx],
-            centroid + np.array([10, 10]),
-            centroid + np.array([-10, -10])
-        ]
-
-        best_res = None
-        for start_p in starts:
-            res = minimize(objective, start_p, method='BFGS')
+        if seeds is None:
+            seeds = self._linearized_initial_guess(stations_pos, received_powers, weights, model)
+        if raster is not None:
+            # 线性化初值基于对数距离模型，可能远在栅格之外；夹回栅格范围内再精化
+            seeds = raster.clip(seeds)
+        refined = self._minimize_from_starts(seeds, stations_pos, received_powers, weights,
+                                             raster=raster, model=model)
+        x, cost, success = refined['x'], refined['fun'], refined['success']
+        runs = np.ones(len(x), dtype=int)
+
+        counts = weights.sum(axis=1)
+        rms = np.sqrt(cost / counts)
+        poor_fit = ~success | (rms > self.seed_residual_threshold)
+        if raster is not None:
+            poor_fit |= ~raster.contains(x)
+        bad = np.flatnonzero(poor_fit)
+        if len(bad):
+            mask = weights[bad]
+            centroids = (mask @ stations_pos) / counts[bad, None]
+            strongest = stations_pos[np.argmax(np.where(mask > 0, received_powers[bad], -np.inf), axis=1)]
+            starts = np.stack([centroids, strongest, centroids + 10, centroids - 10], axis=1)
+            n_starts = starts.shape[1]
+
+            retried = self._minimize_from_starts(starts.reshape(-1, 2), stations_pos,
+                                                 np.repeat(received_powers[bad], n_starts, axis=0),
+                                                 np.repeat(mask, n_starts, axis=0), raster=raster,
+                                                 model=model)
+            retry_cost = retried['fun'].reshape(-1, n_starts)
+            best = np.arange(len(bad)) * n_starts + np.argmin(retry_cost, axis=1)
             # Select absolute minimum residual point even if optimization didn't perfectly converge
-            if best_res is None or res.fun < best_res.fun:
-                best_res = res
+            better = retried['fun'][best] < cost[bad]
+            x[bad[better]] = retried['x'][best[better]]
+            cost[bad[better]] = retried['fun'][best[better]]
+            success[bad[better]] = retried['success'][best[better]]
+            runs[bad] += n_starts
 
-        residual = best_res.fun
-        confidence = max(0, 100 - residual / len(stations_pos))
+        return {'x': x, 'fun': cost, 'success': success, 'optimizer_runs': runs}
+
+    def _format_solution(self, solved: Dict, row: int, stations_used: int) -> Dict:
+        """将 _solve_snapshots 的第 row 行整理为定位结果"""
+        residual = float(solved['fun'][row])
+        confidence = max(0, 100 - residual / stations_used)
         return {
-            'position': {'x': float(best_res.x[0]), 'y': float(best_res.x[1])},
+            'position': {'x': float(solved['x'][row, 0]), 'y': float(solved['x'][row, 1])},
             'confidence': min(100, max(0, confidence)),
-            'residual': float(residual),
-            'success': best_res.success
+            'residual': residual,
+            'success': bool(solved['success'][row]),
+            'optimizer_runs': int(solved['optimizer_runs'][row])
         }
 
+    def _robust_minimize_location(self, stations_pos: np.ndarray, received_powers: np.ndarray,
+                                  initial_guess: Optional[Tuple[float, float]] = None,
+                                  raster: Optional[RasterSelection] = None,
+                                  model: Optional[PropagationModel] = None) -> Dict:
+        """
+        Robust optimization seeded by linearized multilateration, with multi-start fallback.
+        NOTE: 'stations_pos' are expected to be local flat projections (e.g., meters or km) 
+        converted by GeoConverter. Euclidean distances are calculated in this local frame 
+        to avoid spherical projection errors during optimization.
+        """
+        powers = np.asarray(received_powers, dtype=float)[None, :]
+        seeds = None if initial_guess is None else np.asarray(initial_guess, dtype=float).reshape(1, 2)
+        solved = self._solve_snapshots(stations_pos, powers, np.ones_like(powers), seeds, raster, model)
+        return self._format_solution(solved, 0, len(stations_pos))
+
     def _assess_location_quality(self, result: Dict, valid_stations_count: int) -> Dict:
         """评估定位质量"""
         confidence = result.get('confidence', 0)
@@ -207,8 +579,10 @@ class LocationAlgorithm:
             'assessment': f'{quality} quality with {reliability} reliability'
         }
 
-    def calculate_distance_from_power(self, received_power: float) -> float:
-        """根据接收功率计算距离"""
-        path_loss = self.reference_power - received_power
-        distance = self.reference_distance * (10 ** (path_loss / (10 * self.path_loss_exponent)))
+    def calculate_distance_from_power(self, received_power: float,
+                                      model: Optional[PropagationModel] = None) -> float:
+        """根据接收功率计算距离（支持 NumPy 数组）"""
+        model = self.model if model is None else model
+        path_loss = model.reference_power - received_power
+        distance = model.reference_distance * (10 ** (path_loss / (10 * model.path_loss_exponent)))
         return distance
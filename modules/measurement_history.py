@@ -0,0 +1,277 @@
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+from .power_frame import PowerFrame
+
+logger = logging.getLogger(__name__)
+
+
+def parse_timestamp(value: Union[float, int, str, None]) -> Optional[float]:
+    """
+    解析客户端提供的时间戳：Unix 秒或 ISO 8601 字符串（如 /api/simulate_data 返回的 timestamp）
+
+    Returns:
+        Unix 时间戳 (s)；value 为 None 时返回 None
+
+    Raises:
+        ValueError: 无法解析
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    elif isinstance(value, str):
+        try:
+            seconds = float(value)
+        except ValueError:
+            seconds = datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    else:
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    if not math.isfinite(seconds):
+        raise ValueError(f"Invalid timestamp: {value!r}")
+    return seconds
+
+
+class MeasurementHistory:
+    """测量历史存储 - 定位请求的功率快照与定位结果写入本地 SQLite（WAL 模式）
+
+    请求路径上的 record() 只把快照追加到内存缓冲区即返回；
+    后台写线程每 flush_interval_s 或缓冲达到 batch_size 时在一个事务中批量写入。
+    缓冲区有上限，磁盘跟不上时丢弃最旧的快照并计数，不阻塞请求。
+    查询按时间范围返回列式 NumPy 数组，便于回放和分析。
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval_s: float = 1.0,
+                 capacity: int = 10000, timeout: float = 10.0):
+        """
+        Args:
+            path: 数据库文件路径（可与 StationStore 共用同一文件）
+            batch_size: 缓冲快照数达到该值时立即写入
+            flush_interval_s: 最长写入间隔 (s)
+            capacity: 内存缓冲区最多保留的快照数
+            timeout: 等待其它进程写锁的超时 (s)
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.timeout = timeout
+        self._pending = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._local = threading.local()
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp REAL NOT NULL,
+                    coord_mode TEXT,
+                    x REAL,
+                    y REAL,
+                    lat REAL,
+                    lon REAL,
+                    confidence REAL,
+                    anomaly_count INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE TABLE IF NOT EXISTS measurements (
+                    snapshot_id INTEGER NOT NULL,
+                    timestamp REAL NOT NULL,
+                    station_id INTEGER,
+                    power REAL NOT NULL,
+                    is_anomaly INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_measurements_timestamp ON measurements (timestamp);
+                CREATE INDEX IF NOT EXISTS idx_measurements_station_time ON measurements (station_id, timestamp);
+            ''')
+
+    def _connect(self) -> sqlite3.Connection:
+        """当前线程的连接（自动提交模式，写入时显式开启事务）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def record(self, frame: PowerFrame, location: Optional[Dict] = None,
+               anomaly_indices: Sequence[int] = (), timestamp: Union[float, str, None] = None,
+               coord_mode: Optional[str] = None) -> None:
+        """缓冲一个快照及其定位结果（不做磁盘 I/O）；timestamp 无法解析时使用当前时间"""
+        try:
+            timestamp = parse_timestamp(timestamp)
+        except ValueError:
+            logger.debug("Ignoring unparseable snapshot timestamp %r", timestamp)
+            timestamp = None
+        station_id = np.full(len(frame), np.nan)
+        if frame.has_station_ids:
+            station_id = frame.station_id.astype(float)
+        anomaly = frame.anomaly.copy()
+        anomaly[list(anomaly_indices)] = True
+        item = {
+            'timestamp': time.time() if timestamp is None else timestamp,
+            'coord_mode': coord_mode,
+            'position': (location or {}).get('position'),
+            'confidence': (location or {}).get('confidence'),
+            'station_id': station_id,
+            'power': frame.power.copy(),
+            'anomaly': anomaly
+        }
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(item)
+            self.recorded += 1
+            pending = len(self._pending)
+            self._start_writer()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _start_writer(self) -> None:
+        """首次写入时启动后台写线程（调用方持有 _lock）"""
+        if self._writer is None or not self._writer.is_alive():
+            self._stop.clear()
+            self._writer = threading.Thread(target=self._writer_loop, name='history-writer', daemon=True)
+            self._writer.start()
+
+    def _writer_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval_s)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except sqlite3.Error:
+                logger.exception("Failed to write measurement history")
+
+    def flush(self) -> int:
+        """把缓冲区中的快照在一个事务中写入数据库，返回写入的快照数"""
+        with self._flush_lock:
+            with self._lock:
+                items = list(self._pending)
+                self._pending.clear()
+            if not items:
+                return 0
+
+            conn = self._connect()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = []
+                for item in items:
+                    position = item['position'] or {}
+                    cursor = conn.execute(
+                        'INSERT INTO snapshots (timestamp, coord_mode, x, y, lat, lon, confidence, anomaly_count) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (item['timestamp'], item['coord_mode'], position.get('x'), position.get('y'),
+                         position.get('lat'), position.get('lon'), item['confidence'], int(item['anomaly'].sum())))
+                    snapshot_id = cursor.lastrowid
+                    rows.extend(
+                        (snapshot_id, item['timestamp'], None if np.isnan(station) else int(station),
+                         float(power), int(anomaly))
+                        for station, power, anomaly in zip(item['station_id'], item['power'], item['anomaly']))
+                conn.executemany(
+                    'INSERT INTO measurements (snapshot_id, timestamp, station_id, power, is_anomaly) '
+                    'VALUES (?, ?, ?, ?, ?)', rows)
+            except BaseException:
+                conn.execute('ROLLBACK')
+                with self._lock:
+                    # 写入失败的快照放回缓冲区头部，下次重试
+                    self._pending.extendleft(reversed(items))
+                raise
+            conn.execute('COMMIT')
+            with self._lock:
+                self.written += len(items)
+            return len(items)
+
+    def stop(self) -> None:
+        """停止写线程并写入剩余快照"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._writer is not None:
+            self._writer.join(timeout=5.0)
+        self.flush()
+
+    def status(self) -> Dict:
+        """缓冲深度与写入计数"""
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'recorded': self.recorded,
+                'written': self.written,
+                'dropped': self.dropped
+            }
+
+    @staticmethod
+    def _time_clause(start: Optional[float], end: Optional[float], column: str = 'timestamp'):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append(f'{column} >= ?')
+            params.append(float(start))
+        if end is not None:
+            clauses.append(f'{column} < ?')
+            params.append(float(end))
+        return clauses, params
+
+    def query_measurements(self, start: Optional[float] = None, end: Optional[float] = None,
+                           station_ids: Optional[Sequence[int]] = None) -> Dict[str, np.ndarray]:
+        """
+        按时间范围（及电台）查询已写入的测量值
+
+        Returns:
+            列式结果 {'snapshot_id', 'timestamp', 'station_id', 'power', 'is_anomaly'}，按时间排序；
+            无 station_id 的测量其 station_id 为 -1
+        """
+        clauses, params = self._time_clause(start, end)
+        if station_ids is not None:
+            station_ids = [int(s) for s in station_ids]
+            clauses.append(f"station_id IN ({', '.join('?' * len(station_ids))})")
+            params.extend(station_ids)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connect().execute(
+            'SELECT snapshot_id, timestamp, IFNULL(station_id, -1), power, is_anomaly FROM measurements'
+            f'{where} ORDER BY timestamp, snapshot_id', params).fetchall()
+        columns = np.array(rows, dtype=float).reshape(-1, 5)
+        return {
+            'snapshot_id': columns[:, 0].astype(int),
+            'timestamp': columns[:, 1],
+            'station_id': columns[:, 2].astype(int),
+            'power': columns[:, 3],
+            'is_anomaly': columns[:, 4].astype(bool)
+        }
+
+    def query_locations(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        按时间范围查询定位结果
+
+        Returns:
+            列式结果 {'snapshot_id', 'timestamp', 'x', 'y', 'lat', 'lon', 'confidence', 'anomaly_count'}；
+            定位失败的快照坐标为 NaN
+        """
+        clauses, params = self._time_clause(start, end)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        rows = self._connect().execute(
+            'SELECT id, timestamp, x, y, lat, lon, confidence, anomaly_count FROM snapshots'
+            f'{where} ORDER BY timestamp, id', params).fetchall()
+        columns = np.array(rows, dtype=float).reshape(-1, 8)
+        return {
+            'snapshot_id': columns[:, 0].astype(int),
+            'timestamp': columns[:, 1],
+            'x': columns[:, 2],
+            'y': columns[:, 3],
+            'lat': columns[:, 4],
+            'lon': columns[:, 5],
+            'confidence': columns[:, 6],
+            'anomaly_count': columns[:, 7].astype(int)
+        }
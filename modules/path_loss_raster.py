@@ -0,0 +1,145 @@
+import json
+import os
+import numpy as np
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class RasterSelection:
+    """一组电台的路径损耗栅格（与功率列一一对应），提供向量化双线性插值"""
+
+    def __init__(self, rasters: List[np.ndarray], x_min: float, y_min: float, resolution_km: float):
+        self.rasters = rasters
+        self.x_min = x_min
+        self.y_min = y_min
+        self.resolution_km = resolution_km
+        self.shape = rasters[0].shape if rasters else (0, 0)
+
+    def __len__(self) -> int:
+        return len(self.rasters)
+
+    def subset(self, indices: Sequence[int]) -> 'RasterSelection':
+        """按索引选取部分电台"""
+        return RasterSelection([self.rasters[i] for i in indices], self.x_min, self.y_min, self.resolution_km)
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """(K × 2) 点是否落在栅格范围内"""
+        points = np.atleast_2d(points)
+        n_rows, n_cols = self.shape
+        x_max = self.x_min + (n_cols - 1) * self.resolution_km
+        y_max = self.y_min + (n_rows - 1) * self.resolution_km
+        return ((points[:, 0] >= self.x_min) & (points[:, 0] <= x_max)
+                & (points[:, 1] >= self.y_min) & (points[:, 1] <= y_max))
+
+    def clip(self, points: np.ndarray) -> np.ndarray:
+        """将 (K × 2) 点夹到栅格范围内"""
+        n_rows, n_cols = self.shape
+        return np.column_stack([
+            np.clip(points[:, 0], self.x_min, self.x_min + (n_cols - 1) * self.resolution_km),
+            np.clip(points[:, 1], self.y_min, self.y_min + (n_rows - 1) * self.resolution_km)
+        ])
+
+    def loss_and_gradient(self, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        在 (K × 2) 本地坐标点上双线性插值各电台的路径损耗
+
+        Returns:
+            (loss (K × M) dB, gradient (K × M × 2) dB/km, inside (K,) 点是否落在栅格范围内)；
+            范围外的点损耗与梯度为 0，由调用方退回对数距离模型
+        """
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        n_rows, n_cols = self.shape
+        gx = (points[:, 0] - self.x_min) / self.resolution_km
+        gy = (points[:, 1] - self.y_min) / self.resolution_km
+        inside = (gx >= 0) & (gy >= 0) & (gx <= n_cols - 1) & (gy <= n_rows - 1)
+
+        # 左下角单元索引（夹到最后一个完整单元，使右/上边界也可插值）
+        col = np.clip(np.floor(gx), 0, max(n_cols - 2, 0)).astype(int)
+        row = np.clip(np.floor(gy), 0, max(n_rows - 2, 0)).astype(int)
+        tx = np.where(inside, gx - col, 0.0)[:, None]
+        ty = np.where(inside, gy - row, 0.0)[:, None]
+        col, row = col[inside], row[inside]
+
+        loss = np.zeros((len(points), len(self.rasters)))
+        gradient = np.zeros((len(points), len(self.rasters), 2))
+        if not inside.any():
+            return loss, gradient, inside
+
+        # 每个电台只读取被访问到的 4 个角点，内存映射文件不会被整体载入
+        corners = np.empty((4, int(inside.sum()), len(self.rasters)))
+        for m, raster in enumerate(self.rasters):
+            corners[0, :, m] = raster[row, col]
+            corners[1, :, m] = raster[row, col + 1]
+            corners[2, :, m] = raster[row + 1, col]
+            corners[3, :, m] = raster[row + 1, col + 1]
+        v00, v10, v01, v11 = corners
+        tx, ty = tx[inside], ty[inside]
+
+        loss[inside] = (v00 * (1 - tx) * (1 - ty) + v10 * tx * (1 - ty)
+                        + v01 * (1 - tx) * ty + v11 * tx * ty)
+        gradient[inside, :, 0] = ((v10 - v00) * (1 - ty) + (v11 - v01) * ty) / self.resolution_km
+        gradient[inside, :, 1] = ((v01 - v00) * (1 - tx) + (v11 - v10) * tx) / self.resolution_km
+        return loss, gradient, inside
+
+
+class PathLossRasters:
+    """电台路径损耗栅格库 - 目录下每个电台一个 .npy 文件，按需以内存映射方式打开
+
+    目录结构:
+        grid.json          {"x_min": .., "y_min": .., "resolution_km": ..}，所有栅格共享的网格
+        station_<id>.npy   (rows × cols) float 数组，单位 dB，为相对参考功率的路径损耗，
+                           行对应 y、列对应 x（本地坐标，公里）
+
+    np.load(mmap_mode='r') 只解析 .npy 头部，冷启动无需读取栅格数据；
+    插值时只有被访问到的页会被载入内存。
+    """
+
+    GRID_FILE = 'grid.json'
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: 栅格目录
+        """
+        self.directory = directory
+        with open(os.path.join(directory, self.GRID_FILE), 'r', encoding='utf-8') as f:
+            grid = json.load(f)
+        self.x_min = float(grid['x_min'])
+        self.y_min = float(grid['y_min'])
+        self.resolution_km = float(grid['resolution_km'])
+        self._rasters: Dict[int, Optional[np.ndarray]] = {}
+
+    @staticmethod
+    def station_file(directory: str, station_id: int) -> str:
+        """电台栅格文件路径"""
+        return os.path.join(directory, f'station_{int(station_id)}.npy')
+
+    def raster(self, station_id: int) -> Optional[np.ndarray]:
+        """打开（并缓存）单个电台的内存映射栅格；没有栅格文件时返回 None"""
+        station_id = int(station_id)
+        if station_id not in self._rasters:
+            path = self.station_file(self.directory, station_id)
+            self._rasters[station_id] = np.load(path, mmap_mode='r') if os.path.exists(path) else None
+        return self._rasters[station_id]
+
+    def select(self, station_ids: Sequence[int]) -> Optional[RasterSelection]:
+        """选取一组电台的栅格；任一电台缺少栅格时返回 None（调用方使用对数距离模型）"""
+        try:
+            rasters = [self.raster(station_id) for station_id in station_ids]
+        except (TypeError, ValueError):
+            return None
+        if not rasters or any(r is None for r in rasters) or len({r.shape for r in rasters}) != 1:
+            return None
+        return RasterSelection(rasters, self.x_min, self.y_min, self.resolution_km)
+
+    @classmethod
+    def create(cls, directory: str, x_min: float, y_min: float, resolution_km: float) -> 'PathLossRasters':
+        """创建栅格目录并写入网格描述"""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, cls.GRID_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'x_min': x_min, 'y_min': y_min, 'resolution_km': resolution_km}, f)
+        return cls(directory)
+
+    def write(self, station_id: int, loss: np.ndarray) -> None:
+        """写入单个电台的栅格（预计算工具使用）"""
+        np.save(self.station_file(self.directory, station_id), np.asarray(loss, dtype=np.float32))
+        self._rasters.pop(int(station_id), None)
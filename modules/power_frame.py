@@ -0,0 +1,103 @@
+import numpy as np
+from typing import List, Dict, Optional, Sequence, Union
+
+
+class PowerFrame:
+    """功率数据帧 - 一个快照内所有电台数据的列式（结构数组）表示
+
+    模拟器、异常检测器和定位算法之间直接传递 PowerFrame，
+    只在 Flask 边界处与 JSON 的 List[Dict] 相互转换，避免热路径上重复的 dict→array 拷贝。
+    缺失的坐标列以 NaN 填充，缺失的 station_id 为 None。
+    """
+
+    __slots__ = ('station_id', 'station_name', 'x', 'y', 'lat', 'lon', 'power', 'anomaly')
+
+    def __init__(self, station_id: np.ndarray, power: np.ndarray,
+                 x: Optional[np.ndarray] = None, y: Optional[np.ndarray] = None,
+                 lat: Optional[np.ndarray] = None, lon: Optional[np.ndarray] = None,
+                 station_name: Optional[List[str]] = None, anomaly: Optional[np.ndarray] = None):
+        n = len(power)
+        missing = np.full(n, np.nan)
+        self.station_id = np.asarray(station_id)
+        self.power = np.asarray(power, dtype=float)
+        self.x = missing if x is None else np.asarray(x, dtype=float)
+        self.y = missing if y is None else np.asarray(y, dtype=float)
+        self.lat = missing if lat is None else np.asarray(lat, dtype=float)
+        self.lon = missing if lon is None else np.asarray(lon, dtype=float)
+        self.station_name = station_name if station_name is not None else [None] * n
+        self.anomaly = np.zeros(n, dtype=bool) if anomaly is None else np.asarray(anomaly, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.power)
+
+    @classmethod
+    def from_records(cls, records: List[Dict]) -> 'PowerFrame':
+        """由 JSON 记录列表（station_id/station_name/x/y/lat/lon/power/is_anomaly）构建"""
+        def column(key):
+            values = [d.get(key) for d in records]
+            return np.array([np.nan if v is None else v for v in values], dtype=float)
+
+        station_ids = [d.get('station_id') for d in records]
+        station_id = np.array(station_ids, dtype=object if None in station_ids else None)
+        return cls(
+            station_id=station_id,
+            power=np.array([d['power'] for d in records], dtype=float),
+            x=column('x'),
+            y=column('y'),
+            lat=column('lat'),
+            lon=column('lon'),
+            station_name=[d.get('station_name') for d in records],
+            anomaly=np.array([bool(d.get('is_anomaly', False)) for d in records], dtype=bool)
+        )
+
+    @classmethod
+    def coerce(cls, power_data: Union['PowerFrame', List[Dict]]) -> 'PowerFrame':
+        """接受 PowerFrame 或记录列表，统一返回 PowerFrame"""
+        return power_data if isinstance(power_data, cls) else cls.from_records(power_data)
+
+    def to_records(self) -> List[Dict]:
+        """转换为 JSON 记录列表（仅在 Flask 边界使用）"""
+        records = []
+        has_geo = not np.isnan(self.lat).all()
+        for i in range(len(self)):
+            station_id = self.station_id[i]
+            record = {
+                'station_id': station_id.item() if hasattr(station_id, 'item') else station_id,
+                'station_name': self.station_name[i],
+                'x': float(self.x[i]),
+                'y': float(self.y[i]),
+                'power': round(float(self.power[i]), 2),
+                'is_anomaly': bool(self.anomaly[i])
+            }
+            if has_geo:
+                record['lat'] = float(self.lat[i])
+                record['lon'] = float(self.lon[i])
+            records.append(record)
+        return records
+
+    def subset(self, indices: Sequence[int]) -> 'PowerFrame':
+        """按索引选取部分电台"""
+        indices = np.asarray(indices, dtype=int)
+        return PowerFrame(self.station_id[indices], self.power[indices], self.x[indices], self.y[indices],
+                          self.lat[indices], self.lon[indices], [self.station_name[i] for i in indices],
+                          self.anomaly[indices])
+
+    @property
+    def has_station_ids(self) -> bool:
+        """是否所有电台都带有 station_id"""
+        return not any(station_id is None for station_id in self.station_id)
+
+    @property
+    def positions(self) -> np.ndarray:
+        """本地坐标 (M × 2)"""
+        return np.column_stack([self.x, self.y])
+
+    @property
+    def has_positions(self) -> bool:
+        """是否所有电台都有本地坐标"""
+        return len(self) > 0 and not (np.isnan(self.x).any() or np.isnan(self.y).any())
+
+    @property
+    def has_geo(self) -> bool:
+        """是否所有电台都有经纬度"""
+        return len(self) > 0 and not (np.isnan(self.lat).any() or np.isnan(self.lon).any())
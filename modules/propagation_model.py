@@ -0,0 +1,13 @@
+from typing import NamedTuple
+
+
+class PropagationModel(NamedTuple):
+    """对数距离传播模型参数（不可变）
+
+    请求按需构建自己的模型对象并逐次传给模拟器 / 定位算法，
+    共享组件只持有默认模型，并发请求之间不会互相覆盖参数。
+    """
+
+    path_loss_exponent: float = 2.0   # 路径损耗指数
+    reference_power: float = 100.0    # 参考功率 (dBm)
+    reference_distance: float = 1.0   # 参考距离 (km)
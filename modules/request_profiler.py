@@ -0,0 +1,143 @@
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 保存的文件名：<时间戳微秒>_<端点>_<随机串>.prof（下载时严格校验，防止路径穿越）
+_PROFILE_NAME = re.compile(r'^\d+_[A-Za-z0-9_.]+_[0-9a-f]{8}\.prof$')
+
+
+class RequestProfiler:
+    """按需请求剖析 - 对单个请求运行 cProfile 并把结果和请求体保存到本地目录
+
+    只有带 X-Profile 请求头或 profile 查询参数的请求才会被剖析；其余请求只多一次属性判断。
+    同一时刻只剖析一个请求（cProfile 在 3.12+ 的进程内只允许一个活动实例），并发的剖析请求正常处理但不采样。
+    目录中最多保留 max_profiles 个剖析结果，超出时删除最旧的。
+    """
+
+    def __init__(self, directory: str, max_profiles: int = 50, token: Optional[str] = None):
+        """
+        Args:
+            directory: 剖析结果目录
+            max_profiles: 最多保留的剖析文件数
+            token: 设置时请求头 / 查询参数的值必须等于该口令才会剖析
+        """
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.token = token
+        self._busy = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _supplied(headers, args) -> Optional[str]:
+        return headers.get('X-Profile') or args.get('profile')
+
+    def _token_matches(self, value: str) -> bool:
+        return hmac.compare_digest(value.encode('utf-8'), self.token.encode('utf-8'))
+
+    def wanted(self, headers, args) -> bool:
+        """请求是否要求剖析"""
+        value = self._supplied(headers, args)
+        if not value:
+            return False
+        if self.token is not None:
+            return self._token_matches(value)
+        return value.lower() not in ('0', 'false', 'no')
+
+    def authorized(self, headers, args) -> bool:
+        """是否允许列出 / 下载已保存的剖析：配置了口令时须用同样的 X-Profile 头或 profile 参数提供口令"""
+        if self.token is None:
+            return True
+        value = self._supplied(headers, args)
+        return bool(value) and self._token_matches(value)
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """开始剖析；已有请求在剖析时返回 None"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 进程内已有其它剖析器在运行
+            self._busy.release()
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, endpoint: str, duration_s: float,
+               payload: Optional[bytes] = None, status: Optional[int] = None) -> str:
+        """停止剖析并保存，返回剖析文件名"""
+        try:
+            profile.disable()
+        finally:
+            self._busy.release()
+
+        safe_endpoint = re.sub(r'[^A-Za-z0-9_.]', '_', endpoint or 'unknown')
+        name = f'{time.time_ns() // 1000}_{safe_endpoint}_{uuid.uuid4().hex[:8]}.prof'
+        path = os.path.join(self.directory, name)
+        profile.dump_stats(path)
+        meta = {'endpoint': endpoint, 'duration_ms': duration_s * 1000, 'status': status,
+                'created': time.time()}
+        with open(path[:-len('.prof')] + '.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        if payload:
+            with open(path[:-len('.prof')] + '.body', 'wb') as f:
+                f.write(payload)
+        self._prune()
+        logger.info("Saved request profile %s (%.1f ms)", name, duration_s * 1000)
+        return name
+
+    def _prune(self) -> None:
+        """删除超出保留数量的最旧剖析文件及其附属文件"""
+        names = sorted(n for n in os.listdir(self.directory) if _PROFILE_NAME.match(n))
+        for name in names[:max(len(names) - self.max_profiles, 0)]:
+            stem = os.path.join(self.directory, name[:-len('.prof')])
+            for suffix in ('.prof', '.json', '.body'):
+                try:
+                    os.remove(stem + suffix)
+                except FileNotFoundError:
+                    pass
+
+    def list_profiles(self) -> List[Dict]:
+        """已保存的剖析（新的在前）"""
+        profiles = []
+        for name in sorted((n for n in os.listdir(self.directory) if _PROFILE_NAME.match(n)), reverse=True):
+            stem = os.path.join(self.directory, name[:-len('.prof')])
+            try:
+                with open(stem + '.json', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                meta = {}
+            meta.update({
+                'name': name,
+                'size': os.path.getsize(stem + '.prof'),
+                'has_payload': os.path.exists(stem + '.body')
+            })
+            profiles.append(meta)
+        return profiles
+
+    def path_for(self, name: str, payload: bool = False) -> Optional[str]:
+        """剖析文件（或对应请求体）的路径；名称非法或不存在时返回 None"""
+        if not _PROFILE_NAME.match(name):
+            return None
+        path = os.path.join(self.directory, name[:-len('.prof')] + '.body' if payload else name)
+        return path if os.path.exists(path) else None
+
+    def summary(self, name: str, limit: int = 30, sort: str = 'cumulative') -> Optional[str]:
+        """pstats 文本摘要（按 sort 排序的前 limit 个函数）"""
+        path = self.path_for(name)
+        if path is None:
+            return None
+        stream = io.StringIO()
+        pstats.Stats(path, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
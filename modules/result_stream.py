@@ -0,0 +1,176 @@
+import json
+import logging
+import queue
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def compact_result(result: Dict) -> Dict:
+    """将 ScenarioStream.locate() 的结果压缩为推送用的精简字典"""
+    location = result['location']
+    compact = {
+        'sequence': result['sequence'],
+        'timestamp': result['timestamp'],
+        'truth': result.get('truth'),
+        'anomaly_indices': result['anomaly_indices'],
+        'error_km': result.get('error_km'),
+        'latency_ms': round(result['latency_ms'], 3)
+    }
+    if 'error' in location:
+        compact['error'] = location['error']
+    else:
+        compact['position'] = location['position']
+        compact['confidence'] = location.get('confidence')
+    return compact
+
+
+class ResultBroadcaster:
+    """定位结果推送器 - 服务端持续计算，一次编码后扇出给所有 SSE 订阅者
+
+    后台线程在第一个订阅者到来时启动、最后一个订阅者离开后停止；
+    每个订阅者有独立的有界队列，慢客户端只会丢弃自己最旧的消息，不会阻塞计算线程。
+    结果源抛出异常时推送 error 事件并按指数退避重建结果源；结果源正常结束时关闭所有订阅，
+    客户端按 retry 间隔重连后会启动新的结果源。
+    """
+
+    def __init__(self, source_factory: Optional[Callable[[], Iterator[Dict]]] = None,
+                 queue_size: int = 32, keepalive_s: float = 15.0,
+                 restart_backoff_s: float = 1.0, max_backoff_s: float = 30.0):
+        """
+        Args:
+            source_factory: 返回结果迭代器的工厂（每次启动或重启结果源时调用一次），None 时只转发 publish()
+            queue_size: 每个订阅者的队列长度
+            keepalive_s: 无消息时发送 SSE 注释行的间隔 (s)
+            restart_backoff_s: 结果源出错后首次重启前的等待 (s)，之后逐次加倍
+            max_backoff_s: 重启等待上限 (s)
+        """
+        self.source_factory = source_factory
+        self.queue_size = queue_size
+        self.keepalive_s = keepalive_s
+        self.restart_backoff_s = restart_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._next_id = 0
+        self.restarts = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> queue.Queue:
+        """注册订阅者，必要时启动后台计算线程"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            # 后台线程只在持锁时清除 _worker 后退出，这里看到非 None 就一定还会继续产出
+            if self.source_factory is not None and self._worker is None:
+                self._wakeup.clear()
+                self._worker = threading.Thread(target=self._run, name='result-broadcaster', daemon=True)
+                self._worker.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue) -> None:
+        """注销订阅者；没有订阅者时唤醒后台线程使其退出"""
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+            if not self._subscribers:
+                self._wakeup.set()
+
+    @staticmethod
+    def _offer(subscriber: queue.Queue, message: Optional[str]) -> None:
+        """放入订阅者队列（队列满时丢弃该订阅者最旧的消息）"""
+        while True:
+            try:
+                subscriber.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    subscriber.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def publish(self, data: Dict, event: str = 'location') -> None:
+        """编码一次 SSE 消息并放入每个订阅者队列"""
+        with self._lock:
+            message_id = self._next_id
+            self._next_id += 1
+            subscribers = list(self._subscribers)
+        message = f'id: {message_id}\nevent: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+        for subscriber in subscribers:
+            self._offer(subscriber, message)
+
+    def _exit_if_idle(self) -> bool:
+        """没有订阅者时注销后台线程并返回 True（与 subscribe 在同一把锁下判断，不会漏掉新订阅者）"""
+        with self._lock:
+            if self._subscribers:
+                return False
+            self._worker = None
+            return True
+
+    def _close_subscribers(self) -> None:
+        """结果源正常结束：通知所有订阅者断开，并注销后台线程"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+            self._worker = None
+        for subscriber in subscribers:
+            self._offer(subscriber, None)
+
+    def _run(self) -> None:
+        """后台线程：消费结果源并推送，直到没有订阅者；结果源出错时退避后重建"""
+        backoff = self.restart_backoff_s
+        while True:
+            try:
+                for result in self.source_factory():
+                    if self._exit_if_idle():
+                        return
+                    self.publish(compact_result(result))
+                    backoff = self.restart_backoff_s
+            except Exception:
+                logger.exception("Result stream source failed, restarting in %.1f s", backoff)
+                self.publish({'error': '结果流计算失败，正在重启'}, event='error')
+            else:
+                self._close_subscribers()
+                return
+
+            self._wakeup.wait(backoff)
+            if self._exit_if_idle():
+                return
+            self._wakeup.clear()
+            backoff = min(backoff * 2, self.max_backoff_s)
+            self.restarts += 1
+
+    def events(self, subscriber: queue.Queue) -> Iterator[str]:
+        """逐条产出订阅者的 SSE 消息；空闲时产出注释行保持连接，生成器关闭时自动注销"""
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    message = subscriber.get(timeout=self.keepalive_s)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if message is None:
+                    # 结果源已结束：结束响应，客户端重连时会启动新的结果源
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stop(self) -> None:
+        """停止后台线程并断开所有订阅者"""
+        with self._lock:
+            worker = self._worker
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+            self._wakeup.set()
+        for subscriber in subscribers:
+            self._offer(subscriber, None)
+        if worker is not None:
+            worker.join(timeout=5.0)
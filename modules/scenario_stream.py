@@ -0,0 +1,281 @@
+import time
+import numpy as np
+from typing import Callable, Dict, Iterator, Optional, Sequence, Tuple
+from .data_simulator import DataSimulator
+from .station_layout import StationLayout
+from .power_frame import PowerFrame
+
+
+class LinearTrajectory:
+    """匀速直线轨迹：起点 + 速度 (km/s)"""
+
+    def __init__(self, start: Tuple[float, float], velocity: Tuple[float, float]):
+        self.start = np.asarray(start, dtype=float)
+        self.velocity = np.asarray(velocity, dtype=float)
+
+    def positions(self, times: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """给定相对时间 (s) 的位置 (N × 2)"""
+        return self.start + times[:, None] * self.velocity
+
+
+class WaypointTrajectory:
+    """航点轨迹：以恒定速率依次经过各航点，loop 为真时回到起点循环"""
+
+    def __init__(self, waypoints: Sequence[Tuple[float, float]], speed: float, loop: bool = True):
+        points = np.asarray(waypoints, dtype=float).reshape(-1, 2)
+        if loop and len(points) > 1:
+            points = np.vstack([points, points[:1]])
+        self.waypoints = points
+        self.speed = speed
+        self.loop = loop
+        segment_lengths = np.hypot(*np.diff(points, axis=0).T)
+        self._cumulative = np.concatenate([[0.0], np.cumsum(segment_lengths)])
+
+    def positions(self, times: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """给定相对时间 (s) 的位置 (N × 2)：按累计路程在航点间线性插值"""
+        total = self._cumulative[-1]
+        if total == 0:
+            return np.repeat(self.waypoints[:1], len(times), axis=0)
+        travelled = times * self.speed
+        travelled = np.mod(travelled, total) if self.loop else np.minimum(travelled, total)
+        return np.column_stack([np.interp(travelled, self._cumulative, self.waypoints[:, 0]),
+                                np.interp(travelled, self._cumulative, self.waypoints[:, 1])])
+
+
+class RandomWalkTrajectory:
+    """随机游走轨迹：每秒位移服从 N(0, step_std²)，可选限制在 ±bound 范围内"""
+
+    def __init__(self, start: Tuple[float, float], step_std: float, bound: Optional[float] = None):
+        self.position = np.asarray(start, dtype=float)
+        self.step_std = step_std
+        self.bound = bound
+        self._last_time = 0.0
+
+    def positions(self, times: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """从上次位置继续游走到给定时间（时间需递增）"""
+        dt = np.diff(np.concatenate([[self._last_time], times]))
+        steps = rng.normal(0, 1, (len(times), 2)) * (self.step_std * np.sqrt(np.maximum(dt, 0)))[:, None]
+        path = self.position + np.cumsum(steps, axis=0)
+        if self.bound is not None:
+            path = np.clip(path, -self.bound, self.bound)
+        if len(times):
+            self.position = path[-1]
+            self._last_time = float(times[-1])
+        return path
+
+
+class ScenarioStream:
+    """流式场景生成器 - 按固定速率惰性产生带时间戳的扫描快照
+
+    干扰源沿轨迹移动；每个电台独立地按马尔可夫过程进入/退出异常突发和掉线状态。
+    快照按块调用 DataSimulator.generate_power_batch 批量生成，但逐个产出，
+    内存占用只与块大小有关，与场景长度无关。
+    """
+
+    def __init__(self, simulator: DataSimulator, trajectory, rate_hz: float = 1.0,
+                 burst_probability: float = 0.0, burst_length: int = 5,
+                 dropout_probability: float = 0.0, rejoin_probability: float = 0.2,
+                 seed: Optional[int] = None, chunk_size: int = 256,
+                 layout_provider: Optional[Callable[[], StationLayout]] = None):
+        """
+        Args:
+            simulator: 提供电台布局和传播模型的数据模拟器
+            trajectory: 干扰源轨迹（LinearTrajectory / WaypointTrajectory / RandomWalkTrajectory）
+            rate_hz: 扫描速率（每秒快照数）
+            burst_probability: 每个快照中正常电台进入异常突发的概率
+            burst_length: 异常突发持续的快照数
+            dropout_probability: 每个快照中在线电台掉线的概率
+            rejoin_probability: 每个快照中掉线电台恢复的概率
+            seed: 随机种子
+            chunk_size: 每次批量生成的快照数
+            layout_provider: 每块调用一次、返回当前电台布局的函数（默认读取 simulator.layout；
+                             多进程部署时可先同步共享存储再返回）
+        """
+        self.simulator = simulator
+        self.trajectory = trajectory
+        self.rate_hz = rate_hz
+        self.burst_probability = burst_probability
+        self.burst_length = burst_length
+        self.dropout_probability = dropout_probability
+        self.rejoin_probability = rejoin_probability
+        self.chunk_size = chunk_size
+        self.layout_provider = layout_provider if layout_provider is not None else lambda: simulator.layout
+        self.min_active_stations = 3   # 掉线后至少保留的在线电台数
+        self.rng = np.random.default_rng(seed)
+
+    def _step_station_states(self, burst_remaining: np.ndarray, burst_offset: np.ndarray,
+                             online: np.ndarray) -> None:
+        """推进每个电台的突发/掉线状态（原地更新）"""
+        n_stations = len(online)
+        burst_remaining[burst_remaining > 0] -= 1
+        start_burst = (burst_remaining == 0) & (self.rng.random(n_stations) < self.burst_probability)
+        if start_burst.any():
+            # 突发期间偏移恒定：功率过高或过低
+            magnitude = self.rng.uniform(15, 30, n_stations)
+            sign = np.where(self.rng.random(n_stations) < 0.5, 1.0, -1.0)
+            burst_offset[start_burst] = (sign * magnitude)[start_burst]
+            burst_remaining[start_burst] = self.burst_length
+
+        drop = online & (self.rng.random(n_stations) < self.dropout_probability)
+        rejoin = ~online & (self.rng.random(n_stations) < self.rejoin_probability)
+        online[drop] = False
+        online[rejoin] = True
+        if online.sum() < self.min_active_stations:
+            # 掉线过多时按编号恢复电台，保证快照仍可定位
+            for i in np.flatnonzero(~online)[:self.min_active_stations - int(online.sum())]:
+                online[i] = True
+
+    @staticmethod
+    def _remap_station_states(old_layout, new_layout, burst_remaining: np.ndarray, burst_offset: np.ndarray,
+                              online: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """布局变化时按电台ID迁移突发/掉线状态；新电台为正常在线，已删除电台的状态丢弃"""
+        n_stations = len(new_layout)
+        remaining = np.zeros(n_stations, dtype=int)
+        offset = np.zeros(n_stations)
+        is_online = np.ones(n_stations, dtype=bool)
+        if old_layout is not None:
+            for i, station_id in enumerate(new_layout.station_ids.tolist()):
+                j = old_layout.index.get(station_id)
+                if j is not None:
+                    remaining[i], offset[i], is_online[i] = burst_remaining[j], burst_offset[j], online[j]
+        return remaining, offset, is_online
+
+    def sweeps(self, n_sweeps: Optional[int] = None, duration: Optional[float] = None,
+               start_time: Optional[float] = None, realtime: bool = False) -> Iterator[Dict]:
+        """
+        惰性产生扫描快照
+
+        Args:
+            n_sweeps: 快照数上限（None 且 duration 为 None 时无限产生）
+            duration: 场景时长 (s)
+            start_time: 第一个快照的时间戳，默认当前时间
+            realtime: 为真时按 rate_hz 节流（按墙钟时间），否则尽快产生
+
+        Yields:
+            {'sequence', 'layout', 'timestamp', 'emitter_position', 'power_frame', 'online_station_ids',
+             'burst_station_ids'}（layout 为生成该快照所用的电台布局）
+        """
+        if duration is not None:
+            limit = int(duration * self.rate_hz)
+            n_sweeps = limit if n_sweeps is None else min(n_sweeps, limit)
+        start_time = time.time() if start_time is None else float(start_time)
+        clock_start = time.monotonic()
+
+        layout = None
+        burst_remaining = np.zeros(0, dtype=int)
+        burst_offset = np.zeros(0)
+        online = np.ones(0, dtype=bool)
+
+        sequence = 0
+        while n_sweeps is None or sequence < n_sweeps:
+            # 每块取一次布局快照：块内功率矩阵与帧使用同一布局，电台增删后的下一块自动适配
+            current = self.layout_provider()
+            if layout is None or current.version != layout.version:
+                burst_remaining, burst_offset, online = self._remap_station_states(
+                    layout, current, burst_remaining, burst_offset, online)
+                layout = current
+
+            chunk = self.chunk_size if n_sweeps is None else min(self.chunk_size, n_sweeps - sequence)
+            times = (sequence + np.arange(chunk)) / self.rate_hz
+            emitters = self.trajectory.positions(times, self.rng)
+            powers = self.simulator.generate_power_batch(
+                emitters, seed=int(self.rng.integers(2 ** 63)), layout=layout)['powers']
+
+            for row in range(chunk):
+                self._step_station_states(burst_remaining, burst_offset, online)
+                bursting = burst_remaining > 0
+                active = np.flatnonzero(online)
+                frame = PowerFrame(
+                    station_id=layout.station_ids[active],
+                    power=np.round(powers[row, active] + np.where(bursting, burst_offset, 0.0)[active], 2),
+                    x=layout.positions[active, 0],
+                    y=layout.positions[active, 1],
+                    station_name=[layout.names[i] for i in active],
+                    anomaly=bursting[active]
+                )
+
+                if realtime:
+                    delay = times[row] - (time.monotonic() - clock_start)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                yield {
+                    'sequence': sequence,
+                    'layout': layout,
+                    'timestamp': start_time + float(times[row]),
+                    'emitter_position': {'x': float(emitters[row, 0]), 'y': float(emitters[row, 1])},
+                    'power_frame': frame,
+                    'online_station_ids': layout.station_ids[active].tolist(),
+                    'burst_station_ids': layout.station_ids[bursting & online].tolist()
+                }
+                sequence += 1
+
+    def locate(self, anomaly_detector, location_algorithm, emitter_tracker=None,
+               **sweep_options) -> Iterator[Dict]:
+        """
+        将快照直接送入 异常检测 → 定位（→ 跟踪）流水线，逐个产出结果
+
+        Args:
+            anomaly_detector: 异常检测器
+            location_algorithm: 定位算法
+            emitter_tracker: 可选的干扰源跟踪器（提供时以航迹更新代替单次定位）
+            **sweep_options: 传给 sweeps() 的参数
+
+        Yields:
+            {'sequence', 'timestamp', 'truth', 'location', 'anomaly_indices', 'error_km', 'latency_ms'}
+        """
+        track_id = None
+        for sweep in self.sweeps(**sweep_options):
+            started = time.perf_counter()
+            frame = sweep['power_frame']
+            layout = sweep['layout']
+            anomaly_result = anomaly_detector.detect_anomalies(frame, layout)
+            if emitter_tracker is not None:
+                tracked = emitter_tracker.update(frame, anomaly_result['normal_indices'],
+                                                 track_id=track_id, timestamp=sweep['timestamp'], layout=layout)
+                location = tracked['location']
+                if 'track' in tracked:
+                    track_id = tracked['track']['track_id']
+            else:
+                location = location_algorithm.calculate_location(frame, anomaly_result['normal_indices'],
+                                                                 layout=layout)
+            latency_ms = (time.perf_counter() - started) * 1000
+
+            truth = sweep['emitter_position']
+            error_km = None
+            if 'error' not in location:
+                error_km = float(np.hypot(location['position']['x'] - truth['x'],
+                                          location['position']['y'] - truth['y']))
+            yield {
+                'sequence': sweep['sequence'],
+                'timestamp': sweep['timestamp'],
+                'truth': truth,
+                'location': location,
+                'anomaly_indices': anomaly_result['anomaly_indices'],
+                'error_km': error_km,
+                'latency_ms': latency_ms
+            }
+
+
+def summarize_stream(results: Iterator[Dict]) -> Dict:
+    """消费 locate() 的结果流，只保留汇总统计（用于长时间压测）"""
+    count = located = 0
+    error_sum = latency_sum = latency_max = 0.0
+    started = time.perf_counter()
+    for result in results:
+        count += 1
+        latency_sum += result['latency_ms']
+        latency_max = max(latency_max, result['latency_ms'])
+        if result['error_km'] is not None:
+            located += 1
+            error_sum += result['error_km']
+    elapsed = time.perf_counter() - started
+    return {
+        'sweeps': count,
+        'located': located,
+        'mean_error_km': error_sum / located if located else None,
+        'mean_latency_ms': latency_sum / count if count else None,
+        'max_latency_ms': latency_max,
+        'elapsed_s': elapsed,
+        'throughput_hz': count / elapsed if elapsed > 0 else None
+    }
@@ -0,0 +1,151 @@
+import threading
+import numpy as np
+from typing import List, Dict, Sequence
+
+
+class StationBaselines:
+    """电台在线基线 - 以固定内存的环形缓冲维护每个电台的滚动统计量
+
+    每个电台保存最近 window 个功率样本的滑动窗口均值/方差（Welford 增删更新），
+    以及定位模型残差的 EWMA。新样本按该电台自身历史在 O(1) 内打分；
+    残差 EWMA 长期偏大的电台被判为持续故障，可在综合投票前直接剔除。
+    """
+
+    def __init__(self, window: int = 256, ewma_alpha: float = 0.1, z_threshold: float = 3.0,
+                 fault_threshold: float = 10.0, min_samples: int = 10):
+        """
+        Args:
+            window: 每个电台的滑动窗口长度（样本数）
+            ewma_alpha: 残差 EWMA 平滑系数
+            z_threshold: 历史 z-score 异常阈值
+            fault_threshold: 残差绝对值 EWMA 的持续故障阈值 (dB)
+            min_samples: 开始打分/判定故障前所需的最少样本数
+        """
+        self.window = window
+        self.ewma_alpha = ewma_alpha
+        self.z_threshold = z_threshold
+        self.fault_threshold = fault_threshold
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, capacity: int = 16) -> None:
+        """清空所有电台的历史"""
+        self._index: Dict[int, int] = {}
+        self._buffer = np.zeros((capacity, self.window))
+        self._head = np.zeros(capacity, dtype=int)
+        self._count = np.zeros(capacity, dtype=int)
+        self._mean = np.zeros(capacity)
+        self._m2 = np.zeros(capacity)
+        self._residual_ewma = np.zeros(capacity)
+        self._abs_residual_ewma = np.zeros(capacity)
+        self._residual_count = np.zeros(capacity, dtype=int)
+
+    def _grow(self, capacity: int) -> None:
+        """扩容（容量翻倍），已有统计量保持不变"""
+        extra = capacity - len(self._count)
+        self._buffer = np.vstack([self._buffer, np.zeros((extra, self.window))])
+        for name in ('_head', '_count', '_mean', '_m2', '_residual_ewma', '_abs_residual_ewma', '_residual_count'):
+            current = getattr(self, name)
+            setattr(self, name, np.concatenate([current, np.zeros(extra, dtype=current.dtype)]))
+
+    def _slots_for(self, station_ids: Sequence[int], create: bool) -> np.ndarray:
+        """电台ID → 槽位；create 为 False 时未知电台返回 -1"""
+        slots = np.empty(len(station_ids), dtype=int)
+        for i, station_id in enumerate(station_ids):
+            slot = self._index.get(int(station_id), -1)
+            if slot < 0 and create:
+                slot = len(self._index)
+                if slot >= len(self._count):
+                    self._grow(max(2 * len(self._count), slot + 1))
+                self._index[int(station_id)] = slot
+            slots[i] = slot
+        return slots
+
+    def score(self, station_ids: Sequence[int], powers: np.ndarray) -> np.ndarray:
+        """按各电台自身历史计算新样本的 z-score（历史不足的电台记为 0）"""
+        powers = np.asarray(powers, dtype=float)
+        with self._lock:
+            slots = self._slots_for(station_ids, create=False)
+            known = slots >= 0
+            z_scores = np.zeros(len(powers))
+            if not known.any():
+                return z_scores
+            s = slots[known]
+            count = self._count[s]
+            std = np.sqrt(self._m2[s] / np.maximum(count, 1))
+            ready = (count >= self.min_samples) & (std > 0)
+            z = np.zeros(len(s))
+            z[ready] = (powers[known][ready] - self._mean[s][ready]) / std[ready]
+            z_scores[known] = z
+            return z_scores
+
+    def update(self, station_ids: Sequence[int], powers: np.ndarray) -> None:
+        """将新样本写入环形缓冲，并增量更新滑动窗口均值/方差"""
+        powers = np.asarray(powers, dtype=float)
+        with self._lock:
+            slots = self._slots_for(station_ids, create=True)
+            head = self._head[slots]
+            count = self._count[slots]
+            mean = self._mean[slots]
+            m2 = self._m2[slots]
+
+            # 窗口未满：Welford 增量添加
+            filling = count < self.window
+            new_count = np.where(filling, count + 1, count)
+            delta = powers - mean
+            add_mean = mean + delta / new_count
+            add_m2 = m2 + delta * (powers - add_mean)
+
+            # 窗口已满：移除最旧样本并加入新样本（滑动 Welford）
+            oldest = self._buffer[slots, head]
+            slide_mean = mean + (powers - oldest) / self.window
+            slide_m2 = m2 + (powers - oldest) * (powers - slide_mean + oldest - mean)
+
+            self._mean[slots] = np.where(filling, add_mean, slide_mean)
+            self._m2[slots] = np.maximum(np.where(filling, add_m2, slide_m2), 0.0)
+            self._count[slots] = new_count
+            self._buffer[slots, head] = powers
+            self._head[slots] = (head + 1) % self.window
+
+    def update_residuals(self, station_ids: Sequence[int], residuals: np.ndarray) -> None:
+        """用定位模型残差（实测 - 预测）更新每个电台的残差 EWMA"""
+        residuals = np.asarray(residuals, dtype=float)
+        alpha = self.ewma_alpha
+        with self._lock:
+            slots = self._slots_for(station_ids, create=True)
+            first = self._residual_count[slots] == 0
+            self._residual_ewma[slots] = np.where(
+                first, residuals, (1 - alpha) * self._residual_ewma[slots] + alpha * residuals)
+            self._abs_residual_ewma[slots] = np.where(
+                first, np.abs(residuals), (1 - alpha) * self._abs_residual_ewma[slots] + alpha * np.abs(residuals))
+            self._residual_count[slots] += 1
+
+    def faulty_mask(self, station_ids: Sequence[int]) -> np.ndarray:
+        """判定持续故障的电台（残差绝对值 EWMA 超过阈值）"""
+        with self._lock:
+            slots = self._slots_for(station_ids, create=False)
+            known = slots >= 0
+            mask = np.zeros(len(slots), dtype=bool)
+            s = slots[known]
+            mask[known] = (self._residual_count[s] >= self.min_samples) & (
+                self._abs_residual_ewma[s] > self.fault_threshold)
+            return mask
+
+    def get_summary(self) -> List[Dict]:
+        """各电台基线摘要"""
+        with self._lock:
+            summary = []
+            for station_id, slot in self._index.items():
+                count = int(self._count[slot])
+                summary.append({
+                    'station_id': station_id,
+                    'samples': count,
+                    'power_mean': float(self._mean[slot]),
+                    'power_std': float(np.sqrt(self._m2[slot] / count)) if count else 0.0,
+                    'residual_ewma': float(self._residual_ewma[slot]),
+                    'abs_residual_ewma': float(self._abs_residual_ewma[slot]),
+                    'faulty': bool(self._residual_count[slot] >= self.min_samples
+                                   and self._abs_residual_ewma[slot] > self.fault_threshold)
+                })
+            return summary
@@ -0,0 +1,107 @@
+import numpy as np
+from typing import List, Dict, Optional, Sequence
+
+
+def pairwise_distances(positions: np.ndarray) -> np.ndarray:
+    """(M × 2) 位置的两两欧几里得距离矩阵 (M × M)"""
+    delta = positions[:, None, :] - positions[None, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', delta, delta))
+
+
+class StationLayout:
+    """电台布局快照 - 缓存位置矩阵、两两距离矩阵和 ID→索引映射
+
+    布局对象只读，由 DataSimulator 在电台增删改、重置或中心坐标变化时按新版本号重建；
+    模拟器、异常检测器和定位算法共享同一对象，避免每次请求重建几何数据。
+    """
+
+    def __init__(self, stations: List[Dict], version: int):
+        """
+        Args:
+            stations: 电台信息列表（含 id/name/x/y/lat/lon）
+            version: 布局版本号
+        """
+        self._set_columns(
+            station_ids=[s['id'] for s in stations],
+            names=[s['name'] for s in stations],
+            positions=[[s['x'], s['y']] for s in stations],
+            geo=[[s.get('lat', np.nan), s.get('lon', np.nan)] for s in stations],
+            version=version
+        )
+
+    @classmethod
+    def from_columns(cls, station_ids: np.ndarray, names: List[str], positions: np.ndarray,
+                     geo: np.ndarray, version: int) -> 'StationLayout':
+        """由列数据直接构建（如 StationRegistry 的快照）"""
+        layout = cls.__new__(cls)
+        layout._set_columns(station_ids, names, positions, geo, version)
+        return layout
+
+    def _set_columns(self, station_ids, names, positions, geo, version: int) -> None:
+        """拷贝列数据并设为只读，快照不受数据源后续修改影响"""
+        self.version = version
+        self.station_ids = np.array(station_ids, dtype=int)
+        self.names = list(names)
+        self.positions = np.array(positions, dtype=float).reshape(-1, 2)
+        self.geo = np.array(geo, dtype=float).reshape(-1, 2)
+        for column in (self.station_ids, self.positions, self.geo):
+            column.setflags(write=False)
+        self.index = {int(station_id): i for i, station_id in enumerate(self.station_ids)}
+        self._distance_matrix = None
+        self._stations = None
+
+    def __len__(self) -> int:
+        return len(self.station_ids)
+
+    @property
+    def distance_matrix(self) -> np.ndarray:
+        """电台两两之间的欧几里得距离矩阵 (M × M，公里)，首次访问时计算"""
+        if self._distance_matrix is None:
+            self._distance_matrix = pairwise_distances(self.positions)
+        return self._distance_matrix
+
+    def indices_for(self, station_ids: Sequence[int]) -> Optional[np.ndarray]:
+        """将电台ID序列映射为布局索引；任一ID不在布局中时返回 None"""
+        try:
+            return np.array([self.index[int(station_id)] for station_id in station_ids], dtype=int)
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def indices_matching(self, frame, use_geo_coordinates: bool = False,
+                         atol: float = 1e-6) -> Optional[np.ndarray]:
+        """
+        帧中电台在布局中的索引，仅当帧内坐标与布局缓存一致时返回
+
+        调用方据此决定能否用缓存位置代替上报坐标：上报坐标（地理模式比较经纬度，否则比较 x/y）
+        与布局不一致时返回 None，调用方应使用上报坐标；缺失（NaN）的坐标视为一致。
+        """
+        if len(frame) == 0 or not frame.has_station_ids:
+            return None
+        indices = self.indices_for(frame.station_id)
+        if indices is None:
+            return None
+        if use_geo_coordinates and frame.has_geo:
+            posted, cached = np.column_stack([frame.lat, frame.lon]), self.geo[indices]
+        else:
+            posted, cached = frame.positions, self.positions[indices]
+        if not np.all(np.isnan(posted) | np.isclose(posted, cached, rtol=0.0, atol=atol)):
+            return None
+        return indices
+
+    @property
+    def stations(self) -> List[Dict]:
+        """电台信息列表（首次访问时生成并缓存，调用方只读）"""
+        if self._stations is None:
+            self._stations = self.to_stations()
+        return self._stations
+
+    def to_stations(self) -> List[Dict]:
+        """转换回电台信息列表"""
+        return [{
+            'id': int(station_id),
+            'name': name,
+            'x': float(x),
+            'y': float(y),
+            'lat': float(lat),
+            'lon': float(lon)
+        } for station_id, name, (x, y), (lat, lon) in zip(self.station_ids, self.names, self.positions, self.geo)]
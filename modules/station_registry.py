@@ -0,0 +1,234 @@
+import threading
+from contextlib import contextmanager
+import numpy as np
+from typing import List, Dict, Optional, Sequence
+from .station_layout import StationLayout
+
+
+class StationRegistry:
+    """电台注册表 - 以连续 NumPy 列存储电台，ID→槽位索引提供 O(1) 增删改查
+
+    删除只标记槽位失效（墓碑），失效槽位过多时整体压缩，保持电台的插入顺序。
+    读取方通过 snapshot() 获得只读的 StationLayout 快照，快照按版本号缓存，
+    注册表未变化时重复读取不做任何拷贝。
+    """
+
+    def __init__(self, capacity: int = 16):
+        self._lock = threading.RLock()
+        self.version = 0
+        self._snapshot: Optional[StationLayout] = None
+        self._allocate(capacity)
+        self._next_id = 1
+
+    def _allocate(self, capacity: int) -> None:
+        """分配空列（清空注册表）"""
+        self._ids = np.zeros(capacity, dtype=int)
+        self._names: List[Optional[str]] = [None] * capacity
+        self._x = np.zeros(capacity)
+        self._y = np.zeros(capacity)
+        self._lat = np.full(capacity, np.nan)
+        self._lon = np.full(capacity, np.nan)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._index: Dict[int, int] = {}
+        self._size = 0      # 已使用的槽位数（含失效槽位）
+
+    def _reserve(self, extra: int) -> None:
+        """保证还有 extra 个空槽位：失效槽位过半时先压缩，否则容量翻倍"""
+        if self._size + extra <= len(self._ids):
+            return
+        if len(self._index) <= self._size // 2:
+            self._compact()
+            if self._size + extra <= len(self._ids):
+                return
+        capacity = max(2 * len(self._ids), self._size + extra)
+        grow = capacity - len(self._ids)
+        self._ids = np.concatenate([self._ids, np.zeros(grow, dtype=int)])
+        self._names.extend([None] * grow)
+        self._x = np.concatenate([self._x, np.zeros(grow)])
+        self._y = np.concatenate([self._y, np.zeros(grow)])
+        self._lat = np.concatenate([self._lat, np.full(grow, np.nan)])
+        self._lon = np.concatenate([self._lon, np.full(grow, np.nan)])
+        self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+
+    def _compact(self) -> None:
+        """移除失效槽位（保持顺序）并重建索引"""
+        live = np.flatnonzero(self._alive[:self._size])
+        n = len(live)
+        self._ids[:n] = self._ids[live]
+        self._x[:n] = self._x[live]
+        self._y[:n] = self._y[live]
+        self._lat[:n] = self._lat[live]
+        self._lon[:n] = self._lon[live]
+        names = [self._names[i] for i in live]
+        self._names[:n] = names
+        self._names[n:self._size] = [None] * (self._size - n)
+        self._alive[:n] = True
+        self._alive[n:self._size] = False
+        self._size = n
+        self._index = {int(station_id): slot for slot, station_id in enumerate(self._ids[:n])}
+
+    @contextmanager
+    def transaction(self):
+        """持有注册表锁执行多步修改；期间其它线程的 snapshot() 会等待，不会读到中间状态"""
+        with self._lock:
+            yield self
+
+    def _touch(self) -> None:
+        """注册表已变化：使快照失效"""
+        self.version += 1
+        self._snapshot = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, station_id: int) -> bool:
+        return int(station_id) in self._index
+
+    def get(self, station_id: int) -> Optional[Dict]:
+        """按ID读取单个电台"""
+        with self._lock:
+            slot = self._index.get(int(station_id))
+            if slot is None:
+                return None
+            return {
+                'id': int(self._ids[slot]),
+                'name': self._names[slot],
+                'x': float(self._x[slot]),
+                'y': float(self._y[slot]),
+                'lat': float(self._lat[slot]),
+                'lon': float(self._lon[slot])
+            }
+
+    def add(self, name: str, x: float, y: float, lat: float = np.nan, lon: float = np.nan,
+            station_id: Optional[int] = None) -> int:
+        """添加单个电台，返回电台ID"""
+        ids = None if station_id is None else [station_id]
+        return self.add_many([name], [x], [y], [lat], [lon], ids)[0]
+
+    def add_many(self, names: Sequence[str], x: Sequence[float], y: Sequence[float],
+                 lat: Optional[Sequence[float]] = None, lon: Optional[Sequence[float]] = None,
+                 station_ids: Optional[Sequence[int]] = None) -> List[int]:
+        """
+        批量添加电台
+
+        Args:
+            names, x, y, lat, lon: 各电台的列数据（经纬度可省略）
+            station_ids: 指定电台ID；默认自动分配（ID 单调递增，删除后不复用）
+
+        Returns:
+            新电台ID列表
+        """
+        k = len(names)
+        with self._lock:
+            if station_ids is None:
+                ids = np.arange(self._next_id, self._next_id + k)
+            else:
+                ids = np.asarray(station_ids, dtype=int)
+                if len(set(ids.tolist())) != k or any(int(i) in self._index for i in ids):
+                    raise ValueError('电台ID重复')
+
+            self._reserve(k)
+            slots = slice(self._size, self._size + k)
+            self._ids[slots] = ids
+            self._names[slots] = list(names)
+            self._x[slots] = x
+            self._y[slots] = y
+            self._lat[slots] = np.nan if lat is None else lat
+            self._lon[slots] = np.nan if lon is None else lon
+            self._alive[slots] = True
+            for offset, station_id in enumerate(ids.tolist()):
+                self._index[station_id] = self._size + offset
+            self._size += k
+            if k:
+                self._next_id = max(self._next_id, int(ids.max()) + 1)
+                self._touch()
+            return ids.tolist()
+
+    def update(self, station_id: int, name: Optional[str] = None, x: Optional[float] = None,
+               y: Optional[float] = None, lat: Optional[float] = None, lon: Optional[float] = None) -> bool:
+        """更新单个电台（None 字段保持不变）"""
+        with self._lock:
+            slot = self._index.get(int(station_id))
+            if slot is None:
+                return False
+            if name is not None:
+                self._names[slot] = name
+            for column, value in ((self._x, x), (self._y, y), (self._lat, lat), (self._lon, lon)):
+                if value is not None:
+                    column[slot] = value
+            self._touch()
+            return True
+
+    def update_many(self, station_ids: Sequence[int], x: Optional[Sequence[float]] = None,
+                    y: Optional[Sequence[float]] = None, lat: Optional[Sequence[float]] = None,
+                    lon: Optional[Sequence[float]] = None) -> int:
+        """批量更新坐标列，未知ID被忽略，返回更新的电台数"""
+        with self._lock:
+            slots = np.array([self._index.get(int(i), -1) for i in station_ids], dtype=int)
+            known = slots >= 0
+            for column, values in ((self._x, x), (self._y, y), (self._lat, lat), (self._lon, lon)):
+                if values is not None:
+                    column[slots[known]] = np.asarray(values, dtype=float)[known]
+            if known.any():
+                self._touch()
+            return int(known.sum())
+
+    def set_positions(self, x: np.ndarray, y: np.ndarray) -> None:
+        """按当前快照顺序整体替换本地坐标（如中心点变化后重算）"""
+        with self._lock:
+            live = np.flatnonzero(self._alive[:self._size])
+            self._x[live] = x
+            self._y[live] = y
+            self._touch()
+
+    def delete(self, station_id: int) -> bool:
+        """删除单个电台"""
+        return self.delete_many([station_id]) == 1
+
+    def delete_many(self, station_ids: Sequence[int]) -> int:
+        """批量删除电台，返回删除的电台数"""
+        with self._lock:
+            removed = 0
+            for station_id in station_ids:
+                slot = self._index.pop(int(station_id), None)
+                if slot is not None:
+                    self._alive[slot] = False
+                    self._names[slot] = None
+                    removed += 1
+            if removed:
+                self._touch()
+            return removed
+
+    def clear(self) -> None:
+        """清空注册表（ID 计数不重置）"""
+        with self._lock:
+            self._allocate(len(self._ids))
+            self._touch()
+
+    @property
+    def next_id(self) -> int:
+        """下一个自动分配的电台ID"""
+        return self._next_id
+
+    def restore(self, station_ids: Sequence[int], names: Sequence[str], x: Sequence[float], y: Sequence[float],
+                lat: Sequence[float], lon: Sequence[float], next_id: int) -> None:
+        """整体替换为外部保存的电台集合（如其它进程写入的共享存储），ID 计数一并恢复"""
+        with self._lock:
+            self._allocate(max(len(self._ids), len(station_ids)))
+            self.add_many(names, x, y, lat, lon, station_ids)
+            self._next_id = max(self._next_id, int(next_id))
+            self._touch()
+
+    def snapshot(self) -> StationLayout:
+        """当前电台的只读布局快照（按版本缓存）"""
+        with self._lock:
+            if self._snapshot is None:
+                live = np.flatnonzero(self._alive[:self._size])
+                self._snapshot = StationLayout.from_columns(
+                    station_ids=self._ids[live],
+                    names=[self._names[i] for i in live],
+                    positions=np.column_stack([self._x[live], self._y[live]]),
+                    geo=np.column_stack([self._lat[live], self._lon[live]]),
+                    version=self.version
+                )
+            return self._snapshot
@@ -0,0 +1,174 @@
+import logging
+import math
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StationStore:
+    """SQLite 电台共享存储 - 多个工作进程通过同一数据库文件共享电台布局和中心坐标
+
+    每次修改递增 meta 表中的版本号；各进程只需一次 SELECT 比较版本即可判断本地状态是否过期。
+    连接按线程创建（sqlite3 连接不能跨线程使用），数据库使用 WAL 模式，读写互不阻塞。
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        """
+        Args:
+            path: 数据库文件路径
+            timeout: 等待其它进程写锁的超时 (s)
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS stations (
+                    id INTEGER PRIMARY KEY,
+                    position INTEGER NOT NULL,
+                    name TEXT,
+                    x REAL NOT NULL,
+                    y REAL NOT NULL,
+                    lat REAL,
+                    lon REAL
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value REAL NOT NULL
+                );
+                INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+            ''')
+
+    def _connect(self) -> sqlite3.Connection:
+        """当前线程的连接（自动提交模式，事务由 transaction() 显式控制）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def version(self) -> int:
+        """存储版本号（0 表示尚未写入任何状态）"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return int(row[0])
+
+    @contextmanager
+    def transaction(self):
+        """跨进程写事务：BEGIN IMMEDIATE 取得写锁，期间其它进程的写入会等待"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def load(self) -> Optional[Dict]:
+        """读取共享状态（格式同 DataSimulator.export_state，附带 version）；尚未写入时返回 None"""
+        conn = self._connect()
+        conn.execute('BEGIN')
+        try:
+            return self.read(conn)
+        finally:
+            conn.execute('COMMIT')
+
+    @staticmethod
+    def read(conn: sqlite3.Connection) -> Optional[Dict]:
+        """在调用方已开启的事务中读取共享状态"""
+        meta = dict(conn.execute('SELECT key, value FROM meta').fetchall())
+        rows = conn.execute('SELECT id, name, x, y, lat, lon FROM stations ORDER BY position').fetchall()
+        if int(meta['version']) == 0:
+            return None
+        return {
+            'version': int(meta['version']),
+            'stations': [{
+                'id': station_id,
+                'name': name,
+                'x': x,
+                'y': y,
+                'lat': math.nan if lat is None else lat,
+                'lon': math.nan if lon is None else lon
+            } for station_id, name, x, y, lat, lon in rows],
+            'center': (meta['center_lat'], meta['center_lon']),
+            'next_id': int(meta['next_id'])
+        }
+
+    def save(self, state: Dict, conn: Optional[sqlite3.Connection] = None) -> int:
+        """
+        整体写入共享状态并递增版本号
+
+        Args:
+            state: DataSimulator.export_state() 的结果
+            conn: 已处于 transaction() 中的连接；省略时单独开启事务
+
+        Returns:
+            新版本号
+        """
+        if conn is None:
+            with self.transaction() as conn:
+                return self.save(state, conn)
+
+        rows = [(s['id'], position, s['name'], s['x'], s['y'],
+                 None if math.isnan(s['lat']) else s['lat'], None if math.isnan(s['lon']) else s['lon'])
+                for position, s in enumerate(state['stations'])]
+        conn.execute('DELETE FROM stations')
+        conn.executemany('INSERT INTO stations (id, position, name, x, y, lat, lon) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         rows)
+        conn.executemany('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', [
+            ('center_lat', state['center'][0]),
+            ('center_lon', state['center'][1]),
+            ('next_id', state['next_id'])
+        ])
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        return int(conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0])
+
+
+class StationStateSync:
+    """将 DataSimulator 的电台状态与 StationStore 同步
+
+    读请求前调用 pull()：版本未变化时只有一次 SELECT；
+    修改放在 mutation() 中：持有跨进程写锁，先拉取最新状态再修改并写回，不会覆盖其它进程的并发修改。
+    """
+
+    def __init__(self, store: StationStore, simulator):
+        self.store = store
+        self.simulator = simulator
+        self._version = -1
+        self._lock = threading.Lock()
+
+    def initialize(self) -> None:
+        """首个进程写入初始布局，其余进程读取已有布局"""
+        with self.store.transaction() as conn:
+            if self.store.version() == 0:
+                self._version = self.store.save(self.simulator.export_state(), conn)
+                return
+        self.pull()
+
+    def pull(self) -> bool:
+        """存储版本变化时用共享状态替换本地状态，返回是否更新"""
+        if self.store.version() == self._version:
+            return False
+        with self._lock:
+            return self._apply(self.store.load())
+
+    def _apply(self, state: Optional[Dict]) -> bool:
+        """状态版本与本地不同时替换本地状态"""
+        if state is None or state['version'] == self._version:
+            return False
+        self.simulator.restore_state(state['stations'], state['center'], state['next_id'])
+        self._version = state['version']
+        logger.debug("Pulled station layout version %d", self._version)
+        return True
+
+    @contextmanager
+    def mutation(self):
+        """在跨进程写锁内修改电台状态，结束时写回存储"""
+        with self._lock, self.store.transaction() as conn:
+            self._apply(self.store.read(conn))
+            yield self.simulator
+            self._version = self.store.save(self.simulator.export_state(), conn)
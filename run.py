@@ -5,9 +5,20 @@
 
 import os
 import sys
+import socket
+import argparse
 import subprocess
+import multiprocessing
 from pathlib import Path
 
+# 只保存在各工作进程内存中的状态：多进程部署时这些端点需要按客户端粘性路由到同一进程
+PROCESS_LOCAL_ENDPOINTS = (
+    '/api/track（航迹）',
+    '/api/locate_interference?online=1（电台在线基线）',
+    '/api/ingest/results（接入结果）',
+    '/api/stream（推送订阅）',
+)
+
 def check_dependencies():
     """检查依赖包是否安装"""
     try:
@@ -31,8 +42,111 @@ def install_dependencies():
         print("✗ 依赖包安装失败")
         return False
 
+def parse_args(argv=None):
+    """命令行参数"""
+    parser = argparse.ArgumentParser(description="EW THREAT DETECTION SYSTEM")
+    parser.add_argument('--production', action='store_true',
+                        help='生产模式：关闭调试器与自动重载，多线程（可选多进程）服务')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_WORKERS', 1)),
+                        help='工作进程数（默认 1；大于 1 时航迹、在线基线、接入结果与推送订阅'
+                             '只在各进程内可见，需要粘性路由）')
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 16)),
+                        help='每个工作进程的线程数（SSE 长连接各占一个线程）')
+    parser.add_argument('--station-db', default=os.environ.get('STATION_DB', 'instance/stations.db'),
+                        help='电台与测量历史的 SQLite 文件（重启后保留）')
+    parser.add_argument('--no-persist', action='store_true',
+                        help='开发模式下不持久化（电台修改与测量历史只保存在内存中）')
+    return parser.parse_args(argv)
+
+def _serve_werkzeug_worker(fd: int, host: str, port: int, threads: int) -> None:
+    """预派生工作进程：在子进程中创建应用，共享父进程的监听套接字，用 threads 个线程处理请求"""
+    from concurrent.futures import ThreadPoolExecutor
+    from werkzeug.serving import make_server
+    from app import create_app
+    server = make_server(host, port, create_app(), threaded=False, fd=fd)
+    if threads > 1:
+        pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+
+        def process_request_thread(request, client_address):
+            try:
+                server.finish_request(request, client_address)
+            except Exception:
+                server.handle_error(request, client_address)
+            finally:
+                server.shutdown_request(request)
+
+        # 与 gunicorn gthread 一致：每个工作进程最多 threads 个并发请求（SSE 长连接各占一个线程）
+        server.process_request = lambda request, client_address: pool.submit(
+            process_request_thread, request, client_address)
+    server.serve_forever()
+
+def serve_production(args) -> None:
+    """
+    多进程生产服务
+
+    每个工作进程各自调用 create_app()，拥有独立的模块级组件；只有电台布局与中心坐标通过
+    STATION_DB 指向的 SQLite 文件在进程间共享，PROCESS_LOCAL_ENDPOINTS 的状态留在各进程内。
+    因此默认单进程多线程；workers > 1 时需在前端按客户端粘性路由这些端点。
+    已安装 gunicorn 时使用 gthread 工作进程（workers × threads），否则在 POSIX 系统上
+    预派生 werkzeug 进程共享同一监听套接字（单进程时直接在当前进程服务）。
+    """
+    print(f"生产模式: {args.workers} 个工作进程 × {args.threads} 线程, 电台共享存储 {args.station_db}")
+    if args.workers > 1:
+        print("注意: 以下端点的状态只保存在各工作进程内，需要粘性路由: " + ', '.join(PROCESS_LOCAL_ENDPOINTS))
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+
+    if BaseApplication is not None:
+        class GunicornApplication(BaseApplication):
+            def load_config(self):
+                self.cfg.set('bind', f'{args.host}:{args.port}')
+                self.cfg.set('workers', args.workers)
+                self.cfg.set('threads', args.threads)
+                self.cfg.set('worker_class', 'gthread')
+                # SSE 长连接不应被工作进程超时中断
+                self.cfg.set('timeout', 0)
+
+            def load(self):
+                from app import create_app
+                return create_app()
+
+        GunicornApplication().run()
+        return
+
+    if not hasattr(os, 'fork'):
+        print("未安装 gunicorn 且系统不支持 fork，退回单进程多线程模式")
+        from app import create_app
+        create_app().run(host=args.host, port=args.port, debug=False, threaded=args.threads > 1)
+        return
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((args.host, args.port))
+    listener.listen(128)
+    if args.workers <= 1:
+        _serve_werkzeug_worker(listener.fileno(), args.host, args.port, args.threads)
+        return
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_serve_werkzeug_worker,
+                               args=(listener.fileno(), args.host, args.port, args.threads), daemon=True)
+               for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    finally:
+        for worker in workers:
+            worker.terminate()
+
 def main():
     """主函数"""
+    args = parse_args()
     print("=" * 50)
     print("EW THREAT DETECTION SYSTEM")
     print("=" * 50)
@@ -54,13 +168,20 @@ def main():
     
     # 启动应用
     print("\n正在启动系统...")
-    print("访问地址: http://localhost:5000")
+    print(f"访问地址: http://localhost:{args.port}")
     print("按 Ctrl+C 停止服务")
     print("-" * 50)
     
+    if args.production or not args.no_persist:
+        Path(args.station_db).parent.mkdir(parents=True, exist_ok=True)
+        os.environ['STATION_DB'] = args.station_db
+
     try:
-        from app import app
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        if args.production:
+            serve_production(args)
+        else:
+            from app import app
+            app.run(debug=True, host=args.host, port=args.port)
     except KeyboardInterrupt:
         print("\n系统已停止")
     except Exception as e:
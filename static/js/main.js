@@ -3,6 +3,7 @@ let locationChart = null;
 let powerChart = null;
 let currentPowerData = null;
 let stationsInfo = null;
+let liveStream = null;
 
 // 页面加载完成后初始化
 $(document).ready(function() {
@@ -195,6 +196,7 @@ function bindEvents() {
     $('#simulate-btn').click(simulateData);
     $('#locate-btn').click(locateInterference);
     $('#reset-stations-btn').click(resetStationsPositions);
+    $('#live-stream-btn').click(toggleLiveStream);
 
     // 输入框变化时重置定位按钮
     $('#interference-x, #interference-y, #target-lat, #target-lon, #add-anomaly, #path-loss-exponent').change(function() {
@@ -347,7 +349,8 @@ function locateInterference() {
         contentType: 'application/json',
         data: JSON.stringify({
             power_data: currentPowerData.power_data,
-            coord_mode: coordMode
+            coord_mode: coordMode,
+            path_loss_exponent: currentPowerData.path_loss_exponent
         })
     })
     .done(function(data) {
@@ -387,6 +390,35 @@ function locateInterference() {
     });
 }
 
+// 实时定位流（SSE）：服务端持续定位并推送，浏览器无需逐次请求
+function toggleLiveStream() {
+    if (liveStream) {
+        liveStream.close();
+        liveStream = null;
+        $('#live-stream-btn').text('LIVE STREAM');
+        return;
+    }
+
+    liveStream = new EventSource('/api/stream');
+    $('#live-stream-btn').text('STOP STREAM');
+
+    liveStream.addEventListener('location', function(event) {
+        const result = JSON.parse(event.data);
+        if (!result.position) return;
+
+        updateLocationChart(result.truth, result.position, result.anomaly_indices);
+        if (mapManager && mapManager.map) {
+            mapManager.updateTargetMarker(result.position, true);
+        }
+        $('#last-update').text(`最后更新: ${new Date(result.timestamp * 1000).toLocaleTimeString()}`);
+    });
+
+    liveStream.addEventListener('error', function() {
+        // 连接断开时 EventSource 会按 retry 间隔自动重连
+        console.error('Live stream connection lost');
+    });
+}
+
 // 更新位置图表
 function updateLocationChart(truePosition = null, estimatedPosition = null, anomalyIndices = []) {
     if (!stationsInfo) return;
@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from modules.anomaly_detector import AnomalyDetector
 
 def test_anomaly_detection_logic():
@@ -19,3 +20,54 @@ def test_anomaly_detection_logic():
     assert 'anomaly_indices' in result
     assert 4 in result['anomaly_indices']
     assert 0 in result['normal_indices']
+
+def test_distance_based_detection_flags_inconsistent_station():
+    detector = AnomalyDetector()
+
+    positions = [(-80, -80), (80, -80), (80, 80), (-80, 80), (0, -80), (80, 0), (0, 80), (-80, 0)]
+    power_data = []
+    for i, (x, y) in enumerate(positions):
+        power = 100 - 20 * np.log10(np.hypot(x - 10, y - 10))
+        power_data.append({'station_id': i, 'power': power + (40 if i == 2 else 0), 'x': x, 'y': y})
+
+    assert detector._distance_based_detection(power_data) == [2]
+
+def _frame_from_row(layout, powers):
+    from modules.power_frame import PowerFrame
+    return PowerFrame(station_id=layout.station_ids, power=powers, x=layout.positions[:, 0],
+                      y=layout.positions[:, 1], station_name=list(layout.names))
+
+def test_clean_data_has_almost_no_false_positives():
+    from modules.data_simulator import DataSimulator
+    simulator = DataSimulator()
+    detector = AnomalyDetector()
+    emitters = np.random.default_rng(0).uniform(-100, 100, (500, 2))
+    powers = simulator.generate_power_batch(emitters, seed=1)['powers']
+
+    # 单一统计方法的票（如干扰源附近电台的 IQR / 距离票）不足以判定异常
+    flagged = sum(len(r['anomaly_indices']) for r in detector.detect_anomalies_batch(powers, simulator.layout))
+    assert flagged / powers.size < 0.01
+
+    single = sum(len(detector.detect_anomalies(_frame_from_row(simulator.layout, row),
+                                               simulator.layout)['anomaly_indices']) for row in powers[:200])
+    assert single / powers[:200].size < 0.01
+
+def test_faulty_strongest_station_is_flagged():
+    from modules.data_simulator import DataSimulator
+    simulator = DataSimulator()
+    detector = AnomalyDetector()
+    emitters = np.random.default_rng(0).uniform(-100, 100, (300, 2))
+    powers = simulator.generate_power_batch(emitters, seed=1)['powers']
+    # 随机电台读数抬高 20 dB 并成为最强电台（故障或伪造的高功率）
+    faulty = np.random.default_rng(2).integers(0, powers.shape[1], len(powers))
+    rows = np.arange(len(powers))
+    powers[rows, faulty] = np.maximum(powers[rows, faulty] + 20, powers.max(axis=1) + 1)
+
+    results = detector.detect_anomalies_batch(powers, simulator.layout)
+    detected = np.mean([f in r['anomaly_indices'] for f, r in zip(faulty, results)])
+    assert detected > 0.85
+
+    single = np.mean([f in detector.detect_anomalies(_frame_from_row(simulator.layout, row),
+                                                     simulator.layout)['anomaly_indices']
+                      for f, row in zip(faulty[:100], powers[:100])])
+    assert single > 0.85
@@ -0,0 +1,34 @@
+import numpy as np
+from modules.data_simulator import DataSimulator
+
+def test_power_batch_is_seeded_and_labelled():
+    simulator = DataSimulator()
+    batch = simulator.generate_power_batch([[0, 0], [30, -20]], n_snapshots=500, add_anomaly=True, seed=42)
+    again = simulator.generate_power_batch([[0, 0], [30, -20]], n_snapshots=500, add_anomaly=True, seed=42)
+
+    assert batch['powers'].shape == (1000, len(simulator.layout))
+    assert np.array_equal(batch['powers'], again['powers'])
+    assert np.array_equal(batch['anomaly_mask'], again['anomaly_mask'])
+    assert set(batch['anomaly_mask'].sum(axis=1)) == {1, 2}
+    assert np.allclose(batch['emitter_positions'][499], [0, 0])
+    assert np.allclose(batch['emitter_positions'][500], [30, -20])
+
+def test_power_batch_matches_noise_free_model():
+    simulator = DataSimulator()
+    simulator.noise_std = 0.0
+    powers = simulator.generate_power_batch((10, 20), n_snapshots=3)['powers']
+
+    expected = simulator._received_powers((10, 20), simulator.layout.positions)
+    assert np.allclose(powers, expected[None, :])
+
+def test_distance_matrix_covers_planar_and_geographic_modes():
+    simulator = DataSimulator()
+    layout = simulator.layout
+
+    assert np.allclose(simulator.calculate_distance_matrix(), layout.distance_matrix)
+    planar = simulator.calculate_distance_matrix([[0, 0], [10, 20]])
+    assert np.isclose(planar[1, 0], simulator.calculate_distance((10, 20), tuple(layout.positions[0])))
+
+    geo = simulator.calculate_distance_matrix(layout.geo[:2], use_geo=True)
+    assert geo.shape == (2, len(layout))
+    assert np.isclose(geo[0, 1], simulator.calculate_distance(tuple(layout.geo[0]), tuple(layout.geo[1]), use_geo=True))
@@ -0,0 +1,45 @@
+import pytest
+import numpy as np
+from modules.geo_converter import GeoConverter
+from modules.location_algorithm import LocationAlgorithm
+from modules.emitter_tracker import EmitterTracker
+
+STATIONS = [(-80, -80), (80, -80), (80, 80), (-80, 80), (0, -80), (80, 0), (0, 80), (-80, 0)]
+
+def make_power_data(target_x, target_y):
+    return [{
+        'station_id': i,
+        'station_name': f'SENSOR-{i}',
+        'x': sx,
+        'y': sy,
+        'power': 100 - 20 * np.log10(np.hypot(sx - target_x, sy - target_y))
+    } for i, (sx, sy) in enumerate(STATIONS)]
+
+def test_track_follows_moving_emitter():
+    tracker = EmitterTracker(LocationAlgorithm(GeoConverter(), seed=0))
+
+    first = tracker.update(make_power_data(-40, 10), timestamp=0.0)
+    track_id = first['track']['track_id']
+    assert first['warm_start'] is False
+
+    for step in range(1, 20):
+        result = tracker.update(make_power_data(-40 + 2 * step, 10), track_id=track_id, timestamp=float(step))
+
+    assert result['warm_start'] is True
+    assert result['track']['track_id'] == track_id
+    assert abs(result['track']['position']['x'] - (-2)) < 1.0
+    assert abs(result['track']['velocity']['vx'] - 2.0) < 0.5
+    assert len(tracker.get_track(track_id)['history']) == 20
+
+def test_track_endpoint_accepts_iso_timestamps_and_rejects_garbage():
+    from app import create_app
+    client = create_app().test_client()
+    simulated = client.get('/api/simulate_data?coord_mode=cartesian').get_json()
+
+    # simulate_data 的 ISO 时间戳原样回传
+    response = client.post('/api/track', json=simulated)
+    assert response.status_code == 200 and 'track' in response.get_json()
+
+    assert client.post('/api/track', json=dict(simulated, timestamp='yesterday')).status_code == 400
+    assert client.post('/api/track', json=dict(simulated, timestamp=[1])).status_code == 400
+    assert client.post('/api/track', json=dict(simulated, track_id='abc')).status_code == 400
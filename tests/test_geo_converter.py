@@ -0,0 +1,71 @@
+import logging
+import pytest
+import numpy as np
+from modules.geo_converter import GeoConverter
+
+def test_array_conversions_match_scalar_and_are_silent(capsys):
+    converter = GeoConverter(31.23, 121.47)
+    xs = np.linspace(-100, 100, 7)
+    ys = np.linspace(80, -80, 7)
+
+    lats, lons = converter.xy_to_latlon_array(xs, ys)
+    expected = [converter.xy_to_latlon(x, y) for x, y in zip(xs, ys)]
+    assert np.allclose(np.column_stack([lats, lons]), expected)
+
+    back_x, back_y = converter.latlon_to_xy_array(lats, lons)
+    assert np.allclose(back_x, xs) and np.allclose(back_y, ys)
+    assert np.allclose(converter.latlon_to_xy_points(np.column_stack([lats, lons])), np.column_stack([xs, ys]))
+
+    distances = converter.haversine_distance_array(lats[:, None], lons[:, None], lats[None, :], lons[None, :])
+    assert distances.shape == (7, 7)
+    assert np.isclose(distances[0, 6], converter.haversine_distance(lats[0], lons[0], lats[6], lons[6]))
+
+    assert capsys.readouterr().out == ''
+
+def test_debug_logging_is_level_gated(caplog):
+    converter = GeoConverter()
+    with caplog.at_level(logging.DEBUG, logger='modules.geo_converter'):
+        converter.latlon_to_xy(39.95, 116.5)
+    assert any('LatLon to XY' in record.getMessage() for record in caplog.records)
+
+def test_enu_projection_round_trips_and_tracks_geodesic_distance():
+    converter = GeoConverter(31.23, 121.47, projection='enu')
+    xs = np.array([-150.0, -40.0, 0.0, 60.0, 150.0])
+    ys = np.array([120.0, -150.0, 0.0, 30.0, -90.0])
+
+    lats, lons = converter.xy_to_latlon_array(xs, ys)
+    back_x, back_y = converter.latlon_to_xy_array(lats, lons)
+    assert np.allclose(back_x, xs, atol=1e-6) and np.allclose(back_y, ys, atol=1e-6)
+    assert np.allclose(converter.latlon_to_xy(lats[0], lons[0]), (xs[0], ys[0]), atol=1e-6)
+    assert np.allclose(converter.xy_to_latlon(0.0, 0.0), (31.23, 121.47))
+
+    # 椭球切平面 + 沿天向投影：200 km 量级的距离与椭球大圆距离只差数十米
+    lat_a, lon_a = converter.xy_to_latlon(-100.0, 0.0)
+    lat_b, lon_b = converter.xy_to_latlon(100.0, 0.0)
+    assert abs(converter.haversine_distance(lat_a, lon_a, lat_b, lon_b) - 200.0) < 0.5
+
+    converter.set_center(39.9042, 116.4074)
+    assert np.allclose(converter.latlon_to_xy(39.9042, 116.4074), (0.0, 0.0), atol=1e-9)
+
+def test_unknown_projection_is_rejected():
+    with pytest.raises(ValueError):
+        GeoConverter(projection='mercator')
+
+def test_distance_matrix_variants_match_scalar_references():
+    converter = GeoConverter()
+    points = np.array([[39.9, 116.4], [31.2, 121.5], [40.5, 117.3]])
+
+    haversine = converter.distance_matrix(points)
+    assert haversine.shape == (3, 3) and np.allclose(np.diag(haversine), 0.0)
+    assert np.isclose(haversine[0, 1], converter.haversine_distance(39.9, 116.4, 31.2, 121.5))
+    assert converter.distance_matrix(points, dtype=np.float32).dtype == np.float32
+    assert np.allclose(converter.distance_matrix(points, dtype=np.float32), haversine, rtol=1e-5)
+
+    # Vincenty 教科书算例（Flinders Peak → Buninyong，54972.271 m）
+    geodesic = converter.distance_matrix([[-37.95103342, 144.42486789]], [[-37.65282114, 143.92649554]],
+                                         method='vincenty')
+    assert geodesic.shape == (1, 1) and abs(geodesic[0, 0] * 1000 - 54972.271) < 1e-2
+    assert np.allclose(converter.distance_matrix(points, method='vincenty'), haversine, rtol=5e-3)
+
+    inside = converter.validate_coordinates_array(points[:, 0], points[:, 1], max_distance_km=150)
+    assert inside.tolist() == [converter.validate_coordinates(lat, lon, 150) for lat, lon in points]
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from modules.history_downsample import bucket_aggregate, downsample_series, lttb_indices
+
+def test_bucket_aggregate_matches_per_bucket_reference():
+    rng = np.random.default_rng(0)
+    t = np.sort(rng.uniform(0, 100, 1000))
+    values = rng.normal(size=t.size)
+    result = bucket_aggregate(t, values, 0.0, 100.0, 10)
+
+    assert result['count'].sum() == t.size
+    for start, low, high, mean in zip(result['timestamp'], result['min'], result['max'], result['mean']):
+        inside = (t >= start) & (t < start + 10)
+        assert np.isclose(low, values[inside].min()) and np.isclose(high, values[inside].max())
+        assert np.isclose(mean, values[inside].mean())
+
+    # 空桶不返回
+    sparse = bucket_aggregate(np.array([1.0, 95.0]), np.array([3.0, 4.0]), 0.0, 100.0, 10)
+    assert sparse['timestamp'].tolist() == [0.0, 90.0]
+
+def test_lttb_keeps_endpoints_and_spikes():
+    t = np.arange(1000, dtype=float)
+    values = np.sin(t / 50)
+    values[437] = 25.0
+    keep = lttb_indices(t, values, 50)
+
+    assert keep.size == 50 and keep[0] == 0 and keep[-1] == 999
+    assert np.all(np.diff(keep) > 0) and 437 in keep
+    assert lttb_indices(t[:10], values[:10], 50).tolist() == list(range(10))
+
+    sampled = downsample_series(t, values, 50)
+    assert sampled['timestamp'].size == 50 and sampled['value'].max() == 25.0
+    with pytest.raises(ValueError):
+        downsample_series(t, values, 50, method='median')
@@ -0,0 +1,57 @@
+import time
+import numpy as np
+from modules.data_simulator import DataSimulator
+from modules.anomaly_detector import AnomalyDetector
+from modules.location_algorithm import LocationAlgorithm
+from modules.ingest_queue import IngestQueue
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_micro_batches_match_single_solves_and_publish():
+    simulator = DataSimulator(seed=1)
+    frames = [simulator.generate_power_frame((x, -10.0)) for x in (-40.0, 0.0, 35.0)]
+    frames.append(frames[0].subset([0, 1, 2, 4, 6]))
+    published = []
+    ingest = IngestQueue(AnomalyDetector(), LocationAlgorithm(seed=0), lambda: simulator.layout,
+                         publish=published.append, batch_size=8, max_wait_s=0.2)
+
+    for frame in frames:
+        assert ingest.submit(frame) is not None
+    assert _wait_for(lambda: ingest.processed == len(frames))
+    ingest.stop()
+
+    assert sorted(result['report_id'] for result in published) == [0, 1, 2, 3]
+    reference = LocationAlgorithm(seed=0)
+    detector = AnomalyDetector()
+    for result in published:
+        frame = frames[result['report_id']]
+        anomaly = detector.detect_anomalies(frame, simulator.layout)
+        single = reference.calculate_location(frame, anomaly['normal_indices'], layout=simulator.layout)
+        assert np.hypot(result['location']['position']['x'] - single['position']['x'],
+                        result['location']['position']['y'] - single['position']['y']) < 1e-3
+        assert result['lag_ms'] >= 0
+    assert ingest.status()['depth'] == 0
+
+def test_full_queue_rejects_with_backpressure():
+    simulator = DataSimulator(seed=1)
+    ingest = IngestQueue(AnomalyDetector(), LocationAlgorithm(seed=0), lambda: simulator.layout,
+                         capacity=2, workers=0)
+    frame = simulator.generate_power_frame((0.0, 0.0))
+
+    assert ingest.submit(frame) is not None and ingest.submit(frame) is not None
+    assert ingest.submit(frame) is None
+    status = ingest.status()
+    assert status['depth'] == 2 and status['rejected'] == 1 and status['oldest_wait_ms'] >= 0
+
+def test_ingest_endpoints_reject_malformed_input():
+    from app import create_app
+    client = create_app().test_client()
+
+    for body in ({'reports': 'abc'}, {'reports': {'power_data': []}}, {'reports': ['abc']}, ['abc']):
+        assert client.post('/api/ingest', json=body).status_code == 400
+    assert client.get('/api/ingest/results?limit=x').status_code == 400
+    assert client.get('/api/ingest/results?limit=5').status_code == 200
@@ -0,0 +1,23 @@
+import pytest
+import numpy as np
+from modules.geo_converter import GeoConverter
+from modules.location_algorithm import LocationAlgorithm
+from modules.likelihood_grid import LikelihoodGrid
+
+def test_grid_peak_matches_emitter():
+    algo = LocationAlgorithm(GeoConverter())
+    grid = LikelihoodGrid(algo)
+
+    stations_pos = np.array([[-80, -80], [80, -80], [80, 80], [-80, 80],
+                             [0, -80], [80, 0], [0, 80], [-80, 0]], dtype=float)
+    target = np.array([23.0, -41.0])
+    received_powers = 100 - 20 * np.log10(np.linalg.norm(stations_pos - target, axis=1))
+
+    result = grid.evaluate(stations_pos, received_powers)
+
+    assert result['probability'].shape == (len(result['y']), len(result['x']))
+    assert abs(result['probability'].sum() - 1.0) < 1e-9
+    assert np.hypot(*(np.array(result['peak']) - target)) < grid.resolution_km / grid.refine_factor
+
+    compact = grid.to_compact(result)
+    assert compact['shape'] == list(result['probability'].shape)
@@ -2,6 +2,7 @@ import pytest
 import numpy as np
 from modules.geo_converter import GeoConverter
 from modules.location_algorithm import LocationAlgorithm
+from modules.power_frame import PowerFrame
 
 def test_location_accuracy():
     geo_converter = GeoConverter()
@@ -38,3 +39,157 @@ def test_location_accuracy():
     # 允许一定的数值误差
     assert abs(result['x'] - target_x) < 1.0
     assert abs(result['y'] - target_y) < 1.0
+
+def test_objective_gradient_matches_finite_difference():
+    algo = LocationAlgorithm(GeoConverter())
+    stations_pos = np.array([[-80, -80], [80, -80], [80, 80], [-80, 80], [0, 0.5]], dtype=float)
+    received_powers = np.array([55.0, 58.0, 52.0, 60.0, 98.0])
+    pos = np.array([12.0, -7.0])
+
+    value, gradient = algo._objective_and_gradient(pos, stations_pos, received_powers)
+
+    eps = 1e-6
+    numeric = np.array([
+        (algo._objective_and_gradient(pos + step, stations_pos, received_powers)[0] - value) / eps
+        for step in np.eye(2) * eps
+    ])
+    assert np.allclose(gradient, numeric, rtol=1e-4, atol=1e-4)
+
+def test_batch_locations_match_single_solves():
+    algo = LocationAlgorithm(GeoConverter())
+    stations = [
+        {'id': 0, 'x': -80, 'y': -80},
+        {'id': 1, 'x': 80, 'y': -80},
+        {'id': 2, 'x': 0, 'y': 80}
+    ]
+    targets = [(10, 5), (-30, 20)]
+    power_matrix = np.array([
+        [100 - 20 * np.log10(np.hypot(s['x'] - tx, s['y'] - ty)) for s in stations]
+        for tx, ty in targets
+    ])
+
+    batch_results = algo.calculate_locations(power_matrix, stations, use_geo_coordinates=False)
+
+    assert len(batch_results) == len(targets)
+    for row, batch_result in zip(power_matrix, batch_results):
+        power_data = [dict(s, power=p) for s, p in zip(stations, row)]
+        single_result = algo.calculate_location(power_data, use_geo_coordinates=False)
+        assert abs(batch_result['position']['x'] - single_result['position']['x']) < 1e-6
+        assert abs(batch_result['position']['y'] - single_result['position']['y']) < 1e-6
+
+def test_ransac_is_reproducible_and_rejects_outlier():
+    stations_pos = np.array([[-80, -80], [80, -80], [80, 80], [-80, 80],
+                             [0, -80], [80, 0], [0, 80], [-80, 0]], dtype=float)
+    dist = np.hypot(stations_pos[:, 0] - 5, stations_pos[:, 1] - 5)
+    received_powers = 100 - 20 * np.log10(dist)
+    received_powers[3] += 30
+
+    first = LocationAlgorithm(GeoConverter(), seed=7)._ransac_outlier_filtering(stations_pos, received_powers)
+    second = LocationAlgorithm(GeoConverter(), seed=7)._ransac_outlier_filtering(stations_pos, received_powers)
+
+    assert first == second
+    assert 3 not in first
+
+def test_per_call_model_leaves_shared_defaults_untouched():
+    from modules.propagation_model import PropagationModel
+    algo = LocationAlgorithm(GeoConverter(), seed=0)
+    stations = [{'id': i, 'x': x, 'y': y} for i, (x, y) in
+                enumerate([(-80, -80), (80, -80), (80, 80), (-80, 80), (0, -80)])]
+    model = PropagationModel(path_loss_exponent=3.0)
+    power_data = [dict(s, station_id=s['id'], power=100 - 30 * np.log10(np.hypot(s['x'] - 20, s['y'] + 10)))
+                  for s in stations]
+
+    result = algo.calculate_location(power_data, use_geo_coordinates=False, model=model)
+
+    assert algo.model == PropagationModel()
+    assert abs(result['position']['x'] - 20) < 0.5 and abs(result['position']['y'] + 10) < 0.5
+
+def test_posted_coordinates_that_differ_from_layout_are_used():
+    from modules.data_simulator import DataSimulator
+    layout = DataSimulator().layout
+    algo = LocationAlgorithm(GeoConverter(), seed=0)
+    posted = [(0, 0), (120, 10), (100, 110), (-20, 90), (60, -40)]
+    power_data = [{'station_id': int(station_id), 'x': x, 'y': y,
+                   'power': 100 - 20 * np.log10(np.hypot(x - 50, y - 50))}
+                  for station_id, (x, y) in zip(layout.station_ids[:5], posted)]
+
+    result = algo.calculate_location(power_data, use_geo_coordinates=False, layout=layout)
+    assert abs(result['position']['x'] - 50) < 0.5 and abs(result['position']['y'] - 50) < 0.5
+
+    # 坐标与布局一致（或缺失）时仍使用布局缓存
+    matching = [dict(record, x=float(x), y=float(y)) for record, (x, y) in zip(power_data, layout.positions)]
+    assert layout.indices_matching(PowerFrame.from_records(matching)).tolist() == list(range(5))
+    missing = [{'station_id': record['station_id'], 'power': record['power']} for record in power_data]
+    assert layout.indices_matching(PowerFrame.from_records(missing)) is not None
+    assert layout.indices_matching(PowerFrame.from_records(power_data)) is None
+
+STATIONS_POS = np.array([[-80, -80], [80, -80], [80, 80], [-80, 80],
+                         [0, -80], [80, 0], [0, 80], [-80, 0]], dtype=float)
+
+def _clean_powers(stations_pos, target, exponent=2.0):
+    return 100 - 10 * exponent * np.log10(np.hypot(*(stations_pos - np.asarray(target, dtype=float)).T))
+
+def test_linearized_seed_is_exact_on_noise_free_data():
+    algo = LocationAlgorithm(GeoConverter(), seed=0)
+    targets = np.array([[12.0, -7.0], [-55.0, 40.0], [70.0, 65.0]])
+    powers = np.vstack([_clean_powers(STATIONS_POS, t) for t in targets])
+
+    seeds = algo._linearized_initial_guess(STATIONS_POS, powers)
+    assert np.allclose(seeds, targets, atol=1e-6)
+
+def test_collinear_stations_fall_back_to_weighted_centroid_seed():
+    algo = LocationAlgorithm(GeoConverter(), seed=0)
+    collinear = np.array([[-60, 0], [-20, 0], [20, 0], [60, 0]], dtype=float)
+    powers = _clean_powers(collinear, (10, 30))[None, :]
+
+    seed = algo._linearized_initial_guess(collinear, powers)[0]
+    assert np.all(np.isfinite(seed))
+    assert seed[1] == 0.0 and collinear[:, 0].min() <= seed[0] <= collinear[:, 0].max()
+
+    # 退化几何下求解仍得到有限结果（共线时只能确定沿线位置）
+    solved = algo._solve_snapshots(collinear, powers, np.ones_like(powers))
+    assert np.all(np.isfinite(solved['x'])) and np.all(np.isfinite(solved['fun']))
+
+def test_seeded_solve_is_as_accurate_as_multi_start_with_one_run():
+    algo = LocationAlgorithm(GeoConverter(), seed=0)
+    rng = np.random.default_rng(4)
+    targets = rng.uniform(-70, 70, (200, 2))
+    powers = np.vstack([_clean_powers(STATIONS_POS, t) for t in targets]) + rng.normal(0, 2.0, (200, 8))
+    weights = np.ones_like(powers)
+
+    seeded = algo._solve_snapshots(STATIONS_POS, powers, weights)
+    centroid = STATIONS_POS.mean(axis=0)
+    starts = np.stack([np.repeat(centroid[None], len(targets), axis=0), STATIONS_POS[np.argmax(powers, axis=1)],
+                       np.repeat(centroid[None] + 10, len(targets), axis=0),
+                       np.repeat(centroid[None] - 10, len(targets), axis=0)], axis=1)
+    multi = algo._minimize_from_starts(starts.reshape(-1, 2), STATIONS_POS, np.repeat(powers, 4, axis=0))
+    best = multi['x'].reshape(-1, 4, 2)[np.arange(len(targets)), np.argmin(multi['fun'].reshape(-1, 4), axis=1)]
+
+    # 多数快照只从线性化初值精化一次，定位误差不劣于四起点
+    assert seeded['optimizer_runs'].mean() < 1.2
+    seeded_error = np.hypot(*(seeded['x'] - targets).T).mean()
+    multi_error = np.hypot(*(best - targets).T).mean()
+    assert seeded_error <= multi_error * 1.05
+
+    # 远离真值的热启动初值不影响结果
+    far = algo._solve_snapshots(STATIONS_POS, powers[:1], weights[:1], seeds=np.array([[5000.0, 5000.0]]))
+    assert np.allclose(far['x'][0], seeded['x'][0], atol=1e-3)
+
+def test_locate_batch_accepts_geographic_stations_and_rejects_non_finite_powers():
+    from app import create_app
+    from modules.api_routes import data_simulator
+    client = create_app().test_client()
+    stations = [{'id': s['id'], 'name': s['name'], 'lat': s['lat'], 'lon': s['lon']}
+                for s in data_simulator.get_stations_info()]
+    powers = data_simulator.generate_power_batch([[10, 20], [-30, 5]], seed=0)['powers'].tolist()
+
+    response = client.post('/api/locate_batch', json={'power_matrix': powers, 'stations': stations})
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 2
+
+    powers[0][3] = None
+    assert client.post('/api/locate_batch', json={'power_matrix': powers, 'stations': stations}).status_code == 400
+    bad_stations = [dict(stations[0], lat=None)] + stations[1:]
+    powers[0][3] = -60.0
+    assert client.post('/api/locate_batch',
+                       json={'power_matrix': powers, 'stations': bad_stations}).status_code == 400
@@ -0,0 +1,53 @@
+import numpy as np
+from datetime import datetime
+from modules.data_simulator import DataSimulator
+from modules.measurement_history import MeasurementHistory
+
+def test_buffered_snapshots_are_queryable_as_columns(tmp_path):
+    history = MeasurementHistory(str(tmp_path / 'history.db'), batch_size=1000, flush_interval_s=60.0)
+    simulator = DataSimulator()
+    frames = [simulator.generate_power_frame((10.0 * i, 0.0)) for i in range(3)]
+    for i, frame in enumerate(frames):
+        location = {'position': {'x': 10.0 * i, 'y': 0.0}, 'confidence': 90.0} if i != 1 else {'error': '定位失败'}
+        history.record(frame, location, anomaly_indices=[0], timestamp=100.0 + i, coord_mode='cartesian')
+
+    # 请求路径只写缓冲区
+    assert history.status()['pending'] == 3 and history.query_locations()['timestamp'].size == 0
+    assert history.flush() == 3
+    assert history.status() == {'pending': 0, 'recorded': 3, 'written': 3, 'dropped': 0}
+
+    locations = history.query_locations(start=100.0, end=102.0)
+    assert locations['timestamp'].tolist() == [100.0, 101.0]
+    assert locations['x'][0] == 0.0 and np.isnan(locations['x'][1])
+    assert locations['anomaly_count'].tolist() == [1, 1]
+
+    station = int(frames[0].station_id[2])
+    series = history.query_measurements(station_ids=[station])
+    assert series['timestamp'].tolist() == [100.0, 101.0, 102.0]
+    assert np.allclose(series['power'], [frame.power[2] for frame in frames])
+    assert not series['is_anomaly'].any()
+
+    everything = history.query_measurements(start=101.0)
+    assert everything['power'].size == 2 * len(frames[0])
+    assert everything['is_anomaly'].sum() == 2
+    history.stop()
+
+def test_locate_request_echoing_simulate_data_is_recorded(tmp_path, monkeypatch):
+    from app import create_app
+    from modules import api_routes
+    history = MeasurementHistory(str(tmp_path / 'history.db'), flush_interval_s=60.0)
+    monkeypatch.setattr(api_routes, 'measurement_history', history)
+    client = create_app().test_client()
+
+    simulated = client.get('/api/simulate_data?coord_mode=cartesian').get_json()
+    # simulate_data 的 timestamp 是 ISO 字符串，原样回传
+    response = client.post('/api/locate_interference', json=dict(simulated, power_data=simulated['power_data']))
+    assert response.status_code == 200
+    garbage = client.post('/api/locate_interference', json=dict(simulated, timestamp='not-a-time'))
+    assert garbage.status_code == 200
+
+    history.flush()
+    timestamps = history.query_locations()['timestamp']
+    assert timestamps.size == 2
+    assert abs(timestamps[0] - datetime.fromisoformat(simulated['timestamp']).timestamp()) < 1e-3
+    history.stop()
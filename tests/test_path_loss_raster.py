@@ -0,0 +1,45 @@
+import numpy as np
+from modules.data_simulator import DataSimulator
+from modules.location_algorithm import LocationAlgorithm
+from modules.path_loss_raster import PathLossRasters
+
+def build_rasters(directory, layout, exponent=3.0):
+    """用指数为 3 的对数距离模型 + 站点偏移生成栅格"""
+    rasters = PathLossRasters.create(str(directory), x_min=-150.0, y_min=-150.0, resolution_km=1.0)
+    axis = np.arange(-150.0, 150.5, 1.0)
+    gx, gy = np.meshgrid(axis, axis)
+    for k, (station_id, (sx, sy)) in enumerate(zip(layout.station_ids, layout.positions)):
+        dist = np.maximum(np.hypot(gx - sx, gy - sy), 1.0)
+        rasters.write(station_id, 10 * exponent * np.log10(dist) + k)
+    return PathLossRasters(str(directory))
+
+def test_rasters_are_memory_mapped_and_interpolated(tmp_path):
+    simulator = DataSimulator()
+    rasters = build_rasters(tmp_path, simulator.layout)
+    assert isinstance(rasters.raster(1), np.memmap)
+    assert rasters.select([1, 999]) is None
+
+    selection = rasters.select(simulator.layout.station_ids)
+    loss, gradient, inside = selection.loss_and_gradient(np.array([[10.5, -20.25], [500.0, 0.0]]))
+    assert inside.tolist() == [True, False]
+    assert loss.shape == (2, len(simulator.layout)) and np.all(loss[1] == 0)
+
+    step = 1e-4
+    loss_dx, _, _ = selection.loss_and_gradient(np.array([[10.5 + step, -20.25]]))
+    assert np.allclose((loss_dx[0] - loss[0]) / step, gradient[0, :, 0], atol=1e-2)
+
+def test_simulator_and_locator_use_site_rasters(tmp_path):
+    simulator = DataSimulator()
+    simulator.noise_std = 0.0
+    simulator.path_loss_rasters = build_rasters(tmp_path, simulator.layout)
+    frame = simulator.generate_power_frame((25.3, -12.7))
+
+    algo = LocationAlgorithm(seed=0)
+    free_space = algo.calculate_location(frame, layout=simulator.layout)
+    algo.path_loss_rasters = simulator.path_loss_rasters
+    site = algo.calculate_location(frame, layout=simulator.layout)
+
+    site_error = np.hypot(site['position']['x'] - 25.3, site['position']['y'] + 12.7)
+    free_error = np.hypot(free_space['position']['x'] - 25.3, free_space['position']['y'] + 12.7)
+    assert site_error < 0.5 < free_error
+    assert np.allclose(algo.station_residuals(frame, site, layout=simulator.layout), 0, atol=0.5)
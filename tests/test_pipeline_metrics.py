@@ -0,0 +1,28 @@
+from modules.pipeline_metrics import PipelineMetrics
+
+def test_render_uses_prometheus_text_format():
+    metrics = PipelineMetrics()
+    metrics.inc('requests_total', help_text='API requests', endpoint='api.locate', status='200')
+    metrics.inc('requests_total', 2, endpoint='api.locate', status='200')
+    for seconds in (0.0002, 0.003, 5.0):
+        metrics.observe_stage('ransac', seconds)
+    with metrics.timer('optimizer'):
+        pass
+
+    text = metrics.render()
+    assert '# TYPE ew_requests_total counter' in text
+    assert 'ew_requests_total{endpoint="api.locate",status="200"} 3' in text
+    assert '# TYPE ew_stage_duration_seconds histogram' in text
+    assert 'ew_stage_duration_seconds_bucket{stage="ransac",le="0.00025"} 1' in text
+    assert 'ew_stage_duration_seconds_bucket{stage="ransac",le="0.005"} 2' in text
+    assert 'ew_stage_duration_seconds_bucket{stage="ransac",le="+Inf"} 3' in text
+    assert 'ew_stage_duration_seconds_count{stage="optimizer"} 1' in text
+    # 同一指标族只声明一次类型
+    assert text.count('# TYPE ew_stage_duration_seconds') == 1
+
+def test_disabled_metrics_record_nothing():
+    metrics = PipelineMetrics(enabled=False)
+    metrics.inc('requests_total')
+    with metrics.timer('ransac'):
+        pass
+    assert metrics.render() == '\n'
@@ -0,0 +1,34 @@
+import numpy as np
+from modules.data_simulator import DataSimulator
+from modules.anomaly_detector import AnomalyDetector
+from modules.location_algorithm import LocationAlgorithm
+from modules.power_frame import PowerFrame
+
+def test_frame_round_trips_records():
+    records = DataSimulator().generate_power_data((10, 20), add_anomaly=True)
+    frame = PowerFrame.from_records(records)
+
+    assert len(frame) == len(records)
+    assert frame.has_station_ids and frame.has_positions and not frame.has_geo
+    assert frame.to_records() == records
+
+    subset = frame.subset([0, 2])
+    assert subset.station_id.tolist() == [records[0]['station_id'], records[2]['station_id']]
+    assert PowerFrame.from_records([{'power': -50.0}]).has_station_ids is False
+
+def test_pipeline_accepts_frame_and_records():
+    simulator = DataSimulator()
+    frame = simulator.generate_power_frame((15, -25))
+    records = frame.to_records()
+    detector = AnomalyDetector()
+    algo = LocationAlgorithm(seed=0)
+
+    frame_anomalies = detector.detect_anomalies(frame, simulator.layout)
+    record_anomalies = detector.detect_anomalies(records, simulator.layout)
+    assert frame_anomalies == record_anomalies
+
+    frame_location = LocationAlgorithm(seed=0).calculate_location(
+        frame, frame_anomalies['normal_indices'], layout=simulator.layout)
+    record_location = algo.calculate_location(records, record_anomalies['normal_indices'])
+    assert np.allclose([frame_location['position']['x'], frame_location['position']['y']],
+                       [record_location['position']['x'], record_location['position']['y']])
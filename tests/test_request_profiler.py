@@ -0,0 +1,51 @@
+from modules.request_profiler import RequestProfiler
+
+def _busy_work():
+    return sum(i * i for i in range(10000))
+
+def test_profiles_are_saved_listed_and_pruned(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), max_profiles=2)
+    assert profiler.wanted({'X-Profile': '1'}, {}) and profiler.wanted({}, {'profile': 'true'})
+    assert not profiler.wanted({}, {}) and not profiler.wanted({}, {'profile': '0'})
+
+    names = []
+    for i in range(3):
+        profile = profiler.start()
+        # 同一时刻只剖析一个请求
+        assert profiler.start() is None
+        _busy_work()
+        names.append(profiler.finish(profile, 'api.locate_interference', 0.01, payload=b'{"power_data": []}'))
+
+    listed = profiler.list_profiles()
+    assert [p['name'] for p in listed] == names[:0:-1]
+    assert listed[0]['endpoint'] == 'api.locate_interference' and listed[0]['has_payload']
+    assert profiler.path_for(names[0]) is None
+    assert '_busy_work' in profiler.summary(names[-1])
+    assert open(profiler.path_for(names[-1], payload=True), 'rb').read() == b'{"power_data": []}'
+    assert profiler.path_for('../secrets.prof') is None
+
+def test_token_is_required_when_configured(tmp_path):
+    profiler = RequestProfiler(str(tmp_path), token='s3cret')
+    assert profiler.wanted({'X-Profile': 's3cret'}, {})
+    assert not profiler.wanted({'X-Profile': '1'}, {'profile': 'true'})
+
+def test_profile_endpoints_require_the_token(tmp_path, monkeypatch):
+    from app import create_app
+    from modules import api_routes
+    profiler = RequestProfiler(str(tmp_path), token='s3cret')
+    monkeypatch.setattr(api_routes, 'request_profiler', profiler)
+    client = create_app().test_client()
+
+    response = client.get('/api/stations', headers={'X-Profile': 's3cret'})
+    name = response.headers['X-Profile-Id']
+
+    assert client.get('/api/profiles').status_code == 403
+    assert client.get(f'/api/profiles/{name}?format=payload').status_code == 403
+    assert client.get(f'/api/profiles/{name}', headers={'X-Profile': 'wrong'}).status_code == 403
+    listed = client.get('/api/profiles', headers={'X-Profile': 's3cret'}).get_json()['profiles']
+    assert [p['name'] for p in listed] == [name]
+    assert client.get(f'/api/profiles/{name}?profile=s3cret').status_code == 200
+    assert client.get(f'/api/profiles/{name}?profile=s3cret&format=text&limit=x').status_code == 400
+    assert client.get(f'/api/profiles/{name}?profile=s3cret&format=text&limit=5').status_code == 200
+    # 访问剖析端点本身不会产生新的剖析
+    assert len(profiler.list_profiles()) == 1
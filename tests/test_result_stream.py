@@ -0,0 +1,96 @@
+import json
+import queue
+from modules.data_simulator import DataSimulator
+from modules.anomaly_detector import AnomalyDetector
+from modules.location_algorithm import LocationAlgorithm
+from modules.scenario_stream import ScenarioStream, LinearTrajectory
+from modules.result_stream import ResultBroadcaster
+
+def _parse(message):
+    fields = dict(line.split(': ', 1) for line in message.strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+def test_publish_fans_out_and_drops_oldest_for_slow_subscribers():
+    broadcaster = ResultBroadcaster(queue_size=2)
+    fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+
+    for sequence in range(3):
+        broadcaster.publish({'sequence': sequence})
+        _parse(fast.get_nowait())
+
+    assert [_parse(slow.get_nowait())[1]['sequence'] for _ in range(2)] == [1, 2]
+    broadcaster.unsubscribe(fast)
+    broadcaster.unsubscribe(slow)
+    assert broadcaster.subscriber_count == 0
+
+def test_source_results_are_computed_once_and_pushed_compactly():
+    simulator = DataSimulator()
+    stream = ScenarioStream(simulator, LinearTrajectory((-20, 10), (0.5, 0.0)), rate_hz=1.0, seed=0)
+    broadcaster = ResultBroadcaster(lambda: stream.locate(AnomalyDetector(), LocationAlgorithm(seed=0), n_sweeps=3))
+
+    subscriber = broadcaster.subscribe()
+    events = broadcaster.events(subscriber)
+    assert next(events).startswith('retry:')
+    messages = [_parse(next(events)) for _ in range(3)]
+
+    assert [data['sequence'] for _, data in messages] == [0, 1, 2]
+    assert all(event == 'location' and 'position' in data and 'power_frame' not in data
+               for event, data in messages)
+    events.close()
+    assert broadcaster.subscriber_count == 0
+    broadcaster.stop()
+
+def _fake_result(sequence):
+    return {'sequence': sequence, 'timestamp': 0.0, 'anomaly_indices': [], 'latency_ms': 0.0,
+            'location': {'position': {'x': 0.0, 'y': 0.0}, 'confidence': 90.0}}
+
+def test_failed_source_is_restarted_with_backoff():
+    attempts = []
+
+    def flaky_source():
+        attempts.append(len(attempts))
+        yield _fake_result(len(attempts))
+        if len(attempts) < 3:
+            raise RuntimeError('source failed')
+        while True:
+            yield _fake_result(99)
+
+    broadcaster = ResultBroadcaster(flaky_source, restart_backoff_s=0.01)
+    subscriber = broadcaster.subscribe()
+    events = [_parse(subscriber.get(timeout=5))[0] for _ in range(6)]
+
+    assert events[:5] == ['location', 'error', 'location', 'error', 'location']
+    assert len(attempts) == 3 and broadcaster.restarts == 2
+    broadcaster.stop()
+
+def test_finished_source_closes_subscribers_and_restarts_on_resubscribe():
+    broadcaster = ResultBroadcaster(lambda: iter([_fake_result(0)]))
+    first = broadcaster.subscribe()
+    events = broadcaster.events(first)
+    next(events)
+    assert _parse(next(events))[1]['sequence'] == 0
+    # 结果源结束后响应结束，客户端重连
+    assert list(events) == []
+
+    second = broadcaster.subscribe()
+    assert _parse(second.get(timeout=5))[1]['sequence'] == 0
+    broadcaster.stop()
+
+def test_subscribe_while_worker_is_exiting_still_gets_a_producer():
+    import threading
+    release = threading.Event()
+
+    def gated_source():
+        release.wait(5)
+        yield _fake_result(0)
+        while True:
+            release.wait(5)
+            yield _fake_result(1)
+
+    broadcaster = ResultBroadcaster(gated_source)
+    broadcaster.unsubscribe(broadcaster.subscribe())
+    # 旧线程产出下一个结果时发现没有订阅者而退出；此时新订阅者到来
+    late = broadcaster.subscribe()
+    release.set()
+    assert _parse(late.get(timeout=5))[0] == 'location'
+    broadcaster.stop()
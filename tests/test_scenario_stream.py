@@ -0,0 +1,55 @@
+import numpy as np
+from modules.data_simulator import DataSimulator
+from modules.anomaly_detector import AnomalyDetector
+from modules.location_algorithm import LocationAlgorithm
+from modules.scenario_stream import (ScenarioStream, LinearTrajectory, WaypointTrajectory,
+                                     RandomWalkTrajectory, summarize_stream)
+
+def test_sweeps_are_lazy_timestamped_and_reproducible():
+    simulator = DataSimulator()
+    trajectory = WaypointTrajectory([(-60, -60), (60, -60)], speed=10.0, loop=False)
+    stream = ScenarioStream(simulator, trajectory, rate_hz=2.0, burst_probability=0.05,
+                            dropout_probability=0.05, seed=3, chunk_size=8)
+
+    sweeps = list(stream.sweeps(duration=10, start_time=1000.0))
+    assert len(sweeps) == 20
+    assert [s['timestamp'] for s in sweeps[:3]] == [1000.0, 1000.5, 1001.0]
+    assert sweeps[-1]['emitter_position'] == {'x': 35.0, 'y': -60.0}
+    assert all(len(s['power_frame']) >= stream.min_active_stations for s in sweeps)
+
+    again = ScenarioStream(simulator, WaypointTrajectory([(-60, -60), (60, -60)], 10.0, loop=False),
+                           rate_hz=2.0, burst_probability=0.05, dropout_probability=0.05, seed=3, chunk_size=8)
+    for a, b in zip(sweeps, again.sweeps(duration=10, start_time=1000.0)):
+        assert np.array_equal(a['power_frame'].power, b['power_frame'].power)
+        assert a['online_station_ids'] == b['online_station_ids']
+
+def test_stream_into_locate_pipeline():
+    simulator = DataSimulator()
+    stream = ScenarioStream(simulator, LinearTrajectory((-20, 10), (0.5, 0.0)), rate_hz=1.0, seed=0)
+    summary = summarize_stream(stream.locate(AnomalyDetector(), LocationAlgorithm(seed=0), n_sweeps=30))
+
+    assert summary['sweeps'] == summary['located'] == 30
+    assert summary['mean_error_km'] < 30
+
+    walk = RandomWalkTrajectory((0, 0), step_std=5.0, bound=10.0)
+    positions = walk.positions(np.arange(1, 50, dtype=float), np.random.default_rng(0))
+    assert np.abs(positions).max() <= 10.0
+
+def test_sweeps_follow_station_adds_and_deletes():
+    simulator = DataSimulator()
+    stream = ScenarioStream(simulator, LinearTrajectory((0, 0), (0.5, 0.0)), rate_hz=1.0,
+                            dropout_probability=0.1, seed=1, chunk_size=4)
+    results = stream.locate(AnomalyDetector(), LocationAlgorithm(seed=0))
+
+    before = [next(results) for _ in range(4)]
+    deleted = int(simulator.layout.station_ids[0])
+    simulator.delete_station(deleted)
+    after = [next(results) for _ in range(4)]
+    added = simulator.add_station('LATE', 39.95, 116.45)['id']
+    after += [next(results) for _ in range(4)]
+
+    assert all('error' not in r['location'] for r in before + after)
+    sweeps = list(stream.sweeps(n_sweeps=4))
+    assert all(deleted not in s['online_station_ids'] for s in sweeps)
+    assert all(len(s['power_frame']) == len(s['online_station_ids']) for s in sweeps)
+    assert any(added in s['online_station_ids'] for s in sweeps)
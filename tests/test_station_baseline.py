@@ -0,0 +1,23 @@
+import pytest
+import numpy as np
+from modules.station_baseline import StationBaselines
+
+def test_sliding_window_statistics_match_numpy():
+    baselines = StationBaselines(window=16, min_samples=4)
+    samples = np.random.default_rng(0).normal(-60, 3, size=(50, 2))
+
+    for row in samples:
+        baselines.update([7, 9], row)
+
+    summary = {s['station_id']: s for s in baselines.get_summary()}
+    assert summary[7]['samples'] == 16
+    assert summary[7]['power_mean'] == pytest.approx(samples[-16:, 0].mean())
+    assert summary[9]['power_std'] == pytest.approx(samples[-16:, 1].std())
+
+def test_persistent_residual_marks_station_faulty():
+    baselines = StationBaselines(min_samples=5, fault_threshold=10.0)
+
+    for _ in range(10):
+        baselines.update_residuals([1, 2, 3], np.array([0.5, 18.0, -1.0]))
+
+    assert baselines.faulty_mask([1, 2, 3, 4]).tolist() == [False, True, False, False]
@@ -0,0 +1,21 @@
+import pytest
+import numpy as np
+from modules.data_simulator import DataSimulator
+
+def test_layout_is_cached_until_stations_change():
+    simulator = DataSimulator()
+    layout = simulator.layout
+
+    assert simulator.layout is layout
+    assert np.allclose(np.diag(layout.distance_matrix), 0.0)
+    assert layout.distance_matrix[0, 1] == pytest.approx(160.0)
+
+    simulator.generate_power_data((0, 0))
+    assert simulator.layout is layout
+
+    new_station = simulator.add_station('NEW', 39.9, 116.4)
+    assert simulator.layout.version > layout.version
+    assert new_station['id'] in simulator.layout.index
+
+    simulator.delete_station(new_station['id'])
+    assert new_station['id'] not in simulator.layout.index
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from modules.station_registry import StationRegistry
+
+def test_registry_crud_keeps_order_and_snapshots():
+    registry = StationRegistry(capacity=2)
+    ids = registry.add_many(['A', 'B', 'C', 'D'], x=[0, 1, 2, 3], y=[0, 0, 0, 0])
+    assert ids == [1, 2, 3, 4]
+
+    before = registry.snapshot()
+    assert registry.snapshot() is before
+    assert not before.positions.flags.writeable
+
+    assert registry.update(2, x=10.0)
+    assert registry.delete(1) and not registry.delete(1)
+    assert registry.add('E', 5, 5) == 5
+    assert registry.update_many([3, 99], x=[20.0, 0.0]) == 1
+
+    after = registry.snapshot()
+    assert after.version > before.version
+    assert after.station_ids.tolist() == [2, 3, 4, 5]
+    assert after.positions[:, 0].tolist() == [10.0, 20.0, 3.0, 5.0]
+    assert before.positions[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert registry.get(3)['x'] == 20.0 and registry.get(1) is None
+
+    with pytest.raises(ValueError):
+        registry.add('dup', 0, 0, station_id=2)
+
+def test_registry_compacts_deleted_slots():
+    registry = StationRegistry(capacity=4)
+    ids = registry.add_many([f'S{i}' for i in range(1000)], np.arange(1000.0), np.zeros(1000))
+    assert registry.delete_many(ids[::2]) == 500
+    registry.add_many([f'T{i}' for i in range(600)], np.arange(600.0), np.ones(600))
+
+    layout = registry.snapshot()
+    assert len(layout) == len(registry) == 1100
+    assert layout.station_ids[:3].tolist() == [2, 4, 6]
+    assert registry.get(ids[1])['name'] == 'S1'
+    assert registry.get(layout.station_ids[-1])['name'] == 'T599'
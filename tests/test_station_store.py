@@ -0,0 +1,60 @@
+from modules.data_simulator import DataSimulator
+from modules.station_store import StationStore, StationStateSync
+
+def test_mutation_in_one_worker_is_pulled_by_another(tmp_path):
+    path = str(tmp_path / 'stations.db')
+    first = StationStateSync(StationStore(path), DataSimulator())
+    second = StationStateSync(StationStore(path), DataSimulator())
+    first.initialize()
+    second.initialize()
+    assert not second.pull()
+
+    deleted = int(second.simulator.layout.station_ids[0])
+    with first.mutation() as simulator:
+        added = simulator.add_station('NEW', 40.1, 116.6)
+        assert simulator.delete_station(deleted)
+    with first.mutation() as simulator:
+        simulator.set_center_coordinates(31.23, 121.47)
+
+    assert second.pull()
+    ids = [s['id'] for s in second.simulator.get_stations_info()]
+    assert ids == [s['id'] for s in first.simulator.get_stations_info()]
+    assert added['id'] in ids and deleted not in ids
+    assert second.simulator.layout.indices_for([deleted]) is None
+    assert (second.simulator.geo_converter.center_lat, second.simulator.geo_converter.center_lon) == (31.23, 121.47)
+
+    # 已删除的 ID 不会在另一个进程中被重新分配
+    with second.mutation() as simulator:
+        assert simulator.add_station('NEXT', 40.0, 116.5)['id'] == added['id'] + 1
+    assert first.pull()
+    assert len(first.simulator.get_stations_info()) == len(ids) + 1
+
+def test_background_layout_provider_pulls_peer_changes(tmp_path):
+    from modules.scenario_stream import ScenarioStream, LinearTrajectory
+    path = str(tmp_path / 'stations.db')
+    first = StationStateSync(StationStore(path), DataSimulator())
+    second = StationStateSync(StationStore(path), DataSimulator())
+    first.initialize()
+    second.initialize()
+
+    def current_layout():
+        second.pull()
+        return second.simulator.layout
+
+    stream = ScenarioStream(second.simulator, LinearTrajectory((0, 0), (0.5, 0.0)), seed=0, chunk_size=2,
+                            layout_provider=current_layout)
+    sweeps = stream.sweeps()
+    removed = int(next(sweeps)['layout'].station_ids[0])
+    with first.mutation() as simulator:
+        simulator.delete_station(removed)
+    next(sweeps)
+    # 下一块开始前同步到其它进程的删除
+    assert removed not in next(sweeps)['online_station_ids']
+
+def test_production_defaults_to_one_threaded_worker(monkeypatch):
+    from run import parse_args
+    monkeypatch.delenv('WEB_WORKERS', raising=False)
+    monkeypatch.delenv('WEB_THREADS', raising=False)
+    # 航迹、在线基线、接入结果与推送订阅只在进程内可见：默认不拆分进程
+    args = parse_args(['--production'])
+    assert args.workers == 1 and args.threads > 1